@@ -0,0 +1,57 @@
+"""Compare the ORM and JSON-aggregation read paths of GET /api/tweets.
+
+Usage:
+    python -m benchmarks.bench_feed_read_path [--database-url URL] [--tweets N]
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.common import (
+    DEFAULT_DATABASE_URL,
+    make_engine,
+    measure,
+    override_db,
+    report,
+    seed,
+)
+
+from httpx import ASGITransport, AsyncClient
+
+from src import config
+from src.main import app
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Seed a database and time both read paths through the ASGI app."""
+    engine = await make_engine(args.database_url)
+    await seed(engine, users=args.users, tweets=args.tweets, likes_per_tweet=args.likes)
+    override_db(engine)
+
+    transport = ASGITransport(app=app)
+    results = {}
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for read_path in ("orm", "json"):
+            config.TWEETS_READ_PATH = read_path
+
+            async def request() -> None:
+                response = await client.get("/api/tweets")
+                response.raise_for_status()
+
+            stats = await measure(request, args.iterations)
+            response = await client.get("/api/tweets")
+            stats["payload_kb"] = len(response.content) / 1024
+            results[read_path] = stats
+
+    await engine.dispose()
+    report(f"GET /api/tweets: {args.tweets} tweets, {args.likes} likes each", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tweets", type=int, default=500)
+    parser.add_argument("--likes", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+"""Measure feed payload size and compression cost on a seeded database.
+
+Compares the full feed, the compact likes mode and a ``fields=`` projection,
+each sent as identity, gzip and brotli.
+
+Usage:
+    python -m benchmarks.bench_payload [--database-url URL] [--tweets N]
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import (
+    DEFAULT_DATABASE_URL,
+    make_engine,
+    measure,
+    override_db,
+    report,
+    seed,
+)
+
+from httpx import ASGITransport, AsyncClient
+
+from src import compression
+from src.main import app
+
+VARIANTS = {
+    "full": {},
+    "compact": {"likes": "compact"},
+    "fields": {"fields": "id,content,author"},
+}
+
+
+def compression_cpu_ms(body: bytes, encoding: str, rounds: int = 5) -> float:
+    """Average CPU time spent compressing ``body``."""
+    started = time.process_time()
+    for _ in range(rounds):
+        compression.compress(body, encoding)
+    return (time.process_time() - started) * 1000 / rounds
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Seed a database and report bytes on the wire and CPU per variant."""
+    engine = await make_engine(args.database_url)
+    await seed(engine, users=args.users, tweets=args.tweets, likes_per_tweet=args.likes)
+    override_db(engine)
+
+    encodings = ["identity", "gzip"] + (["br"] if compression.brotli else [])
+    transport = ASGITransport(app=app)
+    results = {}
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for variant, params in VARIANTS.items():
+            identity = {"accept-encoding": "identity"}
+            raw = (
+                await client.get("/api/tweets", params=params, headers=identity)
+            ).content
+            for encoding in encodings:
+                headers = {"accept-encoding": encoding}
+
+                async def request(
+                    params: dict = params, headers: dict = headers
+                ) -> None:
+                    response = await client.get(
+                        "/api/tweets", params=params, headers=headers
+                    )
+                    response.raise_for_status()
+
+                stats = await measure(request, args.iterations)
+                wire = (
+                    len(raw)
+                    if encoding == "identity"
+                    else len(compression.compress(raw, encoding))
+                )
+                stats["wire_kb"] = wire / 1024
+                stats["saved_%"] = 100 * (1 - wire / len(raw))
+                stats["cpu_ms"] = (
+                    0.0 if encoding == "identity" else compression_cpu_ms(raw, encoding)
+                )
+                results[f"{variant} [{encoding}]"] = stats
+
+    await engine.dispose()
+    report(f"GET /api/tweets: {args.tweets} tweets, {args.likes} likes each", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tweets", type=int, default=300)
+    parser.add_argument("--likes", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
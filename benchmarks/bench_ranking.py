@@ -0,0 +1,95 @@
+"""Measure the cost of recomputing the top feed scores.
+
+Scores synthetic arrays of millions of tweets with NumPy (the part that
+grows with the ranking window), then runs a full ``recompute_scores`` on a
+seeded database, including the feature query and the ``tweet_scores``
+rewrite.
+
+Usage:
+    python -m benchmarks.bench_ranking [--sizes 1000000,5000000] [--tweets N]
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Callable
+
+from benchmarks.common import DEFAULT_DATABASE_URL, make_engine, report, seed
+
+import numpy as np
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src import config
+from src.ranking import recompute_scores, score_tweets, top_k
+
+
+def synthetic(size: int, rng: np.random.Generator) -> tuple[np.ndarray, ...]:
+    """Return tweet IDs, like counts, ages and follower counts for ``size`` tweets."""
+    return (
+        np.arange(1, size + 1, dtype=np.int64),
+        rng.pareto(1.5, size).astype(np.float64) * 10,
+        rng.uniform(0, config.RANK_WINDOW_DAYS * 24, size),
+        rng.pareto(1.2, size).astype(np.float64) * 100,
+    )
+
+
+def time_ms(func: Callable[[], object], rounds: int) -> dict[str, float]:
+    """Return the best and mean wall time of ``func`` in ms."""
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"best_ms": min(samples), "mean_ms": sum(samples) / len(samples)}
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Report the vectorized scoring cost and a full database recompute."""
+    rng = np.random.default_rng(42)
+    results = {}
+    for size in (int(value) for value in args.sizes.split(",")):
+        tweet_ids, likes, ages, followers = synthetic(size, rng)
+        results[f"score {size:,}"] = time_ms(
+            lambda likes=likes, ages=ages, followers=followers: score_tweets(
+                likes, ages, followers
+            ),
+            args.rounds,
+        )
+        scores = score_tweets(likes, ages, followers)
+        results[f"top {config.RANK_TOP_SIZE} of {size:,}"] = time_ms(
+            lambda tweet_ids=tweet_ids, scores=scores: top_k(
+                tweet_ids, scores, config.RANK_TOP_SIZE
+            ),
+            args.rounds,
+        )
+
+    engine = await make_engine(args.database_url)
+    await seed(engine, users=args.users, tweets=args.tweets, likes_per_tweet=args.likes)
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    samples = []
+    for _ in range(args.rounds):
+        async with session_factory() as db:
+            started = time.perf_counter()
+            await recompute_scores(db)
+            samples.append((time.perf_counter() - started) * 1000)
+    results[f"recompute db {args.tweets:,}"] = {
+        "best_ms": min(samples),
+        "mean_ms": sum(samples) / len(samples),
+    }
+    await engine.dispose()
+
+    report("Top feed score recomputation", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--sizes", default="100000,1000000,5000000")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tweets", type=int, default=50000)
+    parser.add_argument("--likes", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,138 @@
+"""Compare ORM entities and the read models of src/services/read_models.py.
+
+Each loader reads the same rows in a fresh session: the feed (tweets,
+authors and likers) and the profile of a user with many followers. Reported
+per 10k rows read: wall time and peak memory traced while loading.
+
+Usage:
+    python -m benchmarks.bench_read_models [--database-url URL] [--tweets N]
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+
+from benchmarks.common import DEFAULT_DATABASE_URL, make_engine, report, seed
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+from src.models import Like, Tweet, User, followers_table
+from src.services.read_models import load_feed, load_profile
+
+
+async def orm_feed(db: AsyncSession) -> list:
+    """Load the feed as entities, as GET /api/tweets used to."""
+    result = await db.execute(
+        select(Tweet)
+        .where(Tweet.deleted_at.is_(None))
+        .order_by(Tweet.created_at, Tweet.id)
+        .options(
+            selectinload(Tweet.user),
+            selectinload(Tweet.likes).selectinload(Like.user),
+        )
+    )
+    return result.scalars().all()
+
+
+async def model_feed(db: AsyncSession) -> list:
+    """Load the feed as read models."""
+    return await load_feed(db, attachments=False)
+
+
+async def orm_profile(db: AsyncSession) -> User:
+    """Load user 1's profile as entities, as the profile routes used to."""
+    result = await db.execute(
+        select(User)
+        .where(User.id == 1)
+        .options(
+            selectinload(User.followers),
+            selectinload(User.following),
+            joinedload(User.stats),
+        )
+    )
+    return result.scalars().first()
+
+
+async def model_profile(db: AsyncSession) -> object:
+    """Load user 1's profile as a read model."""
+    return await load_profile(db, User.id == 1)
+
+
+async def run(
+    engine: AsyncEngine,
+    loader: Callable[[AsyncSession], Awaitable[object]],
+    rows: int,
+    iterations: int,
+) -> dict[str, float]:
+    """Time ``loader`` and trace its peak memory, both per 10k rows."""
+    samples = []
+    for _ in range(iterations):
+        async with AsyncSession(engine) as db:
+            started = time.perf_counter()
+            await loader(db)
+            samples.append(time.perf_counter() - started)
+    async with AsyncSession(engine) as db:
+        tracemalloc.start()
+        try:
+            loaded = await loader(db)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        del loaded
+    scale = 10_000 / rows
+    return {
+        "ms_per_10k": min(samples) * 1000 * scale,
+        "peak_mib_per_10k": peak / 2**20 * scale,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Seed a database and measure both loaders of each read path."""
+    engine = await make_engine(args.database_url)
+    await seed(
+        engine,
+        users=args.users,
+        tweets=args.tweets,
+        likes_per_tweet=args.likes,
+        media_per_tweet=0,
+    )
+    # User 1 follows and is followed by every other user
+    follows = [(i, 1) for i in range(2, args.users + 1)]
+    follows += [(1, i) for i in range(2, args.users + 1)]
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(followers_table),
+            [{"follower_id": a, "followee_id": b} for a, b in follows],
+        )
+
+    feed_rows = args.tweets * (1 + args.likes)
+    profile_rows = len(follows)
+    results = {}
+    for name, loader, rows in (
+        ("feed: orm", orm_feed, feed_rows),
+        ("feed: read model", model_feed, feed_rows),
+        ("profile: orm", orm_profile, profile_rows),
+        ("profile: read model", model_profile, profile_rows),
+    ):
+        results[name] = await run(engine, loader, rows, args.iterations)
+
+    await engine.dispose()
+    report(
+        f"{args.tweets} tweets with {args.likes} likes, "
+        f"profile with {args.users - 1} followers and followees",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--tweets", type=int, default=1000)
+    parser.add_argument("--likes", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
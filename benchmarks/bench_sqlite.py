@@ -0,0 +1,151 @@
+"""Compare write/read throughput of SQLite (default and tuned) and PostgreSQL.
+
+A mixed workload (feed reads, likes and new tweets) is run by concurrent
+clients against the ASGI app for a fixed time, once per database mode:
+
+- ``sqlite-default``: one engine with SQLAlchemy's default pool, no pragmas
+- ``sqlite-tuned``: the single-node mode of src/sqlite_mode.py
+- ``postgres``: only with ``--postgres-url``
+
+Usage:
+    python -m benchmarks.bench_sqlite [--postgres-url URL] [--clients N]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections.abc import AsyncIterator
+
+from benchmarks.common import report, seed
+
+from fastapi import Request
+
+from httpx import ASGITransport, AsyncClient
+
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from src import config, sqlite_mode
+from src.database import Base, get_async_db
+from src.main import app
+
+# A compact page without attachments, so reads stay cheap as tweets are added
+FEED_PARAMS = {"likes": "compact", "fields": "id,content,author,like_count"}
+
+
+def route_sessions(writer: AsyncEngine, reader: AsyncEngine) -> None:
+    """Serve GET requests from ``reader`` and everything else from ``writer``."""
+    config.RATE_LIMIT_ENABLED = False
+    writes = async_sessionmaker(
+        bind=writer, class_=AsyncSession, expire_on_commit=False
+    )
+    reads = async_sessionmaker(bind=reader, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db(request: Request) -> AsyncIterator[AsyncSession]:
+        factory = reads if request.method == "GET" else writes
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+
+async def workload(args: argparse.Namespace) -> dict[str, float]:
+    """Run the mixed workload and return throughput and latency."""
+    rnd = random.Random(7)
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + args.seconds
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+
+    async def client_loop(client: AsyncClient) -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            user = rnd.randint(1, args.users)
+            headers = {"api-key": f"key{user}"}
+            roll = rnd.random()
+            started = time.perf_counter()
+            if roll < args.read_ratio:
+                response = await client.get(
+                    "/api/tweets", params=FEED_PARAMS, headers=headers
+                )
+            elif roll < args.read_ratio + (1 - args.read_ratio) * 0.7:
+                tweet_id = rnd.randint(1, args.tweets)
+                response = await client.post(
+                    f"/api/tweets/{tweet_id}/likes", headers=headers
+                )
+            else:
+                response = await client.post(
+                    "/api/tweets", json={"tweet_data": "bench"}, headers=headers
+                )
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200 or response.json().get("result") is False:
+                errors += 1
+
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(args.clients)))
+
+    latencies.sort()
+    return {
+        "req_per_s": len(latencies) / args.seconds,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95)],
+        "errors": errors,
+    }
+
+
+async def run_mode(
+    writer: AsyncEngine, reader: AsyncEngine, args: argparse.Namespace
+) -> dict[str, float]:
+    """Create and seed a fresh schema, then run the workload."""
+    async with writer.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(writer, users=args.users, tweets=args.tweets, likes_per_tweet=5)
+    route_sessions(writer, reader)
+    try:
+        return await workload(args)
+    finally:
+        await writer.dispose()
+        if reader is not writer:
+            await reader.dispose()
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Benchmark every available database mode."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'default.db')}"
+        engine = create_async_engine(url)
+        results["sqlite-default"] = await run_mode(engine, engine, args)
+
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'tuned.db')}"
+        writer, reader = sqlite_mode.create_engines(url)
+        results["sqlite-tuned"] = await run_mode(writer, reader, args)
+
+    if args.postgres_url:
+        engine = create_async_engine(args.postgres_url)
+        results["postgres"] = await run_mode(engine, engine, args)
+
+    report(
+        f"{args.clients} clients for {args.seconds}s, {args.read_ratio:.0%} feed reads",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--postgres-url")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tweets", type=int, default=100)
+    parser.add_argument("--read-ratio", type=float, default=0.7)
+    asyncio.run(main(parser.parse_args()))
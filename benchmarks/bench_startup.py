@@ -0,0 +1,95 @@
+"""Measure time-to-first-request of a freshly started uvicorn worker.
+
+The database is migrated once up front; each run then starts a worker and
+polls GET /api/tweets until it answers.
+
+Usage:
+    python -m benchmarks.bench_startup [--database-url URL] [--runs N]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from alembic import command
+from alembic.config import Config
+
+import httpx
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "alembic.ini")
+
+
+def free_port() -> int:
+    """Ask the OS for an unused TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_request(env: dict[str, str], timeout: float = 30.0) -> float:
+    """Start one worker and return seconds until its first successful response."""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/api/tweets")
+                if response.status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            time.sleep(0.005)
+        raise TimeoutError("worker did not answer in time")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(args: argparse.Namespace) -> None:
+    """Migrate the database and report startup timings."""
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{tmp}/startup.db"
+        config = Config(ALEMBIC_INI)
+        config.set_main_option("sqlalchemy.url", database_url)
+        command.upgrade(config, "head")
+
+        env = dict(
+            os.environ,
+            DATABASE_URL=database_url,
+            DB_POOL_WARMUP=str(args.warmup),
+        )
+        samples = [time_to_first_request(env) * 1000 for _ in range(args.runs)]
+
+    print(f"time to first request over {args.runs} runs (pool warm-up {args.warmup})")
+    print(
+        f"  mean={statistics.fmean(samples):.1f}ms  min={min(samples):.1f}ms  "
+        f"max={max(samples):.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,92 @@
+"""Measure author timeline latency as the author's tweet count grows.
+
+Seeds one author per size (10 to 100k tweets by default), then times the
+first page and a page deep in the middle of each timeline. With keyset
+pagination over ``ix_tweets_live_author_id_created_at_id`` both should stay
+flat.
+
+Usage:
+    python -m benchmarks.bench_timeline [--database-url URL] [--sizes 10,1000]
+"""
+
+import argparse
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from benchmarks.common import (
+    DEFAULT_DATABASE_URL,
+    make_engine,
+    measure,
+    override_db,
+    report,
+)
+
+from httpx import ASGITransport, AsyncClient
+
+from sqlalchemy import insert
+
+from src.main import app
+from src.models import Tweet, User
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Seed one author per size and report timeline page latency."""
+    sizes = [int(value) for value in args.sizes.split(",")]
+    engine = await make_engine(args.database_url)
+    start = datetime.now(UTC) - timedelta(days=30)
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(User),
+            [
+                {"id": i, "name": f"author{i}", "api_key": f"key{i}"}
+                for i in range(1, len(sizes) + 1)
+            ],
+        )
+        next_id = 1
+        for author_id, size in enumerate(sizes, start=1):
+            rows = [
+                {
+                    "id": next_id + i,
+                    "content": f"tweet {i}",
+                    "media_ids": "[]",
+                    "author_id": author_id,
+                    "created_at": start + timedelta(seconds=i),
+                }
+                for i in range(size)
+            ]
+            for offset in range(0, size, 10000):
+                end = offset + 10000
+                await conn.execute(insert(Tweet), rows[offset:end])
+            next_id += size
+    override_db(engine)
+
+    transport = ASGITransport(app=app)
+    results = {}
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        first_id = 1
+        for author_id, size in enumerate(sizes, start=1):
+            url = f"/api/users/{author_id}/tweets"
+            # The cursor of a page in the middle of the timeline
+            middle = {"limit": args.limit, "before": first_id + size // 2}
+            for page, params in (("first", {"limit": args.limit}), ("deep", middle)):
+
+                async def request(url: str = url, params: dict = params) -> None:
+                    response = await client.get(url, params=params)
+                    response.raise_for_status()
+
+                results[f"{size:>7} tweets [{page}]"] = await measure(
+                    request, args.iterations
+                )
+            first_id += size
+
+    await engine.dispose()
+    report(f"GET /api/users/{{id}}/tweets?limit={args.limit}", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--sizes", default="10,1000,10000,100000")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,162 @@
+"""Measure how feed and like throughput scale with the gunicorn worker count.
+
+The database is recreated and seeded once; for each worker count gunicorn
+is started with gunicorn.conf.py and the feed (``GET /api/tweets``) and
+like (``POST``/``DELETE /api/tweets/{id}/likes``) scenarios are each run
+for a fixed time by concurrent clients spread over several load processes.
+
+Throughput can only grow up to the number of free cores, and the load
+processes need cores too. SQLite serializes writes, so use
+``--database-url`` with PostgreSQL to see likes scale.
+
+Usage:
+    python -m benchmarks.bench_workers [--database-url URL] [--workers 1,2,4]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.bench_startup import free_port
+from benchmarks.common import make_engine, report, seed
+
+import httpx
+
+FEED_PARAMS = {"likes": "compact", "fields": "id,content,author,like_count"}
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+async def _load(
+    url: str, scenario: str, clients: int, seconds: float, args: dict, seed_value: int
+) -> list[float]:
+    rnd = random.Random(seed_value)
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        while time.perf_counter() < deadline:
+            headers = {"api-key": f"key{rnd.randint(1, args['users'])}"}
+            started = time.perf_counter()
+            if scenario == "feed":
+                response = await client.get(
+                    "/api/tweets", params=FEED_PARAMS, headers=headers
+                )
+            else:
+                path = f"/api/tweets/{rnd.randint(1, args['tweets'])}/likes"
+                method = client.post if rnd.random() < 0.5 else client.delete
+                response = await method(path, headers=headers)
+            # A repeated like or a missing unlike is a 4xx, still served
+            if response.status_code < 500:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+    return latencies
+
+
+def load_process(*load_args: object) -> list[float]:
+    """Run one load process's share of the clients (see ``_load``)."""
+    return asyncio.run(_load(*load_args))
+
+
+def wait_ready(url: str, timeout: float = 60.0) -> None:
+    """Poll the feed until the server answers."""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            if httpx.get(f"{url}/api/tweets").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError("gunicorn did not answer in time")
+
+
+def run_scenario(url: str, scenario: str, args: argparse.Namespace) -> dict:
+    """Run a scenario from ``--load-processes`` processes; return throughput."""
+    sizes = {"users": args.users, "tweets": args.tweets}
+    per_process = max(1, args.clients // args.load_processes)
+    with ProcessPoolExecutor(args.load_processes) as pool:
+        futures = [
+            pool.submit(
+                load_process, url, scenario, per_process, args.seconds, sizes, i
+            )
+            for i in range(args.load_processes)
+        ]
+        latencies = sorted(x for future in futures for x in future.result())
+    return {
+        "req_per_s": len(latencies) / args.seconds,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95)],
+    }
+
+
+async def prepare(database_url: str, args: argparse.Namespace) -> None:
+    """Recreate and seed the benchmark database."""
+    engine = await make_engine(database_url)
+    await seed(engine, users=args.users, tweets=args.tweets, likes_per_tweet=5)
+    await engine.dispose()
+
+
+def main(args: argparse.Namespace) -> None:
+    """Start gunicorn with each worker count and report the throughput."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{tmp}/workers.db"
+        asyncio.run(prepare(database_url, args))
+        for workers in (int(value) for value in args.workers.split(",")):
+            port = free_port()
+            url = f"http://127.0.0.1:{port}"
+            env = dict(
+                os.environ,
+                DATABASE_URL=database_url,
+                DB_SCHEMA_CHECK="0",
+                WEB_CONCURRENCY=str(workers),
+                BIND=f"127.0.0.1:{port}",
+                RATE_LIMIT_ENABLED="0",
+                JOB_WORKERS="0",
+                MEDIA_DIR=tmp,
+                LIKES_LOG_PATH=os.path.join(tmp, "likes.log"),
+            )
+            command = [sys.executable, "-m", "gunicorn", "src.main:app"]
+            server = subprocess.Popen(
+                [*command, "-c", "gunicorn.conf.py"],
+                cwd=ROOT,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_ready(url)
+                for scenario in ("feed", "like"):
+                    results[f"{workers} workers [{scenario}]"] = run_scenario(
+                        url, scenario, args
+                    )
+            finally:
+                server.terminate()
+                server.wait()
+
+    report(
+        f"{args.clients} clients in {args.load_processes} processes "
+        f"for {args.seconds}s per scenario",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--load-processes", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tweets", type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,130 @@
+"""Shared helpers for the benchmark scripts."""
+
+import json
+import random
+import statistics
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from src import config
+from src.database import Base, get_async_db
+from src.main import app
+from src.models import Like, Media, Tweet, User
+
+DEFAULT_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+async def make_engine(database_url: str = DEFAULT_DATABASE_URL) -> AsyncEngine:
+    """Create an engine with a freshly created schema."""
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+async def seed(
+    engine: AsyncEngine,
+    users: int = 100,
+    tweets: int = 1000,
+    likes_per_tweet: int = 10,
+    media_per_tweet: int = 1,
+    seed_value: int = 42,
+) -> None:
+    """Populate the database with deterministic synthetic data."""
+    rnd = random.Random(seed_value)
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    "id": i,
+                    "name": f"user{i}",
+                    "api_key": f"key{i}",
+                    "display_name": f"User {i}",
+                }
+                for i in range(1, users + 1)
+            ],
+        )
+        media_rows = []
+        tweet_rows = []
+        for tweet_id in range(1, tweets + 1):
+            author_id = rnd.randint(1, users)
+            media_ids = []
+            for _ in range(media_per_tweet):
+                media_id = len(media_rows) + 1
+                media_rows.append(
+                    {
+                        "id": media_id,
+                        "filename": f"{media_id:08x}.jpg",
+                        "user_id": author_id,
+                    }
+                )
+                media_ids.append(media_id)
+            tweet_rows.append(
+                {
+                    "id": tweet_id,
+                    "content": f"tweet {tweet_id} " + "x" * rnd.randint(10, 200),
+                    "media_ids": json.dumps(media_ids),
+                    "author_id": author_id,
+                }
+            )
+        if media_rows:
+            await conn.execute(insert(Media), media_rows)
+        await conn.execute(insert(Tweet), tweet_rows)
+
+        like_rows = []
+        for tweet_id in range(1, tweets + 1):
+            likers = rnd.sample(range(1, users + 1), min(likes_per_tweet, users))
+            like_rows.extend({"tweet_id": tweet_id, "user_id": u} for u in likers)
+        if like_rows:
+            await conn.execute(insert(Like), like_rows)
+
+
+def override_db(engine: AsyncEngine) -> None:
+    """Point the app's session dependency at the engine, without rate limits."""
+    config.RATE_LIMIT_ENABLED = False
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    async def override_get_db() -> AsyncIterator[AsyncSession]:
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+
+async def measure(
+    func: Callable[[], Awaitable[object]], iterations: int, warmup: int = 3
+) -> dict[str, float]:
+    """Run an async callable repeatedly and return latency statistics in ms."""
+    for _ in range(warmup):
+        await func()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def report(title: str, rows: dict[str, dict[str, float]]) -> None:
+    """Print benchmark results as an aligned table."""
+    print(title)
+    for name, stats in rows.items():
+        values = "  ".join(f"{key}={value:10.2f}" for key, value in stats.items())
+        print(f"  {name:<24} {values}")
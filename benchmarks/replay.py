@@ -0,0 +1,190 @@
+"""Replay a captured traffic trace against the app and compare latencies.
+
+Traces are written by src/capture.py. The app runs in process on a freshly
+seeded database, as in the other benchmarks; every distinct key tag of the
+trace is mapped to one seeded user, and bodies are rebuilt from their
+recorded shapes. Requests start at their original offsets divided by
+``--speed`` (``0``: back to back with ``--concurrency`` in flight).
+
+Latency percentiles are reported per route. Save a run of one build with
+``--output`` and pass it to the run of another with ``--compare``::
+
+    python -m benchmarks.replay trace.jsonl --output before.json
+    git checkout feature
+    python -m benchmarks.replay trace.jsonl --compare before.json
+
+Usage:
+    python -m benchmarks.replay TRACE [--speed 1] [--database-url URL]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter, defaultdict
+
+from benchmarks.common import (
+    DEFAULT_DATABASE_URL,
+    make_engine,
+    override_db,
+    report,
+    seed,
+)
+
+from httpx import ASGITransport, AsyncClient, Response
+
+from src import config
+from src.capture import FORMAT_VERSION, json_from_shape
+from src.main import app
+
+# SOI, a baseline frame header (8 bits, 1x1, one component) and a scan header
+JPEG_HEAD = (
+    b"\xff\xd8"
+    b"\xff\xc0\x00\x0b\x08\x00\x01\x00\x01\x01\x01\x11\x00"
+    b"\xff\xda\x00\x08\x01\x01\x00\x00\x3f\x00"
+)
+
+
+def load_trace(path: str) -> list[dict]:
+    """Read a trace, oldest request first."""
+    with open(path, encoding="utf-8") as trace:
+        records = [json.loads(line) for line in trace if line.strip()]
+    newer = {r["v"] for r in records if r["v"] > FORMAT_VERSION}
+    if newer:
+        raise SystemExit(f"{path} uses capture format {max(newer)}, too new")
+    return sorted(records, key=lambda record: record["ts"])
+
+
+def request_body(shape: dict | None) -> dict:
+    """Return httpx arguments for a body of the recorded shape."""
+    if not shape:
+        return {}
+    if "json" in shape:
+        return {"json": json_from_shape(shape["json"])}
+    if "multipart" in shape:
+        # A 1x1 frame and scan header around filler of about the same size;
+        # enough for the upload's JPEG structure check
+        size = max(shape["multipart"] - 200, len(JPEG_HEAD) + 2)
+        payload = JPEG_HEAD + b"\0" * (size - len(JPEG_HEAD) - 2) + b"\xff\xd9"
+        return {"files": {"file": ("replay.jpg", payload, "image/jpeg")}}
+    return {"content": b"x" * shape["bytes"]}
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """Return the p50/p95/p99 of latency samples in ms."""
+    samples = sorted(samples)
+
+    def at(fraction: float) -> float:
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+    return {"p50_ms": at(0.5), "p95_ms": at(0.95), "p99_ms": at(0.99)}
+
+
+async def replay(records: list[dict], args: argparse.Namespace) -> dict:
+    """Send the trace's requests and return per-route statistics."""
+    users = {}
+    for record in records:
+        if record["key"] and record["key"] not in users:
+            users[record["key"]] = f"key{len(users) % args.users + 1}"
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    statuses: dict[str, Counter[int]] = defaultdict(Counter)
+    changed: Counter[str] = Counter()
+    slots = asyncio.Semaphore(args.concurrency if args.speed == 0 else len(records))
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+
+    async def send(client: AsyncClient, record: dict) -> None:
+        name = f"{record['method']} {record['route'] or record['path']}"
+        headers = {"api-key": users[record["key"]]} if record["key"] else {}
+        url = record["path"] + (f"?{record['query']}" if record["query"] else "")
+        async with slots:
+            started = time.perf_counter()
+            response: Response = await client.request(
+                record["method"], url, headers=headers, **request_body(record["body"])
+            )
+            latencies[name].append((time.perf_counter() - started) * 1000)
+        statuses[name][response.status_code] += 1
+        if response.status_code != record["status"]:
+            changed[name] += 1
+
+    async with AsyncClient(transport=transport, base_url="http://replay") as client:
+        first = records[0]["ts"]
+        started = time.perf_counter()
+        tasks = []
+        for record in records:
+            if args.speed > 0:
+                due = (record["ts"] - first) / args.speed
+                await asyncio.sleep(max(0.0, due - (time.perf_counter() - started)))
+            tasks.append(asyncio.create_task(send(client, record)))
+        await asyncio.gather(*tasks)
+
+    return {
+        name: {
+            "count": len(samples),
+            **percentiles(samples),
+            "status_changed": changed[name],
+            "statuses": dict(statuses[name]),
+        }
+        for name, samples in sorted(latencies.items())
+    }
+
+
+def compare(current: dict, baseline: dict) -> dict[str, dict[str, float]]:
+    """Pair the percentiles of routes present in both runs."""
+    rows = {}
+    for name, stats in current.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        rows[name] = {
+            "p50_before": before["p50_ms"],
+            "p50_after": stats["p50_ms"],
+            "p95_before": before["p95_ms"],
+            "p95_after": stats["p95_ms"],
+            "p95_change_%": (stats["p95_ms"] / before["p95_ms"] - 1) * 100,
+        }
+    return rows
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Seed a database, replay the trace and report or compare the results."""
+    records = load_trace(args.trace)
+    if not records:
+        raise SystemExit(f"{args.trace} holds no requests")
+    engine = await make_engine(args.database_url)
+    await seed(engine, users=args.users, tweets=args.tweets, likes_per_tweet=5)
+    override_db(engine)
+    config.CAPTURE_PATH = None  # do not capture the replay itself
+    try:
+        results = await replay(records, args)
+    finally:
+        await engine.dispose()
+
+    speed = f"{args.speed}x" if args.speed else "full speed"
+    report(
+        f"{len(records)} requests from {args.trace} at {speed}",
+        {
+            name: {key: value for key, value in stats.items() if key != "statuses"}
+            for name, stats in results.items()
+        },
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump({"trace": args.trace, "routes": results}, output, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline:
+            rows = compare(results, json.load(baseline)["routes"])
+        report(f"compared with {args.compare}", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("trace")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tweets", type=int, default=200)
+    parser.add_argument("--output", help="save the per-route results as JSON")
+    parser.add_argument("--compare", help="results saved by an earlier run")
+    asyncio.run(main(parser.parse_args()))
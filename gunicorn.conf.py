@@ -0,0 +1,56 @@
+"""Gunicorn settings: several uvicorn workers per container.
+
+::
+
+    gunicorn src.main:app -c gunicorn.conf.py
+
+Settings come from the environment: ``WEB_CONCURRENCY`` (workers, default
+one per CPU), ``GUNICORN_PRELOAD``, ``GRACEFUL_TIMEOUT``, ``BIND`` and
+``FORWARDED_ALLOW_IPS``. See
+src/serving.py for the state each worker resets after the fork.
+"""
+
+import itertools
+import os
+
+from gunicorn.arbiter import Arbiter
+from gunicorn.workers.base import Worker
+
+# The app divides DB_CONNECTION_BUDGET by the same worker count
+workers = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.getenv("BIND", "0.0.0.0:8000")
+# Import the app once in the master: workers fork faster and share pages
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+# Seconds a stopping worker has to finish requests, flush buffered likes
+# and close its connections before it is killed
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+# Proxies whose X-Forwarded-For is trusted as the client address, which
+# the rate limiter keys anonymous callers by
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+loglevel = os.getenv("LOG_LEVEL", "warning")
+accesslog = None
+
+
+def when_ready(server: Arbiter) -> None:
+    """Report per-worker state that several workers would split."""
+    from src.serving import log_shared_state
+
+    log_shared_state(server.cfg.workers)
+
+
+def pre_fork(server: Arbiter, worker: Worker) -> None:
+    """Give the new worker the lowest slot no live worker holds."""
+    taken = {getattr(other, "slot", None) for other in server.WORKERS.values()}
+    worker.slot = next(slot for slot in itertools.count() if slot not in taken)
+
+
+def post_fork(server: Arbiter, worker: Worker) -> None:
+    """Reset the state inherited from the master (see src/serving.py)."""
+    from src.serving import after_fork
+
+    after_fork(worker.slot)
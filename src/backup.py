@@ -0,0 +1,292 @@
+"""Streaming export and bulk import of user data as gzip-compressed NDJSON.
+
+::
+
+    python -m src.backup export backup.ndjson.gz               # every user
+    python -m src.backup export alice.ndjson.gz --user-id 5    # one account
+    python -m src.backup import backup.ndjson.gz               # empty database
+
+Each line is ``{"table": ..., "row": {...}}``. Tables come in dependency
+order (users, medias, tweets, likes, followers) and are read with
+server-side cursors, so memory stays bounded by one batch however large
+the export is; ``GET /api/users/me/export`` streams the same format.
+
+Derived tables are not exported: the importer rebuilds ``user_stats`` and
+``tweet_media``, and the ``tweet.rank`` job rebuilds ``tweet_scores``.
+Soft-deleted tweets are left out.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import zlib
+from collections import Counter
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime
+from functools import partial
+from typing import IO
+
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    Table,
+    delete,
+    insert,
+    or_,
+    select,
+    text,
+    true,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from .database import async_engine
+from .models import (
+    Like,
+    Media,
+    Tweet,
+    User,
+    UserStats,
+    followers_table,
+    tweet_media_table,
+)
+from .services.user_stats import reconcile_stats
+
+TABLES: dict[str, Table] = {
+    "users": User.__table__,
+    "medias": Media.__table__,
+    "tweets": Tweet.__table__,
+    "likes": Like.__table__,
+    "followers": followers_table,
+}
+
+# Columns that must point at rows already in the target database; rows of
+# a one-account export that reference other accounts are skipped
+REFERENCES: dict[str, list[tuple[str, str]]] = {
+    "medias": [("user_id", "users")],
+    "tweets": [("author_id", "users")],
+    "likes": [("user_id", "users"), ("tweet_id", "tweets")],
+    "followers": [("follower_id", "users"), ("followee_id", "users")],
+}
+
+# Tables that must be empty in the import target; accounts alone, such as
+# the sample users seeded by migration 0002, are replaced by the import
+USER_DATA = ("medias", "tweets", "likes", "followers")
+
+# Rows per cursor fetch, insert statement and thread hop
+BATCH = 1000
+
+
+class BackupError(Exception):
+    """Raised when an import cannot be applied to the target database."""
+
+
+def _scope(name: str, user_id: int | None) -> ColumnElement[bool]:
+    """Rows of ``name`` that belong to the export."""
+    columns = TABLES[name].c
+    condition = columns.deleted_at.is_(None) if name == "tweets" else true()
+    if user_id is None:
+        return condition
+    if name == "followers":
+        return or_(columns.follower_id == user_id, columns.followee_id == user_id)
+    owner = {"users": "id", "tweets": "author_id"}.get(name, "user_id")
+    return condition & (columns[owner] == user_id)
+
+
+def _encode(name: str, row: dict) -> str:
+    line = json.dumps(
+        {
+            "table": name,
+            "row": {
+                key: value.isoformat() if isinstance(value, datetime) else value
+                for key, value in row.items()
+            },
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return f"{line}\n"
+
+
+async def export_lines(
+    conn: AsyncConnection, user_id: int | None = None
+) -> AsyncIterator[str]:
+    """
+    Stream the export as NDJSON lines.
+
+    Args:
+        conn: Connection to read from.
+        user_id: Export only this account's rows (all users if None).
+    """
+    for name, table in TABLES.items():
+        result = await conn.stream(
+            select(table)
+            .where(_scope(name, user_id))
+            .order_by(*table.primary_key.columns)
+            .execution_options(yield_per=BATCH)
+        )
+        async for row in result.mappings():
+            yield _encode(name, dict(row))
+
+
+async def gzip_chunks(lines: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Compress NDJSON lines into gzip chunks of about ``BATCH`` lines each."""
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    batch = []
+    async for line in lines:
+        batch.append(line.encode())
+        if len(batch) >= BATCH:
+            chunk = compressor.compress(b"".join(batch))
+            batch = []
+            if chunk:
+                yield chunk
+    yield compressor.compress(b"".join(batch)) + compressor.flush()
+
+
+async def export_to_file(
+    engine: AsyncEngine, path: str, user_id: int | None = None
+) -> None:
+    """Write an export to ``path`` (see ``export_lines``)."""
+    async with engine.connect() as conn:
+        handle = await asyncio.to_thread(open, path, "wb")
+        try:
+            async for chunk in gzip_chunks(export_lines(conn, user_id)):
+                await asyncio.to_thread(handle.write, chunk)
+        finally:
+            await asyncio.to_thread(handle.close)
+
+
+def _read_lines(handle: IO[str]) -> list[str]:
+    lines = []
+    for line in handle:
+        lines.append(line)
+        if len(lines) >= BATCH:
+            break
+    return lines
+
+
+def _decoder(table: Table) -> Callable[[dict], dict]:
+    dates = [column.name for column in table.c if isinstance(column.type, DateTime)]
+
+    def decode(row: dict) -> dict:
+        for name in dates:
+            if row.get(name) is not None:
+                row[name] = datetime.fromisoformat(row[name])
+        return row
+
+    return decode
+
+
+async def _insert_batch(
+    conn: AsyncConnection, name: str, rows: list[dict], counts: Counter[str]
+) -> None:
+    """Insert rows whose references exist; count the inserted and skipped."""
+    for column, target in REFERENCES.get(name, []):
+        wanted = {row[column] for row in rows if row[column] is not None}
+        target_id = TABLES[target].c.id
+        found = set(
+            (
+                await conn.execute(select(target_id).where(target_id.in_(wanted)))
+            ).scalars()
+        )
+        kept = [row for row in rows if row[column] is None or row[column] in found]
+        if len(kept) < len(rows):
+            counts[f"{name} skipped"] += len(rows) - len(kept)
+        rows = kept
+    if rows:
+        await conn.execute(insert(TABLES[name]), rows)
+    if name == "tweets":
+        attached = [
+            {"media_id": media_id, "tweet_id": row["id"]}
+            for row in rows
+            for media_id in dict.fromkeys(json.loads(row["media_ids"] or "[]"))
+        ]
+        if attached:
+            await conn.execute(insert(tweet_media_table), attached)
+    counts[name] += len(rows)
+
+
+async def import_file(engine: AsyncEngine, path: str) -> Counter[str]:
+    """
+    Restore an export into an empty database in one transaction.
+
+    The database counts as empty without media, tweets, likes and follows;
+    accounts already there are deleted first.
+
+    Rows are read and inserted in batches; ``tweet_media`` and ``user_stats``
+    are rebuilt and, on PostgreSQL, the ID sequences are moved past the
+    imported IDs.
+
+    Returns:
+        Rows inserted per table and rows skipped for dangling references.
+
+    Raises:
+        BackupError: If the target database already holds user data.
+    """
+    counts: Counter[str] = Counter()
+    decoders = {name: _decoder(table) for name, table in TABLES.items()}
+    async with engine.begin() as conn:
+        for name in USER_DATA:
+            row = await conn.execute(select(true()).select_from(TABLES[name]).limit(1))
+            if row.first() is not None:
+                raise BackupError("The target database is not empty")
+        await conn.execute(delete(UserStats))
+        await conn.execute(delete(User))
+
+        handle = await asyncio.to_thread(
+            partial(gzip.open, path, "rt", encoding="utf-8")
+        )
+        try:
+            name, rows = None, []
+            while lines := await asyncio.to_thread(_read_lines, handle):
+                for line in lines:
+                    record = json.loads(line)
+                    if record["table"] != name or len(rows) >= BATCH:
+                        if rows:
+                            await _insert_batch(conn, name, rows, counts)
+                        name, rows = record["table"], []
+                    rows.append(decoders[name](record["row"]))
+            if rows:
+                await _insert_batch(conn, name, rows, counts)
+        finally:
+            await asyncio.to_thread(handle.close)
+
+        if conn.dialect.name == "postgresql":
+            for table in ("users", "medias", "tweets", "likes"):
+                await conn.execute(
+                    text(
+                        f"SELECT setval('{table}_id_seq', "
+                        f"(SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"
+                    )
+                )
+
+    async with AsyncSession(engine) as db:
+        after_id = 0
+        while after_id is not None:
+            after_id = await reconcile_stats(db, after_id, BATCH)
+    return counts
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the export or import selected on the command line."""
+    try:
+        if args.command == "export":
+            await export_to_file(async_engine, args.path, args.user_id)
+            print(f"exported to {args.path}")
+        else:
+            counts = await import_file(async_engine, args.path)
+            for name, count in counts.items():
+                print(f"{name}: {count}")
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="User data export and import")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write an NDJSON.gz export")
+    export.add_argument("path")
+    export.add_argument("--user-id", type=int, help="export a single account")
+    restore = commands.add_parser("import", help="restore into an empty database")
+    restore.add_argument("path")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,180 @@
+"""Sampled capture of API traffic to a JSONL trace, for replay.
+
+With ``CAPTURE_PATH`` set, a ``CAPTURE_SAMPLE_RATE`` fraction of requests
+is appended to that file, one JSON object per line (format version 1):
+
+.. code-block:: json
+
+    {"v": 1, "ts": 1760870400.123, "method": "POST", "route": "/api/tweets",
+     "path": "/api/tweets", "query": "", "key": "9f86d081884c7d65",
+     "body": {"json": {"tweet_data": "str:42"}}, "status": 201,
+     "ms": 12.7}
+
+- ``ts``: wall-clock start time, so the traces of several workers can be
+  merged and replayed in order
+- ``route``: the route template (``/api/tweets/{id}/likes``), ``path`` the
+  concrete path
+- ``key``: the first 16 hex digits of the SHA-256 of the ``api-key``
+  header (null for anonymous requests); requests of one user share it
+- ``body``: the shape of the body, never its content: ``{"json": ...}``
+  with strings as ``"str:<length>"`` and other scalars as their type name,
+  ``{"multipart": <bytes>}`` or ``{"bytes": <bytes>}``; null if empty
+- ``ms``: time until the last response byte was sent
+
+Traces hold no secrets or user content, so representative ones can be
+checked in; ``benchmarks/replay.py`` replays them. Fields are only ever
+added; a change of meaning bumps ``v``.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import config
+from .ratelimit import STREAMING_PATHS
+
+FORMAT_VERSION = 1
+
+_write_lock = threading.Lock()
+
+
+def key_hash(api_key: bytes | None) -> str | None:
+    """Return the stable, non-reversible tag of an API key."""
+    if not api_key:
+        return None
+    return hashlib.sha256(api_key).hexdigest()[:16]
+
+
+def is_json(content_type: str) -> bool:
+    """Check whether a ``Content-Type`` is JSON."""
+    return content_type.startswith("application/json")
+
+
+def json_shape(value: object) -> object:
+    """Replace the scalars of a JSON value with type placeholders."""
+    if isinstance(value, dict):
+        return {key: json_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [json_shape(item) for item in value]
+    if isinstance(value, str):
+        return f"str:{len(value)}"
+    if value is None:
+        return None
+    return type(value).__name__  # bool, int or float
+
+
+def body_shape(content_type: str, body: bytes, size: int) -> dict | None:
+    """
+    Describe a request body without its content.
+
+    Args:
+        content_type: Request ``Content-Type``.
+        body: The body, only kept for JSON.
+        size: Body length in bytes.
+    """
+    if not size:
+        return None
+    if is_json(content_type):
+        try:
+            return {"json": json_shape(json.loads(body))}
+        except ValueError:
+            pass
+    if content_type.startswith("multipart/"):
+        return {"multipart": size}
+    return {"bytes": size}
+
+
+def json_from_shape(shape: object) -> object:
+    """Build a placeholder JSON value of the given shape (see ``json_shape``)."""
+    if isinstance(shape, dict):
+        return {key: json_from_shape(item) for key, item in shape.items()}
+    if isinstance(shape, list):
+        return [json_from_shape(item) for item in shape]
+    if isinstance(shape, str) and shape.startswith("str:"):
+        return "x" * int(shape[4:])
+    return {"int": 1, "float": 1.0, "bool": True}.get(shape)
+
+
+def append_record(path: str, record: dict) -> None:
+    """Append one record as a line; whole lines never interleave."""
+    line = json.dumps(record, separators=(",", ":")) + "\n"
+    with _write_lock, open(path, "a", encoding="utf-8") as trace:
+        trace.write(line)
+
+
+class CaptureMiddleware:
+    """ASGI middleware appending sampled requests to ``CAPTURE_PATH``."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Wrap ``app``."""
+        self.app = app
+
+    @staticmethod
+    def _sampled(scope: Scope) -> bool:
+        if scope["type"] != "http" or not config.CAPTURE_PATH:
+            return False
+        # Event streams stay open for minutes and cannot be replayed
+        if scope["path"].rstrip("/") in STREAMING_PATHS:
+            return False
+        return random.random() < config.CAPTURE_SAMPLE_RATE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Pass the request through, recording it if it is sampled."""
+        if not self._sampled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        ts = time.time()
+        started = time.perf_counter()
+        headers = dict(scope["headers"])
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        keep_body = is_json(content_type)
+        chunks = []
+        size = 0
+        status = None
+        elapsed = None
+
+        async def capture_receive() -> Message:
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                size += len(body)
+                if keep_body:
+                    chunks.append(body)
+            return message
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status, elapsed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                elapsed = (time.perf_counter() - started) * 1000
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            if elapsed is None:
+                elapsed = (time.perf_counter() - started) * 1000
+            route = scope.get("route")
+            record = {
+                "v": FORMAT_VERSION,
+                "ts": round(ts, 3),
+                "method": scope["method"],
+                "route": getattr(route, "path", None),
+                "path": scope["path"],
+                "query": scope["query_string"].decode("latin-1"),
+                "key": key_hash(headers.get(b"api-key")),
+                "body": body_shape(content_type, b"".join(chunks), size),
+                "status": status,
+                "ms": round(elapsed, 3),
+            }
+            await asyncio.to_thread(append_record, config.CAPTURE_PATH, record)
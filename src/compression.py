@@ -0,0 +1,121 @@
+"""Negotiated gzip/brotli compression of API responses.
+
+Only complete, compressible responses above a size threshold are
+compressed; streamed responses (more than one body message), responses
+that already carry a ``Content-Encoding`` and binary media pass through
+untouched.
+"""
+
+import gzip
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import config
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Pick the best supported coding from an ``Accept-Encoding`` header."""
+    offered = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [
+        (offered.get(name, offered.get("*", 0.0)), -index, name)
+        for index, name in enumerate(supported)
+    ]
+    quality, _, name = max(candidates)
+    return name if quality > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress ``body`` with the given content coding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=config.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=config.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses according to ``Accept-Encoding``."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int | None = None) -> None:
+        """Wrap ``app``; smaller bodies than ``minimum_size`` stay as is."""
+        self.app = app
+        self.minimum_size = (
+            config.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Buffer the response start and compress the body if worthwhile."""
+        if scope["type"] != "http" or not config.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+        encoding = choose_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                # e.g. a zero-copy file body: nothing to compress
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "")
+            compressible = all(
+                (
+                    not message.get("more_body", False),
+                    "content-encoding" not in headers,
+                    content_type.startswith(COMPRESSIBLE_TYPES),
+                    len(body) >= self.minimum_size,
+                )
+            )
+            if not compressible:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
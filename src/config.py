@@ -0,0 +1,141 @@
+"""Deployment settings read from environment variables."""
+
+import os
+
+# Read path used by GET /api/tweets:
+# - "orm": hydrate ORM entities and serialize them with Pydantic
+# - "json": build the whole page inside the database with JSON aggregation
+TWEETS_READ_PATH = os.getenv("TWEETS_READ_PATH", "orm")
+
+# Likers embedded per tweet by GET /api/tweets?likes=compact
+LIKES_PREVIEW_SIZE = int(os.getenv("LIKES_PREVIEW_SIZE", "3"))
+
+# Only tweets newer than this many days are read by the global feed, which
+# lets PostgreSQL prune old monthly partitions (unset: no limit)
+FEED_MAX_AGE_DAYS = (
+    int(os.environ["FEED_MAX_AGE_DAYS"]) if os.getenv("FEED_MAX_AGE_DAYS") else None
+)
+
+# Directory receiving archived months of tweets and likes
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "/archive")
+
+# Admission control (see src/ratelimit.py)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+# "memory" (per worker) or "sqlite:///path" (shared by the workers of a host)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+# Tokens added per second and bucket size, per API key
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "10"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "60"))
+# API keys confirmed to belong to users, kept per worker for this many
+# seconds; other keys are limited by client address
+RATE_LIMIT_KNOWN_KEYS = int(os.getenv("RATE_LIMIT_KNOWN_KEYS", "10000"))
+RATE_LIMIT_KNOWN_KEYS_TTL = float(os.getenv("RATE_LIMIT_KNOWN_KEYS_TTL", "60"))
+# Requests served at once by a worker before it sheds load with 503
+RATE_LIMIT_MAX_CONCURRENCY = int(os.getenv("RATE_LIMIT_MAX_CONCURRENCY", "64"))
+# Per-route costs as "METHOD /path=cost,..."; other routes cost 1 token
+RATE_LIMIT_COSTS = {
+    tuple(route.split(" ", 1)): float(cost)
+    for route, cost in (
+        item.strip().rsplit("=", 1)
+        for item in os.getenv(
+            "RATE_LIMIT_COSTS", "POST /api/medias=5,GET /api/tweets=3"
+        ).split(",")
+        if item.strip()
+    )
+}
+
+# Traffic capture (see src/capture.py)
+# JSONL trace that sampled requests are appended to (unset: capture is off)
+CAPTURE_PATH = os.getenv("CAPTURE_PATH") or None
+# Fraction of requests captured
+CAPTURE_SAMPLE_RATE = float(os.getenv("CAPTURE_SAMPLE_RATE", "0.01"))
+
+# Response compression (see src/compression.py)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+# Bodies smaller than this many bytes are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Media attachments (see src/services/media_service.py)
+# Public prefix of attachment URLs, e.g. a CDN or a separate static host
+MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", "http://localhost/media/")
+# Directory holding uploaded files
+MEDIA_DIR = os.getenv("MEDIA_DIR", "/media")
+# When set, attachment URLs carry an HMAC signature and expire
+MEDIA_URL_SECRET = os.getenv("MEDIA_URL_SECRET") or None
+# Minimum lifetime of a signed URL in seconds; signatures are issued per
+# window of this length, so URLs stay stable (and cacheable) within it
+MEDIA_URL_TTL = int(os.getenv("MEDIA_URL_TTL", "3600"))
+
+# Background jobs (see src/jobs.py)
+# Worker tasks started with each app process (0 disables them)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Seconds an idle worker waits before looking for due jobs again
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+# Runs of a job before it is marked failed
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+# Retry delay: JOB_BACKOFF_SECONDS * 2 ** (attempt - 1), at most JOB_BACKOFF_MAX
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "2"))
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", "300"))
+# A job still running after this many seconds is assumed lost and reclaimed
+JOB_LOCK_TIMEOUT = float(os.getenv("JOB_LOCK_TIMEOUT", "300"))
+# Days done and failed jobs are kept (0 keeps them forever); the purge runs
+# every JOB_PURGE_INTERVAL seconds and deletes JOB_PURGE_BATCH_SIZE per commit
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+JOB_PURGE_INTERVAL = float(os.getenv("JOB_PURGE_INTERVAL", "3600"))
+JOB_PURGE_BATCH_SIZE = int(os.getenv("JOB_PURGE_BATCH_SIZE", "1000"))
+
+# Likes deleted per transaction when a soft-deleted tweet is purged
+TWEET_PURGE_BATCH_SIZE = int(os.getenv("TWEET_PURGE_BATCH_SIZE", "1000"))
+
+# Write-behind likes (see src/likes_buffer.py): like/unlike is acknowledged
+# once it is in a local append-only log and written to the database in
+# batches every LIKES_FLUSH_INTERVAL seconds
+LIKES_WRITE_BEHIND = os.getenv("LIKES_WRITE_BEHIND", "0") == "1"
+LIKES_LOG_PATH = os.getenv("LIKES_LOG_PATH", "/var/lib/microblog/likes.log")
+LIKES_FLUSH_INTERVAL = float(os.getenv("LIKES_FLUSH_INTERVAL", "0.25"))
+
+# Real-time events (see src/events.py)
+# "memory" (each worker only sees its own events) or "postgres" (events
+# are fanned out to every worker through LISTEN/NOTIFY on DATABASE_URL)
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory")
+# Events buffered per subscriber; a subscriber that falls further behind
+# is disconnected and has to reconnect and reload
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+# Seconds between keep-alive comments on idle event streams
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+# Reconnect delay of a lost LISTEN connection: EVENTS_RECONNECT_SECONDS,
+# doubled after each failed attempt up to EVENTS_RECONNECT_MAX
+EVENTS_RECONNECT_SECONDS = float(os.getenv("EVENTS_RECONNECT_SECONDS", "1"))
+EVENTS_RECONNECT_MAX = float(os.getenv("EVENTS_RECONNECT_MAX", "30"))
+
+# Most IDs accepted by the multi-get endpoints (GET /api/tweets?ids=...)
+HYDRATE_MAX_IDS = int(os.getenv("HYDRATE_MAX_IDS", "100"))
+
+# Per-user cache of liked tweet IDs for liked_by_me (see src/liked_cache.py)
+# Users kept per process, least recently used evicted first (0 disables it)
+LIKED_CACHE_USERS = int(os.getenv("LIKED_CACHE_USERS", "10000"))
+# Seconds a cached set is trusted; bounds staleness from other processes
+# when their like events do not arrive (EVENTS_BACKEND=memory)
+LIKED_CACHE_TTL = float(os.getenv("LIKED_CACHE_TTL", "30"))
+
+# Ranked top feed (see src/ranking.py)
+# Seconds between score recomputations (0 disables the periodic job)
+RANK_INTERVAL_SECONDS = float(os.getenv("RANK_INTERVAL_SECONDS", "300"))
+# Only tweets younger than this many days are ranked
+RANK_WINDOW_DAYS = int(os.getenv("RANK_WINDOW_DAYS", "7"))
+# Best-scoring tweets kept in tweet_scores
+RANK_TOP_SIZE = int(os.getenv("RANK_TOP_SIZE", "1000"))
+# Exponent of the age decay; higher values favour fresh tweets
+RANK_GRAVITY = float(os.getenv("RANK_GRAVITY", "1.5"))
+# Weight of log(1 + author followers) in the score
+RANK_FOLLOWER_WEIGHT = float(os.getenv("RANK_FOLLOWER_WEIGHT", "0.1"))
+
+# Profile counters (see src/services/user_stats.py)
+# Seconds between passes of the job that repairs drifted counters (0 disables it)
+USER_STATS_RECONCILE_INTERVAL = float(
+    os.getenv("USER_STATS_RECONCILE_INTERVAL", "3600")
+)
+# Users checked per reconciliation transaction
+USER_STATS_RECONCILE_BATCH = int(os.getenv("USER_STATS_RECONCILE_BATCH", "500"))
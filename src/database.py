@@ -1,75 +1,220 @@
 """Database configuration and connection utilities."""
 import os
+import time
+from collections.abc import AsyncIterator
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+from fastapi import Request
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import sqlite_mode
+from .pool import TimedQueuePool
+from .replicas import LAST_WRITE_COOKIE, SessionRouter, parse_last_write
 
 # Database connection URL, using asyncpg for PostgreSQL
 DATABASE_URL = os.getenv(
     "DATABASE_URL", "postgresql+asyncpg://twitter_user:twitter_pass@db:5432/twitter_db"
 )
 
-# Create an asynchronous engine
-async_engine = create_async_engine(DATABASE_URL, echo=True)
+# Comma-separated read replica URLs; GET requests are routed to them
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+# Seconds an unreachable replica stays out of rotation
+REPLICA_EJECT_SECONDS = float(os.getenv("REPLICA_EJECT_SECONDS", "30"))
+# Seconds after a write during which the same API key reads from the primary
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Verify the Alembic revision on startup instead of creating tables
+DB_SCHEMA_CHECK = os.getenv("DB_SCHEMA_CHECK", "1") == "1"
+# Number of connections to open on startup so the first requests skip connecting
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "0"))
+
+# Connections all serving processes of one instance may hold on each
+# database server; split evenly between them (0: SQLAlchemy defaults of
+# 5 pooled + 10 overflow connections per process)
+DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", "0"))
+# Serving processes sharing the budget (set by gunicorn.conf.py)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Seconds a request waits for a pooled connection before it is answered
+# with 503 (see src/pool.py)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+# HTTP methods that never write and may be served by a replica
+READ_METHODS = frozenset({"GET", "HEAD"})
+
+
+def pool_options(
+    budget: int = DB_CONNECTION_BUDGET, workers: int = WEB_CONCURRENCY
+) -> dict[str, object]:
+    """
+    Return engine pool arguments giving each worker its share of the budget.
+
+    The share is a hard cap (no overflow), so the instance never opens more
+    than ``budget`` connections whatever the load. Checkouts are timed and
+    give up after ``DB_POOL_TIMEOUT``.
+    """
+    options = {"poolclass": TimedQueuePool, "pool_timeout": DB_POOL_TIMEOUT}
+    if budget > 0:
+        options.update(pool_size=max(1, budget // max(1, workers)), max_overflow=0)
+    return options
+
+
+# Create an asynchronous engine. On an SQLite file (single-node mode) it is
+# the only writer and GET requests use a separate read pool, routed like a
+# replica (see src/sqlite_mode.py).
+sqlite_read_engines = []
+if sqlite_mode.is_sqlite_file(DATABASE_URL):
+    async_engine, sqlite_read_engine = sqlite_mode.create_engines(
+        DATABASE_URL,
+        echo=True,
+        poolclass=TimedQueuePool,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    sqlite_read_engines.append(sqlite_read_engine)
+else:
+    async_engine = create_async_engine(DATABASE_URL, echo=True, **pool_options())
 
 # Configure asynchronous session
 async_session = sessionmaker(
     bind=async_engine, expire_on_commit=False, class_=AsyncSession
 )
 
+replica_engines = sqlite_read_engines + [
+    create_async_engine(url, **pool_options()) for url in DATABASE_REPLICA_URLS
+]
+
+session_router = SessionRouter(
+    primary=async_session,
+    replicas=[
+        sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+        for engine in replica_engines
+    ],
+    eject_seconds=REPLICA_EJECT_SECONDS,
+    # The SQLite read pool sees every committed write (WAL), so it needs no
+    # read-your-writes window
+    read_your_writes_seconds=0 if sqlite_read_engines else READ_YOUR_WRITES_SECONDS,
+)
+
+
+async def get_async_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Yield an asynchronous database session for FastAPI dependency injection.
+
+    Safe (GET/HEAD) requests get a replica session unless the client's
+    ``last_write`` cookie is recent; everything else runs on the primary,
+    and a request that committed gets a fresh cookie.
+    """
+    if request.method in READ_METHODS:
+        written_at = parse_last_write(request.cookies.get(LAST_WRITE_COOKIE))
+        async with session_router.read_session(written_at) as session:
+            yield session
+        return
+
+    committed = False
+
+    def mark_committed(_: Session) -> None:
+        nonlocal committed
+        committed = True
 
-async def get_async_db() -> None:
-    """Yield an asynchronous database session for use with FastAPI dependency injection."""
     async with async_session() as session:
+        event.listen(session.sync_session, "after_commit", mark_committed)
         yield session
+    if committed and session_router.tracks_writes:
+        # Picked up by ReadYourWritesMiddleware before the response starts
+        request.state.wrote_at = time.time()
 
 
 # Declarative base for ORM models
 Base = declarative_base()
 
 
-async def init_db() -> None:
+class SchemaVersionError(RuntimeError):
+    """Raised when the database schema does not match the migrations."""
+
+
+def get_schema_head() -> set[str]:
+    """Return the head revision(s) of the bundled Alembic migrations."""
+    alembic_config = Config()
+    alembic_config.set_main_option("script_location", MIGRATIONS_DIR)
+    return set(ScriptDirectory.from_config(alembic_config).get_heads())
+
+
+async def check_schema(engine: AsyncEngine = async_engine) -> None:
     """
-    Initialize the database.
+    Verify that the database has been migrated to the current head revision.
 
-    - Create all tables defined in the ORM models
-    - Populate the database with sample users if no users exist
+    Schema changes are applied separately with ``alembic upgrade head``;
+    a worker only reads the ``alembic_version`` table on boot.
     """
-    # Create all tables defined in the models
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
 
-    # Add test users (if the table is empty)
-    async with async_session() as session:
-        from .models import User
+    def current_heads(conn: Connection) -> set[str]:
+        return set(MigrationContext.configure(conn).get_current_heads())
+
+    async with engine.connect() as conn:
+        current = await conn.run_sync(current_heads)
 
-        result = await session.execute(
-            select(User).limit(1)  # Check if any users exist
+    expected = get_schema_head()
+    if current != expected:
+        raise SchemaVersionError(
+            f"Database schema is at {sorted(current) or 'no revision'}, "
+            f"expected {sorted(expected)}. Run `alembic upgrade head`."
         )
-        user = result.scalars().first()
-        if not user:
-            # Prepopulate with sample users
-            users = [
-                User(
-                    name="ilmi",
-                    api_key="test",
-                    display_name="Ilmi",
-                    avatar_url="https://i.pravatar.cc/150?u=ilmi",
-                ),
-                User(
-                    name="petya",
-                    api_key="petya123",
-                    display_name="Petya",
-                    avatar_url="https://i.pravatar.cc/150?u=petya",
-                ),
-                User(
-                    name="masha",
-                    api_key="masha456",
-                    display_name="Masha",
-                    avatar_url="https://i.pravatar.cc/150?u=masha",
-                ),
-            ]
-            session.add_all(users)
-            await session.commit()
+
+
+async def warm_up_pool(connections: int, engine: AsyncEngine = async_engine) -> None:
+    """Open ``connections`` pooled connections up front and return them."""
+    if connections <= 0:
+        return
+    stack = []
+    try:
+        for _ in range(connections):
+            conn = await engine.connect()
+            stack.append(conn)
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in stack:
+            await conn.close()
+
+
+async def init_db() -> None:
+    """
+    Prepare the database on application startup.
+
+    - Check that migrations are applied (skipped with ``DB_SCHEMA_CHECK=0``)
+    - Optionally warm up ``DB_POOL_WARMUP`` pooled connections
+    """
+    if DB_SCHEMA_CHECK:
+        await check_schema()
+    await warm_up_pool(DB_POOL_WARMUP)
+
+
+async def dispose_engines() -> None:
+    """Close the pooled connections of the primary and read engines."""
+    for engine in (async_engine, *replica_engines):
+        await engine.dispose()
+
+
+def pool_metrics() -> dict[str, dict[str, float]]:
+    """Return the checkout counters of this process's pools."""
+    engines = {"primary": async_engine}
+    engines.update(
+        (f"read{index}", engine) for index, engine in enumerate(replica_engines)
+    )
+    return {
+        name: {**engine.pool.stats.snapshot(), "checked_out": engine.pool.checkedout()}
+        for name, engine in engines.items()
+        if isinstance(engine.pool, TimedQueuePool)
+    }
@@ -0,0 +1,215 @@
+"""In-process pub/sub broker for real-time feed events.
+
+Write handlers publish small events (a new tweet, a like count change);
+each open ``GET /api/events`` stream is a subscriber with a bounded queue.
+Publishing never waits: a subscriber whose queue is full is dropped, and
+its stream ends so that the client reconnects and reloads the feed instead
+of slowing every publisher down.
+
+By default events stay in the worker that published them. With
+``EVENTS_BACKEND=postgres`` they are sent with ``NOTIFY`` and every worker
+delivers what it receives with ``LISTEN`` to its own subscribers. A lost
+``LISTEN`` connection is reopened with backoff; events sent meanwhile are
+missed, so the worker's streams are then ended for their clients to reload.
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator, Callable
+
+from sqlalchemy.engine import make_url
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "microblog_events"
+
+
+class Subscription:
+    """A subscriber's bounded queue of events."""
+
+    def __init__(self, user_id: int, follows: set[int], maxsize: int) -> None:
+        """Subscribe ``user_id``, following ``follows``, with a bounded queue."""
+        self.user_id = user_id
+        self.follows = follows
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize)
+        self.dropped = asyncio.Event()
+
+    def wants(self, event: dict) -> bool:
+        """Tweets and likes of tweets by followed users and oneself are delivered."""
+        if event["type"] == "tweet":
+            author_id = event["tweet"]["author"]["id"]
+        else:
+            author_id = event["author_id"]
+        return author_id == self.user_id or author_id in self.follows
+
+    async def events(self) -> AsyncIterator[dict | None]:
+        """
+        Yield events until the subscriber is dropped.
+
+        ``None`` is yielded after ``EVENTS_HEARTBEAT_SECONDS`` without events.
+        """
+        dropped = asyncio.ensure_future(self.dropped.wait())
+        try:
+            while not self.dropped.is_set():
+                get = asyncio.ensure_future(self.queue.get())
+                done, _ = await asyncio.wait(
+                    {get, dropped},
+                    timeout=config.EVENTS_HEARTBEAT_SECONDS,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if get in done:
+                    yield get.result()
+                    continue
+                get.cancel()
+                if not done:
+                    yield None
+        finally:
+            dropped.cancel()
+
+
+class Broker:
+    """Fan-out of published events to the matching subscribers."""
+
+    def __init__(self, queue_size: int = 100) -> None:
+        """Create a broker whose subscribers queue ``queue_size`` events."""
+        self.queue_size = queue_size
+        self.subscribers: set[Subscription] = set()
+        self.dropped_subscribers = 0
+        self.backend: PostgresBackend | None = None
+        # Called with every delivered event, e.g. to keep caches current
+        self.listeners: list[Callable[[dict], None]] = []
+
+    def subscribe(self, user_id: int, follows: set[int]) -> Subscription:
+        """Register a subscriber; pair with ``unsubscribe``."""
+        subscription = Subscription(user_id, follows, self.queue_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Forget a subscriber."""
+        self.subscribers.discard(subscription)
+
+    async def publish(self, event: dict) -> None:
+        """Publish an event to every worker (or only this one)."""
+        if self.backend is not None:
+            try:
+                await self.backend.publish(event)
+                return
+            except Exception:
+                logger.exception("Publishing through the events backend failed")
+        self.deliver(event)
+
+    def deliver(self, event: dict) -> None:
+        """Pass an event to the listeners and the local subscribers that want it."""
+        for listener in self.listeners:
+            listener(event)
+        for subscription in list(self.subscribers):
+            if not subscription.wants(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop it rather than block or buffer more
+                self.unsubscribe(subscription)
+                subscription.dropped.set()
+                self.dropped_subscribers += 1
+
+    async def start(self) -> None:
+        """Connect the cross-worker backend selected by ``EVENTS_BACKEND``."""
+        if config.EVENTS_BACKEND == "postgres":
+            from .database import DATABASE_URL
+
+            self.backend = PostgresBackend(
+                DATABASE_URL, self.deliver, on_reconnect=self.drop_subscribers
+            )
+            await self.backend.connect()
+        elif config.EVENTS_BACKEND != "memory":
+            raise ValueError(f"Unknown events backend: {config.EVENTS_BACKEND}")
+
+    async def stop(self) -> None:
+        """Disconnect the backend and end every stream."""
+        if self.backend is not None:
+            await self.backend.close()
+            self.backend = None
+        self.drop_subscribers()
+
+    def drop_subscribers(self) -> None:
+        """End every stream; clients reconnect and reload."""
+        for subscription in list(self.subscribers):
+            self.unsubscribe(subscription)
+            subscription.dropped.set()
+
+
+class PostgresBackend:
+    """Cross-worker fan-out through PostgreSQL ``LISTEN``/``NOTIFY``."""
+
+    def __init__(
+        self,
+        database_url: str,
+        deliver: Callable[[dict], None],
+        on_reconnect: Callable[[], None] = lambda: None,
+    ) -> None:
+        """Prepare a backend passing received events to ``deliver``."""
+        url = make_url(database_url).set(drivername="postgresql")
+        self.dsn = url.render_as_string(hide_password=False)
+        self.deliver = deliver
+        self.on_reconnect = on_reconnect
+        self.connection = None
+        self._lock = asyncio.Lock()  # one statement at a time per connection
+        self._closing = False
+        self._reconnecting: asyncio.Task | None = None
+
+    async def connect(self) -> None:
+        """Open the dedicated connection and start listening."""
+        import asyncpg
+
+        connection = await asyncpg.connect(self.dsn)
+        await connection.add_listener(CHANNEL, self._on_notify)
+        connection.add_termination_listener(self._on_terminate)
+        self.connection = connection
+
+    def _on_terminate(self, connection: object) -> None:
+        if not self._closing and self._reconnecting is None:
+            logger.warning("Events connection lost; reconnecting")
+            self._reconnecting = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = config.EVENTS_RECONNECT_SECONDS
+        try:
+            while True:
+                try:
+                    await self.connect()
+                    break
+                except Exception as exc:
+                    logger.warning("Reconnecting the events connection failed: %s", exc)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, config.EVENTS_RECONNECT_MAX)
+        finally:
+            self._reconnecting = None
+        self.on_reconnect()
+
+    def _on_notify(
+        self, connection: object, pid: int, channel: str, payload: str
+    ) -> None:
+        self.deliver(json.loads(payload))
+
+    async def publish(self, event: dict) -> None:
+        """Send an event to every listening worker, this one included."""
+        async with self._lock:
+            await self.connection.execute(
+                "SELECT pg_notify($1, $2)", CHANNEL, json.dumps(event)
+            )
+
+    async def close(self) -> None:
+        """Stop listening and close the connection."""
+        self._closing = True
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+            await asyncio.gather(self._reconnecting, return_exceptions=True)
+        await self.connection.close()
+
+
+broker = Broker(config.EVENTS_QUEUE_SIZE)
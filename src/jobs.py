@@ -0,0 +1,346 @@
+"""Durable background jobs stored in the database.
+
+A request handler enqueues a job in its own transaction, so the job is
+committed together with the change that caused it, and returns right away.
+Worker tasks started with the app claim due jobs and run their handler.
+
+- PostgreSQL claims with ``FOR UPDATE SKIP LOCKED``, so the workers of all
+  processes skip rows that another worker is claiming
+- On SQLite the claim is a conditional ``UPDATE`` (writers are serialized)
+- A failing job is retried with exponential backoff, up to
+  ``JOB_MAX_ATTEMPTS`` runs, then marked ``failed``
+- A job left ``running`` by a crashed process is reclaimed after
+  ``JOB_LOCK_TIMEOUT`` seconds, so handlers must be idempotent
+- ``done`` and ``failed`` jobs are deleted by the periodic ``jobs.purge``
+  job once their last run is ``JOB_RETENTION_DAYS`` old
+- A periodic job schedules its next run when it succeeds; when it fails
+  for good its registered scheduler (``periodic_job``) does it instead
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import ColumnElement, and_, delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import config
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[AsyncSession, dict], Awaitable[None]]
+Scheduler = Callable[[AsyncSession, float], Awaitable[None]]
+SessionFactory = Callable[[], AsyncSession]
+
+HANDLERS: dict[str, JobHandler] = {}
+# Scheduler and interval (read at call time) of each periodic job kind
+PERIODIC: dict[str, tuple[Scheduler, Callable[[], float]]] = {}
+
+# Process-wide counters: enqueued, claimed, succeeded, retried, failed
+metrics: Counter[str] = Counter()
+# Total seconds spent running handlers, per job kind
+run_seconds: Counter[str] = Counter()
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register the decorated coroutine as the handler of ``kind`` jobs."""
+
+    def register(handler: JobHandler) -> JobHandler:
+        HANDLERS[kind] = handler
+        return handler
+
+    return register
+
+
+def periodic_job(
+    kind: str, interval: Callable[[], float]
+) -> Callable[[Scheduler], Scheduler]:
+    """
+    Register the decorated coroutine as the scheduler of ``kind`` jobs.
+
+    It is called as ``scheduler(db, delay)``. When a ``kind`` job fails for
+    good, ``run_job`` schedules the next run in ``interval()`` seconds.
+    """
+
+    def register(scheduler: Scheduler) -> Scheduler:
+        PERIODIC[kind] = (scheduler, interval)
+        return scheduler
+
+    return register
+
+
+def enqueue(
+    db: AsyncSession, kind: str, payload: dict | None = None, delay: float = 0.0
+) -> Job:
+    """
+    Add a job to the session; it becomes visible when the caller commits.
+
+    Args:
+        db: Session of the transaction the job belongs to.
+        kind: Name of a registered handler.
+        payload: JSON-serializable handler arguments.
+        delay: Seconds before the job may run.
+
+    Returns:
+        The pending job.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"No handler registered for job kind {kind!r}")
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload or {}),
+        run_at=datetime.now(UTC) + timedelta(seconds=delay),
+    )
+    db.add(job)
+    metrics["enqueued"] += 1
+    return job
+
+
+async def ensure_scheduled(
+    db: AsyncSession, kind: str, delay: float = 0.0, payload: dict | None = None
+) -> None:
+    """
+    Enqueue and commit a ``kind`` job unless one is already pending.
+
+    Used by periodic jobs, which schedule their next run when they finish:
+    calling it at startup too starts the cycle without stacking duplicates.
+    Every worker process does so, so on PostgreSQL the check and the insert
+    run under a transaction-level advisory lock on ``kind``; SQLite
+    serializes writers anyway.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(kind))))
+    pending = await db.execute(
+        select(Job.id).where(Job.kind == kind, Job.status == "pending").limit(1)
+    )
+    if pending.scalar() is None:
+        enqueue(db, kind, payload, delay)
+        await db.commit()
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Return the delay before retrying a job that failed ``attempts`` times."""
+    return min(config.JOB_BACKOFF_SECONDS * 2 ** (attempts - 1), config.JOB_BACKOFF_MAX)
+
+
+def _claimable(now: datetime) -> ColumnElement[bool]:
+    stale = now - timedelta(seconds=config.JOB_LOCK_TIMEOUT)
+    return or_(
+        and_(Job.status == "pending", Job.run_at <= now),
+        and_(Job.status == "running", Job.locked_at < stale),
+    )
+
+
+async def claim(db: AsyncSession, now: datetime | None = None) -> Job | None:
+    """
+    Claim the next due job, if any, and mark it running.
+
+    Args:
+        db: Session on the primary database.
+        now: Current time (defaults to the system clock).
+
+    Returns:
+        The claimed job, or None when nothing is due.
+    """
+    now = now or datetime.now(UTC)
+    candidate = await db.execute(
+        select(Job.id)
+        .where(_claimable(now))
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job_id = candidate.scalar()
+    if job_id is None:
+        await db.rollback()
+        return None
+
+    # Re-check the condition so that a concurrent claim of the same row is
+    # detected where FOR UPDATE is not available
+    claimed = await db.execute(
+        update(Job)
+        .where(Job.id == job_id, _claimable(now))
+        .values(status="running", locked_at=now, attempts=Job.attempts + 1)
+    )
+    await db.commit()
+    if claimed.rowcount != 1:
+        return None
+    metrics["claimed"] += 1
+    return await db.get(Job, job_id, populate_existing=True)
+
+
+async def run_job(session_factory: SessionFactory, job: Job) -> None:
+    """
+    Run a claimed job and record its outcome.
+
+    Args:
+        session_factory: Creates sessions on the primary database.
+        job: A job returned by ``claim``.
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        handler = HANDLERS[job.kind]
+        async with session_factory() as db:
+            await handler(db, json.loads(job.payload))
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed", job.id, job.kind)
+        error = f"{type(exc).__name__}: {exc}"
+    run_seconds[job.kind] += time.perf_counter() - started
+
+    if error is None:
+        values = {"status": "done", "last_error": None}
+        metrics["succeeded"] += 1
+    elif job.attempts >= config.JOB_MAX_ATTEMPTS:
+        values = {"status": "failed", "last_error": error}
+        metrics["failed"] += 1
+    else:
+        retry_at = datetime.now(UTC) + timedelta(seconds=backoff_seconds(job.attempts))
+        values = {"status": "pending", "run_at": retry_at, "last_error": error}
+        metrics["retried"] += 1
+
+    async with session_factory() as db:
+        await db.execute(
+            update(Job).where(Job.id == job.id).values(locked_at=None, **values)
+        )
+        await db.commit()
+        if values["status"] == "failed" and job.kind in PERIODIC:
+            # The handler did not get to schedule the next run
+            scheduler, interval = PERIODIC[job.kind]
+            await scheduler(db, interval())
+
+
+async def purge_finished(db: AsyncSession, before: datetime, batch_size: int) -> int:
+    """
+    Delete ``done`` and ``failed`` jobs last run before ``before``.
+
+    Commits after every batch so that no transaction holds many row locks.
+
+    Args:
+        db: Session on the primary database.
+        before: Jobs due earlier than this are deleted.
+        batch_size: Jobs deleted per transaction.
+
+    Returns:
+        The number of deleted jobs.
+    """
+    deleted = 0
+    while True:
+        batch = (
+            select(Job.id)
+            .where(Job.status.in_(("done", "failed")), Job.run_at < before)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await db.execute(delete(Job).where(Job.id.in_(batch)))
+        await db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+@periodic_job("jobs.purge", lambda: config.JOB_PURGE_INTERVAL)
+async def schedule_job_purge(db: AsyncSession, delay: float = 0.0) -> None:
+    """Enqueue the next ``jobs.purge`` run unless one is already pending."""
+    if config.JOB_RETENTION_DAYS > 0:
+        await ensure_scheduled(db, "jobs.purge", delay)
+
+
+@job_handler("jobs.purge")
+async def purge_jobs(db: AsyncSession, payload: dict) -> None:
+    """
+    Delete finished jobs past the retention period and schedule the next run.
+
+    Args:
+        db: Async database session.
+        payload: Unused.
+    """
+    before = datetime.now(UTC) - timedelta(days=config.JOB_RETENTION_DAYS)
+    deleted = await purge_finished(db, before, config.JOB_PURGE_BATCH_SIZE)
+    logger.info("Purged %s finished jobs", deleted)
+    await schedule_job_purge(db, delay=config.JOB_PURGE_INTERVAL)
+
+
+async def job_metrics(db: AsyncSession) -> dict:
+    """
+    Summarize the queue and the counters of this process.
+
+    Args:
+        db: Async database session.
+
+    Returns:
+        Jobs per status, the age of the oldest due job in seconds and the
+        process counters.
+    """
+    now = datetime.now(UTC)
+    statuses = await db.execute(select(Job.status, func.count()).group_by(Job.status))
+    oldest = await db.execute(
+        select(func.min(Job.run_at)).where(Job.status == "pending", Job.run_at <= now)
+    )
+    oldest_due = oldest.scalar()
+    if oldest_due is not None and oldest_due.tzinfo is None:
+        oldest_due = oldest_due.replace(tzinfo=UTC)  # SQLite drops the offset
+    return {
+        "statuses": dict(statuses.all()),
+        "lag_seconds": (now - oldest_due).total_seconds() if oldest_due else 0.0,
+        "counters": dict(metrics),
+        "run_seconds": dict(run_seconds),
+    }
+
+
+class JobWorker:
+    """Asyncio tasks that claim and run due jobs until stopped."""
+
+    def __init__(
+        self,
+        session_factory: SessionFactory,
+        concurrency: int,
+        poll_interval: float = 1.0,
+    ) -> None:
+        """Prepare ``concurrency`` worker tasks using ``session_factory``."""
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._stopping = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    async def run_once(self) -> bool:
+        """Claim and run one due job; return whether there was one."""
+        async with self.session_factory() as db:
+            job = await claim(db)
+        if job is None:
+            return False
+        await run_job(self.session_factory, job)
+        return True
+
+    async def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                ran = await self.run_once()
+            except Exception:
+                logger.exception("Job worker iteration failed")
+                ran = False
+            if not ran:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop."""
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._loop(), name=f"job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """Let running jobs finish, then stop the worker tasks."""
+        self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
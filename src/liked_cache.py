@@ -0,0 +1,124 @@
+"""Per-user cache of liked tweet IDs, answering ``liked_by_me`` for a page.
+
+The likes of a cached user are held as a sorted ``array('q')`` (8 bytes per
+like), loaded lazily by one index-only query on ``ix_likes_user_id_tweet_id``.
+Which tweets of a page the viewer liked is then answered by binary search
+without touching ``likes``.
+
+- At most ``LIKED_CACHE_USERS`` users are kept per process, least recently
+  used evicted first
+- Likes written by this process (``create_like``/``delete_like`` and the
+  write-behind flush) update cached sets in place, and so do the ``like``
+  events of other processes with ``EVENTS_BACKEND=postgres``
+- An entry expires after ``LIKED_CACHE_TTL`` seconds, which bounds how long
+  writes of other processes can be missed without that backend
+"""
+
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import config
+from .models import Like
+
+
+def _contains(liked: array, tweet_id: int) -> bool:
+    index = bisect_left(liked, tweet_id)
+    return index < len(liked) and liked[index] == tweet_id
+
+
+def _apply(liked: array, tweet_id: int, is_liked: bool) -> None:
+    index = bisect_left(liked, tweet_id)
+    present = index < len(liked) and liked[index] == tweet_id
+    if is_liked and not present:
+        liked.insert(index, tweet_id)
+    elif not is_liked and present:
+        del liked[index]
+
+
+class LikedCache:
+    """LRU of sorted liked-tweet ID arrays, one per user."""
+
+    def __init__(self, max_users: int, ttl: float) -> None:
+        """Keep up to ``max_users`` sets, each for ``ttl`` seconds."""
+        self.max_users = max_users
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, array]] = OrderedDict()
+        # Changes seen while a user's set is being loaded, one list per load
+        self._loading: dict[int, list[list[tuple[int, bool]]]] = {}
+
+    async def liked_among(
+        self, db: AsyncSession, user_id: int, tweet_ids: list[int]
+    ) -> set[int]:
+        """
+        Return the tweets among ``tweet_ids`` that the user liked.
+
+        Args:
+            db: Async database session, used on a cache miss.
+            user_id: Viewer.
+            tweet_ids: Tweets on the page.
+        """
+        if self.max_users <= 0:
+            result = await db.execute(
+                select(Like.tweet_id).where(
+                    Like.user_id == user_id, Like.tweet_id.in_(tweet_ids)
+                )
+            )
+            return set(result.scalars())
+        liked = await self._get(db, user_id)
+        return {tweet_id for tweet_id in tweet_ids if _contains(liked, tweet_id)}
+
+    async def _get(self, db: AsyncSession, user_id: int) -> array:
+        entry = self._entries.get(user_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+        changes: list[tuple[int, bool]] = []
+        self._loading.setdefault(user_id, []).append(changes)
+        try:
+            result = await db.execute(
+                select(Like.tweet_id)
+                .where(Like.user_id == user_id)
+                .order_by(Like.tweet_id)
+                .distinct()
+            )
+            liked = array("q", result.scalars())
+        finally:
+            loads = self._loading[user_id]
+            loads.remove(changes)
+            if not loads:
+                del self._loading[user_id]
+        # Replay what changed while the query ran (applying is idempotent)
+        for tweet_id, is_liked in changes:
+            _apply(liked, tweet_id, is_liked)
+
+        self._entries[user_id] = (time.monotonic(), liked)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+        return liked
+
+    def record(self, user_id: int, tweet_id: int, liked: bool) -> None:
+        """Apply a committed like (``liked=True``) or unlike to the cache."""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            _apply(entry[1], tweet_id, liked)
+        for changes in self._loading.get(user_id, []):
+            changes.append((tweet_id, liked))
+
+    def apply_event(self, event: dict) -> None:
+        """Apply a ``like`` event of any process; other events are ignored."""
+        if event["type"] == "like":
+            self.record(event["user_id"], event["tweet_id"], event["delta"] > 0)
+
+    def clear(self) -> None:
+        """Drop every cached set."""
+        self._entries.clear()
+
+
+liked_cache = LikedCache(config.LIKED_CACHE_USERS, config.LIKED_CACHE_TTL)
@@ -0,0 +1,306 @@
+"""Write-behind buffering of like/unlike events.
+
+With ``LIKES_WRITE_BEHIND`` enabled, ``create_like``/``delete_like`` do not
+write to the database. Each event is appended to a local log and fsynced
+(concurrent events share one fsync), coalesced per ``(user, tweet)`` in
+memory, and acknowledged. A background task writes the coalesced events
+with a few multi-row statements every ``LIKES_FLUSH_INTERVAL`` seconds, so
+a viral tweet costs one transaction per interval instead of one per like.
+
+The log makes acknowledged events durable: events not yet in the database
+are replayed from it on startup. Applying an event is idempotent (a like
+ensures the row exists, an unlike that it does not), so replaying events
+that were already flushed is harmless.
+
+Pending events live in the worker process that received them; the API
+overlays them on that user's own reads until they are flushed.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+from collections import Counter
+from collections.abc import Callable
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import config
+from .database import async_session
+from .liked_cache import liked_cache
+from .models import Like, Tweet
+from .services.user_stats import bump_stats
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], AsyncSession]
+LikeKey = tuple[int, int]  # (user_id, tweet_id)
+
+
+class LikeBuffer:
+    """Durable, coalescing buffer of like/unlike events."""
+
+    def __init__(
+        self, log_path: str, session_factory: SessionFactory, interval: float = 0.25
+    ) -> None:
+        """Buffer events logged to ``log_path``, flushed every ``interval``."""
+        self.use_log(log_path)
+        self.session_factory = session_factory
+        self.interval = interval
+        self._pending: dict[LikeKey, bool] = {}  # True: like, False: unlike
+        self._flushing: dict[LikeKey, bool] = {}  # batch being written
+        self._lines: list[str] = []
+        self._waiters: list[asyncio.Future] = []
+        self._writing = False
+        self._log_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._writers: set[asyncio.Task] = set()  # log writes in progress
+
+    def use_log(self, log_path: str) -> None:
+        """Log to ``log_path`` (set before ``start``; one log per process)."""
+        self.log_path = log_path
+        self.flushing_path = f"{log_path}.flushing"
+
+    async def record(self, user_id: int, tweet_id: int, liked: bool) -> None:
+        """
+        Log a like (``liked=True``) or unlike and return once it is durable.
+
+        Args:
+            user_id: User who liked or unliked.
+            tweet_id: Tweet concerned.
+            liked: Whether the tweet is now liked by the user.
+        """
+        event = {"user_id": user_id, "tweet_id": tweet_id, "liked": liked}
+        waiter = asyncio.get_running_loop().create_future()
+        self._lines.append(json.dumps(event) + "\n")
+        self._waiters.append(waiter)
+        if not self._writing:
+            self._writing = True
+            writer = asyncio.create_task(self._write_log())
+            self._writers.add(writer)
+            writer.add_done_callback(self._writers.discard)
+        await waiter
+
+    async def _write_log(self) -> None:
+        # Group commit: events recorded while an fsync is running are
+        # written together by the next one
+        try:
+            while self._lines:
+                lines, self._lines = self._lines, []
+                waiters, self._waiters = self._waiters, []
+                try:
+                    async with self._log_lock:
+                        await asyncio.to_thread(self._append, lines)
+                        # Only logged events become pending, so a flush
+                        # covers exactly the events of the rotated log
+                        for line in lines:
+                            self._apply(self._pending, json.loads(line))
+                except Exception as exc:
+                    for waiter in waiters:
+                        waiter.set_exception(exc)
+                else:
+                    for waiter in waiters:
+                        waiter.set_result(None)
+        finally:
+            self._writing = False
+
+    def _append(self, lines: list[str]) -> None:
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as log:
+            log.writelines(lines)
+            log.flush()
+            os.fsync(log.fileno())
+
+    @staticmethod
+    def _apply(pending: dict[LikeKey, bool], event: dict) -> None:
+        pending[(event["user_id"], event["tweet_id"])] = event["liked"]
+
+    def pending_for(self, user_id: int) -> dict[int, bool]:
+        """Return the unflushed events of a user as ``{tweet_id: liked}``."""
+        # The buffer only holds one interval of events, so a scan is cheap
+        events = {t: v for (u, t), v in self._flushing.items() if u == user_id}
+        events.update({t: v for (u, t), v in self._pending.items() if u == user_id})
+        return events
+
+    def _rotate(self) -> None:
+        # A failed flush leaves its file behind; keep its events too
+        if not os.path.exists(self.log_path):
+            return
+        if os.path.exists(self.flushing_path):
+            with (
+                open(self.log_path, "rb") as src,
+                open(self.flushing_path, "ab") as dst,
+            ):
+                shutil.copyfileobj(src, dst)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(self.log_path)
+        else:
+            os.replace(self.log_path, self.flushing_path)
+
+    async def flush(self) -> int:
+        """
+        Write the pending events to the database.
+
+        Returns:
+            Number of coalesced ``(user, tweet)`` events written.
+        """
+        async with self._flush_lock:
+            async with self._log_lock:
+                batch, self._pending = self._pending, {}
+                if batch:
+                    await asyncio.to_thread(self._rotate)
+            if not batch:
+                return 0
+            self._flushing = batch
+            try:
+                async with self.session_factory() as db:
+                    await apply_events(db, batch)
+            except Exception:
+                # Keep the events (newer ones win) and the rotated log
+                self._pending = {**batch, **self._pending}
+                raise
+            finally:
+                self._flushing = {}
+            await asyncio.to_thread(_remove, self.flushing_path)
+            return len(batch)
+
+    def replay(self) -> int:
+        """Load the events of a previous run from the logs; return their number."""
+        replayed = 0
+        for path in (self.flushing_path, self.log_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as log:
+                for line in log:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line of a crashed write
+                    self._apply(self._pending, event)
+                    replayed += 1
+        return replayed
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing buffered likes failed")
+
+    async def start(self) -> None:
+        """Replay the log of a previous run, then flush periodically."""
+        replayed = self.replay()
+        if replayed:
+            logger.info("Replaying %s buffered like events", replayed)
+        self._task = asyncio.create_task(self._run(), name="likes-flusher")
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Events still being logged become pending for the final flush
+        await asyncio.gather(*self._writers, return_exceptions=True)
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Final flush of buffered likes failed; kept in the log")
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def apply_events(db: AsyncSession, events: dict[LikeKey, bool]) -> None:
+    """
+    Apply coalesced like/unlike events in one transaction.
+
+    Args:
+        db: Async database session.
+        events: ``{(user_id, tweet_id): liked}``.
+    """
+    likes = [key for key, liked in events.items() if liked]
+    unlikes = [key for key, liked in events.items() if not liked]
+    # Counter deltas follow the rows actually written, so replays do not
+    # count twice
+    given: Counter[int] = Counter()
+    deleted: list[LikeKey] = []
+    rows: list[dict] = []
+    if unlikes:
+        result = await db.execute(
+            delete(Like)
+            .where(tuple_(Like.user_id, Like.tweet_id).in_(unlikes))
+            .returning(Like.user_id, Like.tweet_id)
+        )
+        deleted = result.tuples().all()
+        given.subtract(user_id for user_id, _ in deleted)
+    if likes:
+        # likes has no unique (user_id, tweet_id) constraint (it cannot on
+        # the partitioned PostgreSQL table), so rows that exist already are
+        # skipped. Locking the liked tweets first (in ID order, so flushes
+        # cannot deadlock) keeps another worker's flush from inserting the
+        # same like between the check and the insert; SQLite serializes
+        # writers anyway.
+        live = await db.execute(
+            select(Tweet.id)
+            .where(
+                Tweet.id.in_({tweet_id for _, tweet_id in likes}),
+                Tweet.deleted_at.is_(None),
+            )
+            .order_by(Tweet.id)
+            .with_for_update()
+        )
+        live_ids = set(live.scalars())
+        existing = await db.execute(
+            select(Like.user_id, Like.tweet_id).where(
+                tuple_(Like.user_id, Like.tweet_id).in_(likes)
+            )
+        )
+        skip = set(existing.tuples().all())
+        rows = [
+            {"user_id": user_id, "tweet_id": tweet_id}
+            for user_id, tweet_id in likes
+            if (user_id, tweet_id) not in skip and tweet_id in live_ids
+        ]
+        if rows:
+            await db.execute(insert(Like), rows)
+            given.update(row["user_id"] for row in rows)
+    await bump_stats(db, {user_id: {"likes_count": n} for user_id, n in given.items()})
+    await db.commit()
+    for user_id, tweet_id in deleted:
+        liked_cache.record(user_id, tweet_id, liked=False)
+    for row in rows:
+        liked_cache.record(row["user_id"], row["tweet_id"], liked=True)
+
+
+def overlay_likes(likes: list[dict], user: tuple[int, str], liked: bool) -> list[dict]:
+    """Apply a user's pending event to a tweet's list of likers."""
+    user_id, name = user
+    others = [like for like in likes if like["user_id"] != user_id]
+    return [*others, {"user_id": user_id, "name": name}] if liked else others
+
+
+def overlay_summary(summary: dict, user_id: int, liked: bool) -> None:
+    """Apply a user's pending event to a compact likes summary in place."""
+    if summary["liked_by_me"] == liked:
+        return
+    summary["liked_by_me"] = liked
+    summary["like_count"] += 1 if liked else -1
+    if not liked:
+        summary["likes"] = [
+            like for like in summary["likes"] if like["user_id"] != user_id
+        ]
+
+
+like_buffer = LikeBuffer(
+    config.LIKES_LOG_PATH, async_session, config.LIKES_FLUSH_INTERVAL
+)
@@ -2,29 +2,95 @@
 
 from fastapi import FastAPI
 
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
 import uvicorn
 
-from .database import init_db
-from .routes import medias, tweets, users
+from . import config
+from .capture import CaptureMiddleware
+from .compression import CompressionMiddleware
+from .database import (
+    READ_YOUR_WRITES_SECONDS,
+    async_session,
+    dispose_engines,
+    init_db,
+)
+from .events import broker
+from .jobs import JobWorker, schedule_job_purge
+from .liked_cache import liked_cache
+from .likes_buffer import like_buffer
+from .pool import pool_timeout_handler
+from .ranking import schedule_ranking
+from .ratelimit import RateLimitMiddleware
+from .replicas import ReadYourWritesMiddleware
+from .routes import events, jobs, medias, tweets, users
+from .services.user_stats import schedule_reconcile
 
 
 # Create FastAPI application instance
 app = FastAPI(title="Microblog API")
 
+# Sampled traffic capture for replay (innermost, toggled by CAPTURE_PATH)
+app.add_middleware(CaptureMiddleware)
+# Marks clients that just wrote, so their reads skip lagging replicas
+app.add_middleware(ReadYourWritesMiddleware, max_age=READ_YOUR_WRITES_SECONDS)
+# Per-API-key token buckets and load shedding (toggled by RATE_LIMIT_ENABLED)
+app.add_middleware(RateLimitMiddleware)
+# Negotiated gzip/brotli compression (outermost, toggled by COMPRESSION_ENABLED)
+app.add_middleware(CompressionMiddleware)
+
+# Pool checkout timeouts are answered with 503 instead of hanging
+app.add_exception_handler(PoolTimeout, pool_timeout_handler)
+
+# Background job workers (count set by JOB_WORKERS)
+job_worker = JobWorker(async_session, config.JOB_WORKERS, config.JOB_POLL_INTERVAL)
+
+# Like events, from every worker with EVENTS_BACKEND=postgres, update the
+# liked_by_me cache
+broker.listeners.append(liked_cache.apply_event)
+
 
 @app.on_event("startup")
 async def startup() -> None:
     """Event handler that runs at application startup.
 
-    Initializes the database and creates a test user if needed.
+    Checks that the schema is migrated, optionally warms up the pool and
+    starts the background job workers, the like flusher and the events
+    backend, and makes sure the periodic ranking, counter reconciliation
+    and job purge jobs are scheduled.
     """
     await init_db()
+    async with async_session() as db:
+        await schedule_ranking(db)
+        await schedule_reconcile(db)
+        await schedule_job_purge(db)
+    job_worker.start()
+    await broker.start()
+    if config.LIKES_WRITE_BEHIND:
+        await like_buffer.start()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    """Event handler that runs at application shutdown.
+
+    Waits for running background jobs to finish, flushes buffered likes,
+    closes the event streams and then the pooled database connections.
+    """
+    await broker.stop()
+    await job_worker.stop()
+    if config.LIKES_WRITE_BEHIND:
+        await like_buffer.stop()
+    await dispose_engines()
 
 
 # Include routers for different parts of the application
 app.include_router(users.router)
 app.include_router(tweets.router)
 app.include_router(medias.router)
+app.include_router(medias.files_router)
+app.include_router(jobs.router)
+app.include_router(events.router)
 
 
 if __name__ == "__main__":
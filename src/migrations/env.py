@@ -0,0 +1,66 @@
+"""Alembic environment: runs migrations through the async engine."""
+
+import asyncio
+
+from alembic import context
+
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import async_engine_from_config
+
+from src import models  # noqa: F401  (registers tables on Base.metadata)
+from src.database import Base, DATABASE_URL
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def get_url() -> str:
+    """Resolve the database URL: ``-x url=...``, alembic.ini, then DATABASE_URL."""
+    return (
+        context.get_x_argument(as_dictionary=True).get("url")
+        or config.get_main_option("sqlalchemy.url")
+        or DATABASE_URL
+    )
+
+
+def run_migrations_offline() -> None:
+    """Emit migration SQL without connecting to the database."""
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    """Run migrations on an open synchronous connection."""
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite cannot ALTER most things in place
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    """Connect with the async engine and run migrations."""
+    section = config.get_section(config.config_ini_section, {})
+    section["sqlalchemy.url"] = get_url()
+    connectable = async_engine_from_config(
+        section, prefix="sqlalchemy.", poolclass=pool.NullPool
+    )
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,82 @@
+"""Initial schema.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0001"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create users, followers, tweets, likes and medias."""
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("api_key", sa.String(), nullable=False),
+        sa.Column("display_name", sa.String(), nullable=True),
+        sa.Column("avatar_url", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_name", "users", ["name"], unique=True)
+    op.create_index("ix_users_api_key", "users", ["api_key"], unique=True)
+
+    op.create_table(
+        "followers",
+        sa.Column("follower_id", sa.Integer(), nullable=False),
+        sa.Column("followee_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["follower_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["followee_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("follower_id", "followee_id"),
+    )
+
+    op.create_table(
+        "tweets",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("media_ids", sa.String(), nullable=True),
+        sa.Column("author_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["author_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tweets_id", "tweets", ["id"])
+
+    op.create_table(
+        "likes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("tweet_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["tweet_id"], ["tweets.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_likes_id", "likes", ["id"])
+
+    op.create_table(
+        "medias",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_medias_id", "medias", ["id"])
+
+
+def downgrade() -> None:
+    """Drop every table."""
+    op.drop_table("medias")
+    op.drop_table("likes")
+    op.drop_table("tweets")
+    op.drop_table("followers")
+    op.drop_table("users")
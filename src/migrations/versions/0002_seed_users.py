@@ -0,0 +1,61 @@
+"""Seed sample users.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+users = sa.table(
+    "users",
+    sa.column("name", sa.String),
+    sa.column("api_key", sa.String),
+    sa.column("display_name", sa.String),
+    sa.column("avatar_url", sa.String),
+)
+
+SAMPLE_USERS = [
+    {
+        "name": "ilmi",
+        "api_key": "test",
+        "display_name": "Ilmi",
+        "avatar_url": "https://i.pravatar.cc/150?u=ilmi",
+    },
+    {
+        "name": "petya",
+        "api_key": "petya123",
+        "display_name": "Petya",
+        "avatar_url": "https://i.pravatar.cc/150?u=petya",
+    },
+    {
+        "name": "masha",
+        "api_key": "masha456",
+        "display_name": "Masha",
+        "avatar_url": "https://i.pravatar.cc/150?u=masha",
+    },
+]
+
+
+def upgrade() -> None:
+    """Populate the database with sample users if no users exist."""
+    conn = op.get_bind()
+    if conn.execute(sa.select(users.c.name).limit(1)).first() is None:
+        op.bulk_insert(users, SAMPLE_USERS)
+
+
+def downgrade() -> None:
+    """Remove the sample users."""
+    op.execute(
+        users.delete().where(
+            users.c.api_key.in_([user["api_key"] for user in SAMPLE_USERS])
+        )
+    )
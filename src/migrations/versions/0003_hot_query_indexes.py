@@ -0,0 +1,56 @@
+"""Add tweets.created_at and indexes for the hot query shapes.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0003"
+down_revision: str | None = "0002"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add the timestamp column and the composite indexes."""
+    # SQLite cannot ADD COLUMN with a non-constant default, so recreate there
+    with op.batch_alter_table("tweets", recreate="auto") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                nullable=False,
+                server_default=sa.func.now(),
+            )
+        )
+    op.create_index("ix_tweets_created_at_id", "tweets", ["created_at", "id"])
+    op.create_index(
+        "ix_tweets_author_id_created_at_id",
+        "tweets",
+        ["author_id", "created_at", "id"],
+    )
+    op.create_index("ix_likes_tweet_id_user_id", "likes", ["tweet_id", "user_id"])
+    op.create_index("ix_likes_user_id_tweet_id", "likes", ["user_id", "tweet_id"])
+    op.create_index(
+        "ix_followers_followee_id_follower_id",
+        "followers",
+        ["followee_id", "follower_id"],
+    )
+    op.create_index("ix_medias_user_id", "medias", ["user_id"])
+
+
+def downgrade() -> None:
+    """Drop the indexes and the timestamp column."""
+    op.drop_index("ix_medias_user_id", table_name="medias")
+    op.drop_index("ix_followers_followee_id_follower_id", table_name="followers")
+    op.drop_index("ix_likes_user_id_tweet_id", table_name="likes")
+    op.drop_index("ix_likes_tweet_id_user_id", table_name="likes")
+    op.drop_index("ix_tweets_author_id_created_at_id", table_name="tweets")
+    op.drop_index("ix_tweets_created_at_id", table_name="tweets")
+    with op.batch_alter_table("tweets") as batch_op:
+        batch_op.drop_column("created_at")
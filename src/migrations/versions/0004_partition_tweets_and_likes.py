@@ -0,0 +1,190 @@
+"""Partition tweets and likes by month on PostgreSQL; add the archive manifest.
+
+On PostgreSQL both tables are rebuilt as ``PARTITION BY RANGE (created_at)``
+with one partition per month plus a default partition. The primary keys
+become ``(id, created_at)`` and the ``likes.tweet_id`` foreign key is
+dropped, since a partitioned ``tweets`` cannot back a unique ``id`` alone.
+Other dialects only get ``likes.created_at`` and ``partition_archives``.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+from collections.abc import Sequence
+from datetime import UTC, datetime
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0004"
+down_revision: str | None = "0003"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+MONTHS_AHEAD = 3
+
+TABLES = {
+    "tweets": """
+        id INTEGER NOT NULL DEFAULT nextval('tweets_id_seq'),
+        content TEXT NOT NULL,
+        media_ids VARCHAR,
+        author_id INTEGER REFERENCES users (id),
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+    """,
+    "likes": """
+        id INTEGER NOT NULL DEFAULT nextval('likes_id_seq'),
+        user_id INTEGER REFERENCES users (id),
+        tweet_id INTEGER,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+    """,
+}
+
+INDEXES = {
+    "tweets": [
+        ("ix_tweets_id", "id"),
+        ("ix_tweets_created_at_id", "created_at, id"),
+        ("ix_tweets_author_id_created_at_id", "author_id, created_at, id"),
+    ],
+    "likes": [
+        ("ix_likes_id", "id"),
+        ("ix_likes_tweet_id_user_id", "tweet_id, user_id"),
+        ("ix_likes_user_id_tweet_id", "user_id, tweet_id"),
+    ],
+}
+
+COLUMNS = {
+    "tweets": "id, content, media_ids, author_id, created_at",
+    "likes": "id, user_id, tweet_id, created_at",
+}
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    """Shift the first day of a month by ``count`` months."""
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def create_month_partitions(table: str, first: datetime, last: datetime) -> None:
+    """Create monthly partitions of ``table`` covering ``first`` to ``last``."""
+    month = first
+    while month <= last:
+        upper = add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS {table}_{month:%Y_%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') "
+            f"TO ('{upper:%Y-%m-%d} 00:00:00+00')"
+        )
+        month = upper
+
+
+def partition_table(table: str) -> None:
+    """Rebuild a plain table as a monthly range-partitioned table."""
+    conn = op.get_bind()
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned")
+    op.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_unpartitioned_pkey")
+    op.execute(
+        f"CREATE TABLE {table} ({TABLES[table]}, PRIMARY KEY (id, created_at)) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    oldest = conn.execute(
+        sa.text(f"SELECT min(created_at) FROM {table}_unpartitioned")
+    ).scalar()
+    this_month = datetime.now(UTC).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+    first = (
+        oldest.astimezone(UTC).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        if oldest
+        else this_month
+    )
+    create_month_partitions(table, first, add_months(this_month, MONTHS_AHEAD))
+
+    op.execute(
+        f"INSERT INTO {table} ({COLUMNS[table]}) "
+        f"SELECT {COLUMNS[table]} FROM {table}_unpartitioned"
+    )
+    op.execute(f"DROP TABLE {table}_unpartitioned")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    for name, columns in INDEXES[table]:
+        op.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+
+def unpartition_table(table: str) -> None:
+    """Rebuild a partitioned table as a plain table."""
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+    op.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_partitioned_pkey")
+    for name, _ in INDEXES[table]:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_partitioned")
+    op.execute(f"CREATE TABLE {table} ({TABLES[table]}, PRIMARY KEY (id))")
+    op.execute(
+        f"INSERT INTO {table} ({COLUMNS[table]}) "
+        f"SELECT {COLUMNS[table]} FROM {table}_partitioned"
+    )
+    op.execute(f"DROP TABLE {table}_partitioned")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    for name, columns in INDEXES[table]:
+        op.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+
+def upgrade() -> None:
+    """Add likes.created_at, the archive manifest and (PostgreSQL) partitions."""
+    with op.batch_alter_table("likes", recreate="auto") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                nullable=False,
+                server_default=sa.func.now(),
+            )
+        )
+
+    op.create_table(
+        "partition_archives",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("range_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("range_end", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("min_id", sa.Integer(), nullable=True),
+        sa.Column("max_id", sa.Integer(), nullable=True),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column("path", sa.String(), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_partition_archives_table_name_ids",
+        "partition_archives",
+        ["table_name", "min_id", "max_id"],
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_constraint("likes_tweet_id_fkey", "likes", type_="foreignkey")
+        partition_table("tweets")
+        partition_table("likes")
+
+
+def downgrade() -> None:
+    """Return to plain tables and drop the archive manifest."""
+    if op.get_bind().dialect.name == "postgresql":
+        unpartition_table("likes")
+        unpartition_table("tweets")
+        op.create_foreign_key(
+            "likes_tweet_id_fkey", "likes", "tweets", ["tweet_id"], ["id"]
+        )
+
+    op.drop_index(
+        "ix_partition_archives_table_name_ids", table_name="partition_archives"
+    )
+    op.drop_table("partition_archives")
+    with op.batch_alter_table("likes") as batch_op:
+        batch_op.drop_column("created_at")
@@ -0,0 +1,27 @@
+"""Index likes by (tweet_id, id) for keyset pagination of likers.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "0005"
+down_revision: str | None = "0004"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Replace (tweet_id, user_id) with (tweet_id, id)."""
+    op.create_index("ix_likes_tweet_id_id", "likes", ["tweet_id", "id"])
+    op.drop_index("ix_likes_tweet_id_user_id", table_name="likes")
+
+
+def downgrade() -> None:
+    """Restore the (tweet_id, user_id) index."""
+    op.create_index("ix_likes_tweet_id_user_id", "likes", ["tweet_id", "user_id"])
+    op.drop_index("ix_likes_tweet_id_id", table_name="likes")
@@ -0,0 +1,41 @@
+"""Add tweets.deleted_at and index only live tweets for the feed.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0007"
+down_revision: str | None = "0006"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+LIVE = sa.text("deleted_at IS NULL")
+
+
+def upgrade() -> None:
+    """Add the tombstone column and swap the feed index for a partial one."""
+    op.add_column(
+        "tweets", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.create_index(
+        "ix_tweets_live_created_at_id",
+        "tweets",
+        ["created_at", "id"],
+        postgresql_where=LIVE,
+        sqlite_where=LIVE,
+    )
+    op.drop_index("ix_tweets_created_at_id", table_name="tweets")
+
+
+def downgrade() -> None:
+    """Restore the full feed index and drop the tombstone column."""
+    op.create_index("ix_tweets_created_at_id", "tweets", ["created_at", "id"])
+    op.drop_index("ix_tweets_live_created_at_id", table_name="tweets")
+    with op.batch_alter_table("tweets") as batch_op:
+        batch_op.drop_column("deleted_at")
@@ -0,0 +1,41 @@
+"""Add the tweet_scores table of the ranked top feed.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0008"
+down_revision: str | None = "0007"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create the tweet_scores table and its ranking index."""
+    op.create_table(
+        "tweet_scores",
+        sa.Column("tweet_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column(
+            "computed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("tweet_id"),
+    )
+    op.create_index(
+        "ix_tweet_scores_score_tweet_id", "tweet_scores", ["score", "tweet_id"]
+    )
+
+
+def downgrade() -> None:
+    """Drop the tweet_scores table."""
+    op.drop_index("ix_tweet_scores_score_tweet_id", table_name="tweet_scores")
+    op.drop_table("tweet_scores")
@@ -0,0 +1,50 @@
+"""Add the user_stats table of profile counters and backfill it.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0009"
+down_revision: str | None = "0008"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+COUNTERS = ("tweets_count", "followers_count", "following_count", "likes_count")
+
+
+def upgrade() -> None:
+    """Create user_stats and fill it from the current rows."""
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        *(
+            sa.Column(name, sa.Integer(), server_default="0", nullable=False)
+            for name in COUNTERS
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.execute(
+        """
+        INSERT INTO user_stats
+            (user_id, tweets_count, followers_count, following_count, likes_count)
+        SELECT u.id,
+            (SELECT count(*) FROM tweets t
+             WHERE t.author_id = u.id AND t.deleted_at IS NULL),
+            (SELECT count(*) FROM followers f WHERE f.followee_id = u.id),
+            (SELECT count(*) FROM followers f WHERE f.follower_id = u.id),
+            (SELECT count(*) FROM likes l WHERE l.user_id = u.id)
+        FROM users u
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop the user_stats table."""
+    op.drop_table("user_stats")
@@ -0,0 +1,44 @@
+"""Index the live tweets of an author newest first for the timeline.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0010"
+down_revision: str | None = "0009"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+LIVE = sa.text("deleted_at IS NULL")
+
+
+def upgrade() -> None:
+    """Swap the author index for a partial, descending one."""
+    op.create_index(
+        "ix_tweets_live_author_id_created_at_id",
+        "tweets",
+        [
+            sa.column("author_id"),
+            sa.column("created_at").desc(),
+            sa.column("id").desc(),
+        ],
+        postgresql_where=LIVE,
+        sqlite_where=LIVE,
+    )
+    op.drop_index("ix_tweets_author_id_created_at_id", table_name="tweets")
+
+
+def downgrade() -> None:
+    """Restore the full author index."""
+    op.create_index(
+        "ix_tweets_author_id_created_at_id",
+        "tweets",
+        ["author_id", "created_at", "id"],
+    )
+    op.drop_index("ix_tweets_live_author_id_created_at_id", table_name="tweets")
@@ -0,0 +1,32 @@
+"""Record the size of uploaded images on medias.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0011"
+down_revision: str | None = "0010"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+COLUMNS = ("width", "height", "size_bytes")
+
+
+def upgrade() -> None:
+    """Add nullable width, height and size_bytes columns."""
+    with op.batch_alter_table("medias") as batch:
+        for name in COLUMNS:
+            batch.add_column(sa.Column(name, sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Drop the size columns."""
+    with op.batch_alter_table("medias") as batch:
+        for name in reversed(COLUMNS):
+            batch.drop_column(name)
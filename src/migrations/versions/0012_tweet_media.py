@@ -0,0 +1,46 @@
+"""Add the tweet_media table of attached media and backfill it.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0012"
+down_revision: str | None = "0011"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Expands the JSON list in tweets.media_ids into one row per attached media
+ELEMENTS = {
+    "postgresql": "json_array_elements_text(t.media_ids::json) AS m(value)",
+    "sqlite": "json_each(t.media_ids) AS m",
+}
+
+
+def upgrade() -> None:
+    """Create tweet_media and fill it from the live tweets."""
+    op.create_table(
+        "tweet_media",
+        sa.Column("media_id", sa.Integer(), nullable=False),
+        sa.Column("tweet_id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("media_id", "tweet_id"),
+    )
+    elements = ELEMENTS[op.get_bind().dialect.name]
+    op.execute(
+        f"""
+        INSERT INTO tweet_media (media_id, tweet_id)
+        SELECT DISTINCT CAST(m.value AS INTEGER), t.id
+        FROM tweets t, {elements}
+        WHERE t.deleted_at IS NULL AND t.media_ids IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop the tweet_media table."""
+    op.drop_table("tweet_media")
@@ -1,7 +1,21 @@
 """SQLAlchemy models for the Twitter clone application."""
 
-from sqlalchemy import Column, ForeignKey, Integer, String, Table, Text
-from sqlalchemy.orm import relationship
+from datetime import UTC, datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    Text,
+    func,
+    text,
+)
+from sqlalchemy.orm import backref, configure_mappers, relationship
 
 from .database import Base
 
@@ -11,6 +25,18 @@ followers_table = Table(
     Base.metadata,
     Column("follower_id", Integer, ForeignKey("users.id"), primary_key=True),
     Column("followee_id", Integer, ForeignKey("users.id"), primary_key=True),
+    # The primary key serves "whom does X follow"; this serves "who follows X"
+    Index("ix_followers_followee_id_follower_id", "followee_id", "follower_id"),
+)
+
+# Media attached to each tweet, a row per entry of Tweet.media_ids. No foreign
+# keys: tweets is partitioned on PostgreSQL and rows outlive purged medias
+tweet_media_table = Table(
+    "tweet_media",
+    Base.metadata,
+    # The primary key serves "which tweets use this media"
+    Column("media_id", Integer, primary_key=True),
+    Column("tweet_id", Integer, primary_key=True),
 )
 
 
@@ -38,6 +64,24 @@ class User(Base):
     )
 
 
+class UserStats(Base):
+    """
+    Profile counters of a user, kept in step with the rows they count.
+
+    Each write path adjusts the counters in its own transaction (see
+    src/services/user_stats.py); a background job repairs any drift.
+    """
+
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    tweets_count = Column(Integer, nullable=False, default=0, server_default="0")
+    followers_count = Column(Integer, nullable=False, default=0, server_default="0")
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
+    likes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    user = relationship("User", backref=backref("stats", uselist=False))
+
+
 class Tweet(Base):
     """
     Represents a tweet created by a user.
@@ -46,6 +90,17 @@ class Tweet(Base):
     """
 
     __tablename__ = "tweets"
+    # On PostgreSQL the table is range-partitioned by month on created_at
+    # (see migration 0004 and src/partitions.py)
+    __table_args__ = (
+        Index(
+            "ix_tweets_live_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),  # global feed, without tombstones
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
@@ -53,13 +108,36 @@ class Tweet(Base):
     author_id = Column(
         Integer, ForeignKey("users.id")
     )  # Foreign key to the users table
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(UTC),
+        server_default=func.now(),
+    )
+    # Tombstone: a deleted tweet is hidden at once and purged by a background job
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
     user = relationship("User", backref="tweets")  # Reference to the tweet's author
 
 
+# Author timeline, newest first; covers the page query of live tweets
+Index(
+    "ix_tweets_live_author_id_created_at_id",
+    Tweet.author_id,
+    Tweet.created_at.desc(),
+    Tweet.id.desc(),
+    postgresql_where=text("deleted_at IS NULL"),
+    sqlite_where=text("deleted_at IS NULL"),
+)
+
+
 class Like(Base):
     """Represents a like given by a user to a tweet."""
 
     __tablename__ = "likes"
+    __table_args__ = (
+        Index("ix_likes_tweet_id_id", "tweet_id", "id"),  # likers of a tweet, in order
+        Index("ix_likes_user_id_tweet_id", "user_id", "tweet_id"),  # likes by a user
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))  # Foreign key to the users table
@@ -67,7 +145,15 @@ class Like(Base):
     tweet_id = Column(
         Integer, ForeignKey("tweets.id")
     )  # Foreign key to the tweets table
-    tweet = relationship("Tweet", backref="likes")  # Reference to the liked tweet
+    tweet = relationship(
+        "Tweet", backref=backref("likes", order_by="Like.id")
+    )  # Reference to the liked tweet
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(UTC),
+        server_default=func.now(),
+    )  # Partition key on PostgreSQL
 
 
 class Media(Base):
@@ -78,6 +164,90 @@ class Media(Base):
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, nullable=False)
     user_id = Column(
-        Integer, ForeignKey("users.id"), nullable=False
+        Integer, ForeignKey("users.id"), nullable=False, index=True
     )  # Foreign key to the users table
     user = relationship("User", backref="medias")  # Reference to the uploading user
+    # Image size and stored bytes; NULL for files uploaded before they were recorded
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    size_bytes = Column(Integer, nullable=True)
+
+
+class PartitionArchive(Base):
+    """Records a month of a partitioned table moved to a cold NDJSON file."""
+
+    __tablename__ = "partition_archives"
+    __table_args__ = (
+        Index("ix_partition_archives_table_name_ids", "table_name", "min_id", "max_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String, nullable=False)
+    range_start = Column(DateTime(timezone=True), nullable=False)
+    range_end = Column(DateTime(timezone=True), nullable=False)
+    min_id = Column(Integer)
+    max_id = Column(Integer)
+    row_count = Column(Integer, nullable=False)
+    path = Column(String, nullable=False)
+    archived_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(UTC),
+        server_default=func.now(),
+    )
+
+
+class Job(Base):
+    """A unit of deferred work claimed and run by the background workers."""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),  # claim order
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # name of the registered handler
+    payload = Column(Text, nullable=False, default="{}")  # JSON arguments
+    status = Column(
+        String, nullable=False, default="pending", server_default="pending"
+    )  # pending, running, done or failed
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    run_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(UTC),
+        server_default=func.now(),
+    )  # not claimed before this time (retry backoff)
+    locked_at = Column(DateTime(timezone=True))  # when a worker claimed it
+    last_error = Column(Text)
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(UTC),
+        server_default=func.now(),
+    )
+
+
+class TweetScore(Base):
+    """Ranking score of one of the best tweets, rebuilt by the ``tweet.rank`` job."""
+
+    __tablename__ = "tweet_scores"
+    __table_args__ = (
+        Index("ix_tweet_scores_score_tweet_id", "score", "tweet_id"),  # top feed
+    )
+
+    # No foreign key: tweets is partitioned on PostgreSQL and the whole table
+    # is replaced on every recomputation
+    tweet_id = Column(Integer, primary_key=True)
+    score = Column(Float, nullable=False)
+    computed_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(UTC),
+        server_default=func.now(),
+    )
+
+
+# Resolve backrefs such as Tweet.likes at import time, so loader options can
+# reference them before the first query configures the mappers.
+configure_mappers()
@@ -0,0 +1,353 @@
+"""Monthly partition maintenance and cold archiving of tweets and likes.
+
+Run periodically (e.g. from cron)::
+
+    python -m src.partitions ensure --months-ahead 3
+    python -m src.partitions archive --older-than 12 --archive-dir /archive
+
+On PostgreSQL every month of ``tweets``/``likes`` is its own partition and
+archiving detaches and drops whole partitions. Rows outside every monthly
+partition land in the default partition; ``ensure`` creates their months
+and moves them there, so they are archived like the rest. On other databases the same
+month ranges are exported and deleted row-wise, so the job can be run (and
+tested) against SQLite too.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import re
+from collections.abc import AsyncIterator
+from datetime import UTC, date, datetime
+from functools import partial
+
+from sqlalchemy import Table, delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from . import config
+from .database import async_engine
+from .models import Like, PartitionArchive, Tweet
+
+PARTITIONED_TABLES: dict[str, Table] = {
+    "tweets": Tweet.__table__,
+    "likes": Like.__table__,
+}
+
+PARTITION_NAME = re.compile(r"^(?P<table>\w+)_(?P<year>\d{4})_(?P<month>\d{2})$")
+
+# Rows written to the archive file per thread hop
+WRITE_BATCH = 1000
+
+
+def month_start(value: date | datetime) -> datetime:
+    """Return midnight UTC on the first day of the month containing ``value``."""
+    return datetime(value.year, value.month, 1, tzinfo=UTC)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    """Shift the first day of a month by ``count`` months."""
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    """Name of the partition of ``table`` holding ``month``."""
+    return f"{table}_{month:%Y_%m}"
+
+
+def partition_bounds(month: datetime) -> str:
+    """
+    Return the ``FOR VALUES`` clause of the partition holding ``month``.
+
+    The bounds carry an explicit UTC offset, so they do not depend on the
+    session's ``TimeZone``.
+    """
+    upper = add_months(month, 1)
+    return (
+        f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') "
+        f"TO ('{upper:%Y-%m-%d} 00:00:00+00')"
+    )
+
+
+async def ensure_partitions(
+    conn: AsyncConnection, months_ahead: int = 3, now: datetime | None = None
+) -> list[str]:
+    """
+    Create missing monthly partitions from the current month onwards.
+
+    Rows found in the default partition get their months created as well
+    and are moved into them. PostgreSQL only allows that with the default
+    partition detached, so writes to the table wait until the caller
+    commits. Does nothing on databases without native partitioning.
+
+    Returns:
+        Names of the partitions that were created.
+    """
+    if conn.dialect.name != "postgresql":
+        return []
+
+    created = []
+    current = month_start(now or datetime.now(UTC))
+    for table in PARTITIONED_TABLES:
+        existing = set(await list_partitions(conn, table))
+        months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+        default = f"{table}_default"
+        oldest, newest = (
+            await conn.execute(
+                text(f"SELECT min(created_at), max(created_at) FROM {default}")
+            )
+        ).one()
+        if oldest is not None:
+            month = month_start(oldest.astimezone(UTC))
+            while month <= newest:
+                months.add(month)
+                month = add_months(month, 1)
+            await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+        for month in sorted(months):
+            name = partition_name(table, month)
+            if name in existing:
+                continue
+            await conn.execute(
+                text(
+                    f"CREATE TABLE {name} PARTITION OF {table} "
+                    f"{partition_bounds(month)}"
+                )
+            )
+            created.append(name)
+        if oldest is not None:
+            await conn.execute(
+                text(
+                    f"WITH moved AS (DELETE FROM {default} RETURNING *) "
+                    f"INSERT INTO {table} SELECT * FROM moved"
+                )
+            )
+            await conn.execute(
+                text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+            )
+    return created
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> list[str]:
+    """Return the names of the monthly partitions attached to ``table``."""
+    result = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": table},
+    )
+    return sorted(name for name in result.scalars() if PARTITION_NAME.match(name))
+
+
+async def archivable_months(
+    conn: AsyncConnection, table: str, cutoff: datetime
+) -> list[datetime]:
+    """Return the months of ``table`` that end on or before ``cutoff``."""
+    if conn.dialect.name == "postgresql":
+        months = []
+        for name in await list_partitions(conn, table):
+            match = PARTITION_NAME.match(name)
+            month = datetime(int(match["year"]), int(match["month"]), 1, tzinfo=UTC)
+            if add_months(month, 1) <= cutoff:
+                months.append(month)
+        return months
+
+    columns = PARTITIONED_TABLES[table].c
+    result = await conn.execute(
+        select(func.min(columns.created_at)).where(columns.created_at < cutoff)
+    )
+    oldest = result.scalar()
+    if oldest is None:
+        return []
+    months = []
+    month = month_start(oldest)
+    while add_months(month, 1) <= cutoff:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def _encode(row: dict) -> str:
+    """Serialize one row as an NDJSON line with ``id`` as the first key."""
+    line = json.dumps(
+        {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in row.items()
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return f"{line}\n"
+
+
+def _fsync(path: str) -> None:
+    """Flush a closed file to stable storage."""
+    with open(path, "rb") as handle:
+        os.fsync(handle.fileno())
+
+
+async def _stream_rows(
+    conn: AsyncConnection, table: Table, start: datetime, end: datetime
+) -> AsyncIterator[dict]:
+    """Stream rows of one month with a server-side cursor."""
+    result = await conn.stream(
+        select(table)
+        .where(table.c.created_at >= start, table.c.created_at < end)
+        .order_by(table.c.id)
+        .execution_options(yield_per=WRITE_BATCH)
+    )
+    async for row in result.mappings():
+        yield dict(row)
+
+
+async def archive_month(
+    engine: AsyncEngine, table_name: str, month: datetime, archive_dir: str
+) -> PartitionArchive | None:
+    """
+    Move one month of ``table_name`` into a gzip-compressed NDJSON file.
+
+    The file is written and fsynced first; the manifest row and the removal
+    of the month (partition drop or row delete) then commit together.
+    """
+    table = PARTITIONED_TABLES[table_name]
+    end = add_months(month, 1)
+    name = partition_name(table_name, month)
+    path = os.path.join(archive_dir, f"{name}.ndjson.gz")
+    os.makedirs(archive_dir, exist_ok=True)
+
+    row_count = 0
+    min_id = max_id = None
+    async with engine.begin() as conn:
+        handle = await asyncio.to_thread(
+            partial(gzip.open, f"{path}.tmp", "wt", encoding="utf-8")
+        )
+        try:
+            batch = []
+            async for row in _stream_rows(conn, table, month, end):
+                batch.append(_encode(row))
+                row_count += 1
+                min_id = row["id"] if min_id is None else min_id
+                max_id = row["id"]
+                if len(batch) >= WRITE_BATCH:
+                    await asyncio.to_thread(handle.writelines, batch)
+                    batch = []
+            await asyncio.to_thread(handle.writelines, batch)
+        finally:
+            await asyncio.to_thread(handle.close)
+    await asyncio.to_thread(_fsync, f"{path}.tmp")
+
+    if row_count == 0 and engine.dialect.name != "postgresql":
+        os.remove(f"{path}.tmp")
+        return None
+    os.replace(f"{path}.tmp", path)
+
+    archive = PartitionArchive(
+        table_name=table_name,
+        range_start=month,
+        range_end=end,
+        min_id=min_id,
+        max_id=max_id,
+        row_count=row_count,
+        path=path,
+    )
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        session.add(archive)
+        if engine.dialect.name == "postgresql":
+            await session.execute(
+                text(f"ALTER TABLE {table_name} DETACH PARTITION {name}")
+            )
+            await session.execute(text(f"DROP TABLE {name}"))
+        else:
+            await session.execute(
+                delete(table).where(
+                    table.c.created_at >= month, table.c.created_at < end
+                )
+            )
+        await session.commit()
+    return archive
+
+
+async def archive_older_than(
+    engine: AsyncEngine,
+    months: int,
+    archive_dir: str,
+    now: datetime | None = None,
+) -> list[PartitionArchive]:
+    """Archive every month of tweets and likes older than ``months`` months."""
+    cutoff = add_months(month_start(now or datetime.now(UTC)), -months)
+    archived = []
+    for table_name in PARTITIONED_TABLES:
+        async with engine.connect() as conn:
+            candidates = await archivable_months(conn, table_name, cutoff)
+        for month in candidates:
+            archive = await archive_month(engine, table_name, month, archive_dir)
+            if archive is not None:
+                archived.append(archive)
+    return archived
+
+
+def _scan_archive(path: str, tweet_id: int) -> dict | None:
+    """Find one tweet in an archive file; lines start with their id."""
+    prefix = f'{{"id":{tweet_id},'
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            if line.startswith(prefix):
+                return json.loads(line)
+    return None
+
+
+async def find_archived_tweet(db: AsyncSession, tweet_id: int) -> dict | None:
+    """
+    Look up a tweet that has been moved to cold storage.
+
+    The manifest narrows the search to the files whose id range contains
+    ``tweet_id``; those files are then scanned sequentially.
+    """
+    result = await db.execute(
+        select(PartitionArchive.path)
+        .where(
+            PartitionArchive.table_name == "tweets",
+            PartitionArchive.min_id <= tweet_id,
+            PartitionArchive.max_id >= tweet_id,
+        )
+        .order_by(PartitionArchive.range_start)
+    )
+    for path in result.scalars():
+        if not os.path.exists(path):
+            continue
+        row = await asyncio.to_thread(_scan_archive, path, tweet_id)
+        if row is not None:
+            return row
+    return None
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the maintenance command selected on the command line."""
+    try:
+        if args.command == "ensure":
+            async with async_engine.begin() as conn:
+                created = await ensure_partitions(conn, args.months_ahead)
+            print(f"created {len(created)} partitions: {', '.join(created) or '-'}")
+        else:
+            archived = await archive_older_than(
+                async_engine, args.older_than, args.archive_dir
+            )
+            for archive in archived:
+                print(f"{archive.path}: {archive.row_count} rows")
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tweet/like partition maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure = commands.add_parser("ensure", help="create upcoming monthly partitions")
+    ensure.add_argument("--months-ahead", type=int, default=3)
+    archive = commands.add_parser("archive", help="move old months to NDJSON files")
+    archive.add_argument("--older-than", type=int, default=12, help="months")
+    archive.add_argument("--archive-dir", default=config.ARCHIVE_DIR)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,91 @@
+"""Connection pool back-pressure and checkout timing.
+
+A request that cannot get a pooled connection within ``DB_POOL_TIMEOUT``
+seconds fails with ``sqlalchemy.exc.TimeoutError`` instead of waiting
+indefinitely, and the API answers it with 503 and ``Retry-After``, like
+load shedding in src/ratelimit.py. ``TimedQueuePool`` records how long
+checkouts wait, so saturation shows up before timeouts do.
+"""
+
+import time
+from collections import deque
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+# Checkout waits kept per pool for percentiles
+RECENT_WAITS = 1000
+
+
+class PoolStats:
+    """Checkout counters of one pool."""
+
+    def __init__(self) -> None:
+        """Start with zeroed counters."""
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+        self.recent: deque[float] = deque(maxlen=RECENT_WAITS)
+
+    def record(self, waited: float) -> None:
+        """Count a checkout that waited ``waited`` seconds."""
+        self.checkouts += 1
+        self.wait_seconds += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.recent.append(waited)
+
+    def snapshot(self) -> dict[str, float]:
+        """Return the counters, with waits in ms."""
+        recent = sorted(self.recent)
+
+        def at(fraction: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(len(recent) * fraction))] * 1000
+
+        mean = self.wait_seconds / self.checkouts if self.checkouts else 0.0
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_mean_ms": mean * 1000,
+            "wait_p95_ms": at(0.95),
+            "wait_max_ms": self.max_wait * 1000,
+        }
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """The default asyncio queue pool, timing every checkout."""
+
+    def __init__(self, *args: object, **kwargs: object) -> None:
+        """Create the pool with ``AsyncAdaptedQueuePool`` arguments."""
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return record
+
+
+async def pool_timeout_handler(
+    request: Request, error: exc.TimeoutError
+) -> JSONResponse:
+    """Answer a request that timed out waiting for a connection with 503."""
+    return JSONResponse(
+        {
+            "result": False,
+            "error_type": "Overloaded",
+            "error_message": "Database is busy, retry later",
+        },
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
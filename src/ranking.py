@@ -0,0 +1,179 @@
+"""Ranked "top tweets" feed.
+
+Scores are recomputed in batch by the periodic ``tweet.rank`` job: one
+aggregate query returns ``(tweet_id, like_count, age, author_followers)``
+for the ranking window, NumPy scores all rows at once and only the best
+``RANK_TOP_SIZE`` are written to ``tweet_scores``. Serving the top feed is
+then an indexed read of that small table.
+
+    score = (likes + 1) / (age_hours + 2) ** RANK_GRAVITY
+            * (1 + RANK_FOLLOWER_WEIGHT * log(1 + author_followers))
+
+``likes / age`` is the like velocity; a gravity above 1 makes a tweet sink
+over time even while it keeps collecting likes.
+"""
+
+import logging
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import config
+from .jobs import ensure_scheduled, job_handler, periodic_job
+from .models import Like, Tweet, TweetScore, followers_table
+
+logger = logging.getLogger(__name__)
+
+
+def score_tweets(
+    like_counts: np.ndarray, ages_hours: np.ndarray, followers: np.ndarray
+) -> np.ndarray:
+    """
+    Score tweets from their like count, age and author's follower count.
+
+    Args:
+        like_counts: Likes of each tweet.
+        ages_hours: Age of each tweet in hours.
+        followers: Follower count of each tweet's author.
+
+    Returns:
+        Score of each tweet, higher is better.
+    """
+    velocity = (like_counts + 1.0) / (np.maximum(ages_hours, 0.0) + 2.0) ** (
+        config.RANK_GRAVITY
+    )
+    return velocity * (1.0 + config.RANK_FOLLOWER_WEIGHT * np.log1p(followers))
+
+
+def top_k(
+    tweet_ids: np.ndarray, scores: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Select the ``k`` best tweets, best first (ties go to the newer ID).
+
+    Uses a partial partition, so the cost is linear in the number of tweets.
+    """
+    if len(scores) > k:
+        best = np.argpartition(scores, -k)[-k:]
+        tweet_ids, scores = tweet_ids[best], scores[best]
+    order = np.lexsort((-tweet_ids, -scores))
+    return tweet_ids[order], scores[order]
+
+
+def _epoch(moment: datetime) -> float:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)  # SQLite drops the offset
+    return moment.timestamp()
+
+
+async def load_features(
+    db: AsyncSession, now: datetime
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Load the ranking inputs of the live tweets of the ranking window.
+
+    Returns:
+        Arrays of tweet IDs, like counts, ages in hours and author followers.
+    """
+    since = now - timedelta(days=config.RANK_WINDOW_DAYS)
+    # A like is never older than its tweet, so the window also bounds likes
+    # (and prunes like partitions on PostgreSQL)
+    likes = (
+        select(Like.tweet_id, func.count().label("n"))
+        .where(Like.created_at >= since)
+        .group_by(Like.tweet_id)
+        .subquery()
+    )
+    followers = (
+        select(followers_table.c.followee_id, func.count().label("n"))
+        .group_by(followers_table.c.followee_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            Tweet.id,
+            Tweet.created_at,
+            func.coalesce(likes.c.n, 0),
+            func.coalesce(followers.c.n, 0),
+        )
+        .outerjoin(likes, likes.c.tweet_id == Tweet.id)
+        .outerjoin(followers, followers.c.followee_id == Tweet.author_id)
+        .where(Tweet.deleted_at.is_(None), Tweet.created_at >= since)
+    )
+    rows = result.all()
+    count = len(rows)
+    tweet_ids = np.fromiter((row[0] for row in rows), np.int64, count)
+    created = np.fromiter((_epoch(row[1]) for row in rows), np.float64, count)
+    like_counts = np.fromiter((row[2] for row in rows), np.float64, count)
+    author_followers = np.fromiter((row[3] for row in rows), np.float64, count)
+    ages_hours = (now.timestamp() - created) / 3600.0
+    return tweet_ids, like_counts, ages_hours, author_followers
+
+
+async def recompute_scores(db: AsyncSession, now: datetime | None = None) -> int:
+    """
+    Rebuild ``tweet_scores`` in one transaction.
+
+    Args:
+        db: Session on the primary database.
+        now: Reference time of the tweet ages (defaults to the system clock).
+
+    Returns:
+        Number of tweets ranked.
+    """
+    now = now or datetime.now(UTC)
+    tweet_ids, like_counts, ages_hours, followers = await load_features(db, now)
+    best_ids, best_scores = top_k(
+        tweet_ids,
+        score_tweets(like_counts, ages_hours, followers),
+        config.RANK_TOP_SIZE,
+    )
+    await db.execute(delete(TweetScore))
+    if len(best_ids):
+        await db.execute(
+            insert(TweetScore),
+            [
+                {"tweet_id": tweet_id, "score": score, "computed_at": now}
+                for tweet_id, score in zip(
+                    best_ids.tolist(), best_scores.tolist(), strict=True
+                )
+            ],
+        )
+    await db.commit()
+    return len(tweet_ids)
+
+
+async def top_tweet_ids(db: AsyncSession, limit: int) -> list[int]:
+    """Return the IDs of the best-scored live tweets, best first."""
+    result = await db.execute(
+        select(TweetScore.tweet_id)
+        .join(Tweet, Tweet.id == TweetScore.tweet_id)
+        .where(Tweet.deleted_at.is_(None))
+        .order_by(TweetScore.score.desc(), TweetScore.tweet_id.desc())
+        .limit(limit)
+    )
+    return list(result.scalars())
+
+
+@periodic_job("tweet.rank", lambda: config.RANK_INTERVAL_SECONDS)
+async def schedule_ranking(db: AsyncSession, delay: float = 0.0) -> None:
+    """Enqueue the next ``tweet.rank`` run unless one is already pending."""
+    if config.RANK_INTERVAL_SECONDS > 0:
+        await ensure_scheduled(db, "tweet.rank", delay)
+
+
+@job_handler("tweet.rank")
+async def rank_tweets(db: AsyncSession, payload: dict) -> None:
+    """
+    Recompute the top feed scores and schedule the next run.
+
+    Args:
+        db: Async database session.
+        payload: Unused.
+    """
+    ranked = await recompute_scores(db)
+    logger.info("Ranked %s tweets", ranked)
+    await schedule_ranking(db, delay=config.RANK_INTERVAL_SECONDS)
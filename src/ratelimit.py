@@ -0,0 +1,268 @@
+"""Admission control: per-API-key token buckets and a global concurrency cap.
+
+Each request takes ``cost`` tokens from the bucket of its ``api-key`` (or of
+the client address for anonymous requests). An empty bucket answers 429 and
+a saturated worker answers 503, both with ``Retry-After``, instead of letting
+requests queue on the database pool.
+
+Only keys of existing users get a bucket of their own; otherwise a client
+could send a fresh random key with every request and never run dry. A key
+not yet known to ``KnownKeys`` is charged to the client address, and checked
+against the users table once the request is admitted.
+
+Bucket state lives in memory per worker by default. ``SQLiteBucketBackend``
+shares it between the workers of one host through a local SQLite file.
+"""
+
+import asyncio
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from . import config
+from .database import async_session
+from .models import User
+
+# Long-lived streams take a token but no concurrency slot, or open streams
+# alone would make the worker shed every other request
+STREAMING_PATHS = frozenset({"/api/events"})
+# nginx subrequests authorizing media files, which nginx serves unlimited
+EXEMPT_PATHS = frozenset({"/api/medias/authorize"})
+
+
+def refill(
+    tokens: float, updated: float, now: float, rate: float, burst: float
+) -> float:
+    """Return the bucket level at ``now`` after refilling since ``updated``."""
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+
+class MemoryBucketBackend:
+    """Token buckets kept in this process, evicting the least recently used."""
+
+    def __init__(
+        self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Keep up to ``max_keys`` buckets, timed by ``clock``."""
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        """Take ``cost`` tokens; return 0 on success or seconds to wait."""
+        now = self._clock()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = refill(tokens, updated, now, rate, burst)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class SQLiteBucketBackend:
+    """Token buckets shared by all workers of a host through a SQLite file."""
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time) -> None:
+        """Open (or create) the bucket database at ``path``."""
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False, timeout=1.0
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        with self._lock:
+            now = self._clock()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens = refill(*(row or (burst, now)), now, rate, burst)
+                wait = 0.0
+                if tokens >= cost:
+                    tokens -= cost
+                else:
+                    wait = (cost - tokens) / rate
+                self._conn.execute(
+                    "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE "
+                    "SET tokens = excluded.tokens, updated = excluded.updated",
+                    (key, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                # SQLite may have rolled back already (e.g. on SQLITE_FULL)
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+            return wait
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        """Take ``cost`` tokens; return 0 on success or seconds to wait."""
+        return await asyncio.to_thread(self._take, key, cost, rate, burst)
+
+
+class KnownKeys:
+    """API keys recently confirmed to belong to a user, least recent evicted."""
+
+    def __init__(
+        self,
+        max_keys: int = 10_000,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Remember up to ``max_keys`` keys, each for ``ttl`` seconds."""
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._clock = clock
+        self._keys: OrderedDict[str, float] = OrderedDict()
+
+    def __contains__(self, api_key: str) -> bool:
+        """Check whether ``api_key`` was confirmed within the last ``ttl``."""
+        confirmed = self._keys.get(api_key)
+        if confirmed is None:
+            return False
+        if self._clock() - confirmed >= self.ttl:
+            # Deleted users and revoked keys fall back to the address bucket
+            del self._keys[api_key]
+            return False
+        self._keys.move_to_end(api_key)
+        return True
+
+    def add(self, api_key: str) -> None:
+        """Remember that ``api_key`` belongs to a user."""
+        self._keys[api_key] = self._clock()
+        self._keys.move_to_end(api_key)
+        if len(self._keys) > self.max_keys:
+            self._keys.popitem(last=False)
+
+
+async def user_key_exists(api_key: str) -> bool:
+    """Check in the database whether ``api_key`` belongs to a user."""
+    try:
+        async with async_session() as db:
+            found = await db.execute(select(User.id).where(User.api_key == api_key))
+            return found.first() is not None
+    except (SQLAlchemyError, OSError):
+        return False  # unconfirmed keys stay on the address bucket
+
+
+def make_backend(url: str) -> MemoryBucketBackend | SQLiteBucketBackend:
+    """Create the bucket backend named by ``RATE_LIMIT_BACKEND``."""
+    if url == "memory":
+        return MemoryBucketBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBucketBackend(url.removeprefix("sqlite:///"))
+    raise ValueError(f"Unknown rate limit backend: {url}")
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing token buckets and a concurrency limit."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend: MemoryBucketBackend | SQLiteBucketBackend | None = None,
+        rate: float | None = None,
+        burst: float | None = None,
+        max_concurrency: int | None = None,
+        costs: dict[tuple[str, str], float] | None = None,
+        key_exists: Callable[[str], Awaitable[bool]] = user_key_exists,
+        known_keys: KnownKeys | None = None,
+    ) -> None:
+        """Wrap ``app``; unset limits are read from the config."""
+        self.app = app
+        self.backend = backend or make_backend(config.RATE_LIMIT_BACKEND)
+        self.rate = rate or config.RATE_LIMIT_RATE
+        self.burst = burst or config.RATE_LIMIT_BURST
+        self.max_concurrency = max_concurrency or config.RATE_LIMIT_MAX_CONCURRENCY
+        self.costs = config.RATE_LIMIT_COSTS if costs is None else costs
+        self.key_exists = key_exists
+        self.known_keys = known_keys or KnownKeys(
+            config.RATE_LIMIT_KNOWN_KEYS, config.RATE_LIMIT_KNOWN_KEYS_TTL
+        )
+        self.in_flight = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Admit, throttle or shed one request."""
+        limited = scope["type"] == "http" and config.RATE_LIMIT_ENABLED
+        if not limited or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if self.in_flight >= self.max_concurrency:
+            await self._reject(send, 503, 1, "Server is overloaded, retry later")
+            return
+
+        headers = dict(scope["headers"])
+        api_key = headers.get(b"api-key", b"").decode("latin-1")
+        if api_key and api_key in self.known_keys:
+            key = f"key:{api_key}"
+        else:
+            client = scope.get("client")
+            key = f"ip:{client[0] if client else 'unknown'}"
+        cost = min(
+            self.costs.get((scope["method"], scope["path"].rstrip("/")), 1.0),
+            self.burst,
+        )
+        wait = await self.backend.take(key, cost, self.rate, self.burst)
+        if wait > 0:
+            await self._reject(send, 429, wait, "Rate limit exceeded")
+            return
+        if api_key and key.startswith("ip:") and await self.key_exists(api_key):
+            # Charged to the address this time; its own bucket from now on
+            self.known_keys.add(api_key)
+
+        if scope["path"].rstrip("/") in STREAMING_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    @staticmethod
+    async def _reject(
+        send: Send, status: int, retry_after: float, message: str
+    ) -> None:
+        body = json.dumps(
+            {
+                "result": False,
+                "error_type": "TooManyRequests" if status == 429 else "Overloaded",
+                "error_message": message,
+            }
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,157 @@
+"""Routing of read-only sessions to replica databases.
+
+The read-your-writes window travels with the client, not with the worker:
+a request that committed a write gets a ``last_write`` cookie holding the
+commit time, and reads that carry a recent one are served by the primary.
+Every worker (and host) behind the load balancer sees the same marker.
+"""
+
+import itertools
+import logging
+import math
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], AsyncSession]
+
+# Cookie carrying the UNIX time of the client's last committed write
+LAST_WRITE_COOKIE = "last_write"
+
+
+def parse_last_write(value: str | None) -> float | None:
+    """Return the time held by a ``last_write`` cookie, if it is valid."""
+    try:
+        written_at = float(value)
+    except (TypeError, ValueError):
+        return None
+    return written_at if math.isfinite(written_at) else None
+
+
+class SessionRouter:
+    """
+    Hand out sessions bound to the primary or to one of the replicas.
+
+    - Replicas are picked round-robin
+    - A replica that fails to connect is ejected for ``eject_seconds``
+    - Callers whose last write is less than ``read_your_writes_seconds`` old
+      read from the primary
+    - When no replica is available the primary serves the read
+    """
+
+    def __init__(
+        self,
+        primary: SessionFactory,
+        replicas: list[SessionFactory] | None = None,
+        eject_seconds: float = 30.0,
+        read_your_writes_seconds: float = 5.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Route between ``primary`` and ``replicas`` session factories."""
+        self.primary = primary
+        self.replicas = list(replicas or [])
+        self.eject_seconds = eject_seconds
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._clock = clock
+        self._next = itertools.count()
+        self._ejected_until: dict[int, float] = {}
+
+    @property
+    def tracks_writes(self) -> bool:
+        """Whether reads after a write must be pinned to the primary."""
+        return bool(self.replicas) and self.read_your_writes_seconds > 0
+
+    def wrote_recently(self, written_at: float | None) -> bool:
+        """Check whether a write at ``written_at`` is inside the window."""
+        if written_at is None or not self.tracks_writes:
+            return False
+        # abs(): tolerates clock skew between hosts, but a marker far in the
+        # future cannot pin a client's reads to the primary forever
+        return abs(self._clock() - written_at) < self.read_your_writes_seconds
+
+    def eject(self, index: int) -> None:
+        """Take a replica out of rotation until its cool-down expires."""
+        self._ejected_until[index] = self._clock() + self.eject_seconds
+        logger.warning("Replica %s ejected for %.0fs", index, self.eject_seconds)
+
+    def healthy_replicas(self) -> list[int]:
+        """Return indexes of replicas in round-robin order, skipping ejected ones."""
+        if not self.replicas:
+            return []
+        now = self._clock()
+        start = next(self._next) % len(self.replicas)
+        order = [(start + i) % len(self.replicas) for i in range(len(self.replicas))]
+        return [i for i in order if self._ejected_until.get(i, 0.0) <= now]
+
+    @asynccontextmanager
+    async def read_session(
+        self, written_at: float | None = None
+    ) -> AsyncIterator[AsyncSession]:
+        """Open a session for a read-only request of a client last writing then."""
+        if not self.wrote_recently(written_at):
+            for index in self.healthy_replicas():
+                session = self.replicas[index]()
+                try:
+                    # Check out a connection up front so a dead replica is
+                    # detected before the handler runs
+                    await session.connection()
+                except (DBAPIError, OSError):
+                    await session.close()
+                    self.eject(index)
+                    continue
+                try:
+                    yield session
+                except DBAPIError as e:
+                    if e.connection_invalidated:
+                        self.eject(index)
+                    raise
+                finally:
+                    await session.close()
+                return
+
+        async with self.primary() as session:
+            yield session
+
+
+class ReadYourWritesMiddleware:
+    """
+    Set the ``last_write`` cookie on responses to requests that committed.
+
+    ``get_async_db`` stores the commit time in ``request.state.wrote_at``
+    once the session has committed; failed requests never get the cookie.
+    """
+
+    def __init__(self, app: ASGIApp, max_age: float) -> None:
+        """Wrap ``app``; cookies live ``max_age`` seconds (at least 1)."""
+        self.app = app
+        self.max_age = max(1, math.ceil(max_age))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Pass the request on, adding the cookie to successful writes."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                wrote_at = scope.get("state", {}).get("wrote_at")
+                if wrote_at is not None:
+                    cookie = (
+                        f"{LAST_WRITE_COOKIE}={wrote_at:.3f}; Max-Age={self.max_age}; "
+                        "Path=/; HttpOnly; SameSite=Lax"
+                    )
+                    message.setdefault("headers", [])
+                    message["headers"] = [
+                        *message["headers"],
+                        (b"set-cookie", cookie.encode("latin-1")),
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,74 @@
+"""Real-time feed events streamed over Server-Sent Events."""
+
+import json
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, Header, Query
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_async_db
+from src.events import broker
+from src.services.user_service import get_user_by_api_key
+
+from starlette.responses import StreamingResponse
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+
+def format_event(event: dict, event_id: int) -> str:
+    """Encode an event as one Server-Sent Events message."""
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("")
+async def stream_events(
+    api_key_header: str | None = Header(None, alias="api-key"),
+    api_key: str | None = Query(
+        None, description="API key for clients that cannot send headers (EventSource)"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+) -> StreamingResponse:
+    """
+    Stream new tweets and like count changes of followed users and oneself.
+
+    Events are ``tweet`` (the new tweet) and ``like`` (``tweet_id``, its
+    ``author_id``, the liker's ``user_id`` and a ``delta`` of +1 or -1). A
+    comment is sent when the stream is idle to keep proxies from closing
+    it. When the client falls too far behind the stream ends; the client
+    should reconnect and reload the feed.
+
+    Args:
+        api_key_header: User API key from request header.
+        api_key: User API key as a query parameter.
+        db: Async database session.
+
+    Returns:
+        ``text/event-stream`` response.
+    """
+    user = await get_user_by_api_key(api_key_header or api_key, db)
+    follows = {followee.id for followee in user.following}
+    # Release the connection now: the stream may stay open for hours
+    await db.close()
+
+    subscription = broker.subscribe(user.id, follows)
+
+    async def stream() -> AsyncIterator[str]:
+        try:
+            # Sent at once, so the client sees the stream open immediately
+            yield "retry: 3000\n\n"
+            event_id = 0
+            async for event in subscription.events():
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                event_id += 1
+                yield format_event(event, event_id)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,35 @@
+"""Background job monitoring routes for the Twitter clone API."""
+
+from fastapi import APIRouter, Depends, HTTPException, Header
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_async_db, pool_metrics
+from src.jobs import job_metrics
+from src.models import User
+from src.schemas.job_schemas import JobMetricsResponse
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+
+
+@router.get("/metrics", response_model=JobMetricsResponse)
+async def get_job_metrics(
+    api_key: str = Header(..., alias="api-key"),
+    db: AsyncSession = Depends(get_async_db),
+) -> JobMetricsResponse:
+    """
+    Report the state of the background job queue and the connection pools.
+
+    Args:
+        api_key: The API key passed in request headers.
+        db: Async database session.
+
+    Returns:
+        Jobs per status, queue lag, and the job and pool counters of this
+        process.
+    """
+    user = await db.execute(select(User.id).where(User.api_key == api_key))
+    if user.scalar() is None:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    return {"result": True, **await job_metrics(db), "pools": pool_metrics()}
@@ -1,69 +1,464 @@
 """Media upload and handling routes for the Twitter clone API."""
 
+import asyncio
+import inspect
 import os
+import re
+import time
 import uuid
+from urllib.parse import parse_qs, urlsplit
 
-from fastapi import APIRouter, Depends, File, HTTPException, Header, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request
 
-from sqlalchemy import select
+from python_multipart import MultipartParser
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import parse_options_header
+
+from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src import config
 from src.database import get_async_db
-from src.models import Media, User
+from src.jobs import job_handler
+from src.models import Media, Tweet, User, tweet_media_table
 from src.schemas.tweet_schemas import MediaUploadResponse
+from src.services.jpeg import JpegError, JpegScanner
+from src.services.media_service import verify
+
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
 
 router = APIRouter(prefix="/api/medias", tags=["Medias"])
+# Serves uploaded files when no web server (nginx, CDN) sits in front
+files_router = APIRouter(prefix="/media", tags=["Medias"])
+
+MEDIA_FOLDER = config.MEDIA_DIR
+MEDIA_FILENAME = re.compile(r"[\w-]+\.jpg")
+# Uploaded file names are random and never reused, so their content never
+# changes
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def _zerocopy_hooks_match() -> bool:
+    """
+    Check the private ``FileResponse`` hooks ``MediaFileResponse`` overrides.
+
+    They are not public API (Starlette is pinned in requirements.txt); when
+    an upgrade changes them, zero-copy sending is switched off instead of
+    breaking every media response.
+    """
+    expected = {
+        "_handle_simple": ["self", "send", "send_header_only"],
+        "_handle_single_range": [
+            "self",
+            "send",
+            "start",
+            "end",
+            "file_size",
+            "send_header_only",
+        ],
+    }
+    for name, parameters in expected.items():
+        hook = getattr(FileResponse, name, None)
+        if hook is None or list(inspect.signature(hook).parameters) != parameters:
+            return False
+    return True
+
+
+class MediaFileResponse(FileResponse):
+    """
+    File response that hands the file to the server for zero-copy sending.
+
+    When the ASGI server advertises the ``http.response.zerocopysend``
+    extension, the body (or the requested range) is sent with ``sendfile``
+    and never read into Python buffers. Other servers get the regular
+    chunked ``FileResponse`` body. The overrides below are dropped after
+    the class when Starlette's hooks do not match them.
+    """
+
+    zerocopy = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Send the file, zero-copy when the server supports it."""
+        self.zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+        await super().__call__(scope, receive, send)
+
+    async def _send_zerocopy(self, send: Send, offset: int, count: int) -> None:
+        with open(self.path, "rb") as file:
+            await send(
+                {
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": offset,
+                    "count": count,
+                }
+            )
+
+    async def _handle_simple(self, send: Send, send_header_only: bool) -> None:
+        if send_header_only or not self.zerocopy:
+            await super()._handle_simple(send, send_header_only)
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        await self._send_zerocopy(send, 0, self.stat_result.st_size)
+
+    async def _handle_single_range(
+        self, send: Send, start: int, end: int, file_size: int, send_header_only: bool
+    ) -> None:
+        if send_header_only or not self.zerocopy:
+            await super()._handle_single_range(
+                send, start, end, file_size, send_header_only
+            )
+            return
+        self.headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+        self.headers["content-length"] = str(end - start)
+        await send(
+            {"type": "http.response.start", "status": 206, "headers": self.raw_headers}
+        )
+        await self._send_zerocopy(send, start, end - start)
+
+
+if not _zerocopy_hooks_match():
+    del MediaFileResponse._handle_simple, MediaFileResponse._handle_single_range
+
+
+def cache_control(expires: int | None, now: float) -> str:
+    """Return the ``Cache-Control`` of a media URL expiring at ``expires``."""
+    if expires is None or config.MEDIA_URL_SECRET is None:
+        max_age = IMMUTABLE_MAX_AGE
+    else:
+        max_age = max(0, int(expires - now))
+    return f"public, max-age={max_age}, immutable"
+
+
+class JpegUploadParser:
+    """
+    Multipart parser that scans the ``file`` part as it arrives.
+
+    Feed the request body to ``write`` chunk by chunk and store what it
+    returns: the bytes of the file part without APP1 segments. The file's
+    name and type are checked as soon as its part headers are parsed and
+    its data goes through a ``JpegScanner``, so ``write`` raises on the
+    first chunk that is not a JPEG. Other fields are ignored.
+    """
+
+    def __init__(self, boundary: bytes) -> None:
+        """Parse a body delimited by ``boundary``."""
+        self.scanner = JpegScanner()
+        self.started = False  # the file part's headers were parsed
+        self.finished = False  # the file part ended
+        self._in_file = False
+        self._headers: dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+        self._out = bytearray()
+        self._parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._headers.clear,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    def write(self, chunk: bytes) -> bytes:
+        """Parse a chunk of the body; return the file bytes to store."""
+        self._parser.write(chunk)
+        out = bytes(self._out)
+        self._out.clear()
+        return out
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._field.lower()] = self._value
+        self._field = self._value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        if options.get(b"name") != b"file" or self.started:
+            return
+        self.started = self._in_file = True
+        filename = options.get(b"filename", b"").decode("utf-8", "replace")
+        if not filename.lower().endswith(".jpg"):
+            raise HTTPException(status_code=400, detail="Only .jpg files are allowed")
+        if self._headers.get(b"content-type") != b"image/jpeg":
+            raise HTTPException(status_code=400, detail="Invalid file type")
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._out += self.scanner.feed(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self.scanner.close()
+            self._in_file = False
+            self.finished = True
+
+
+async def receive_jpeg(request: Request, path: str) -> JpegScanner:
+    """
+    Stream the ``file`` part of a multipart upload to ``path``.
 
-MEDIA_FOLDER = "/media"
+    The body is read with ``request.stream()`` and each chunk is validated
+    before the next one is received, so a bad upload is answered without
+    reading or spooling the rest of it. Nothing is left at ``path`` on
+    failure.
 
+    Args:
+        request: A ``multipart/form-data`` request.
+        path: File to create.
+
+    Returns:
+        The scanner, holding the image's width, height and stored size.
+    """
+    _, params = parse_options_header(request.headers.get("content-type"))
+    if b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data")
+    parser = JpegUploadParser(params[b"boundary"])
+    try:
+        with open(path, "wb") as target:
+            async for chunk in request.stream():
+                data = parser.write(chunk)
+                if data:
+                    await asyncio.to_thread(target.write, data)
+    except BaseException:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        raise
+    if not parser.finished:
+        os.remove(path)
+        if parser.started:
+            raise HTTPException(status_code=400, detail="Incomplete upload")
+        raise HTTPException(status_code=422, detail="The file field is required")
+    return parser.scanner
+
+
+@router.get("/authorize", include_in_schema=False, status_code=204)
+async def authorize_media(
+    original_uri: str = Header("", alias="x-original-uri"),
+) -> Response:
+    """
+    Check a media URL for nginx, which then sends the file itself.
+
+    Called through nginx ``auth_request`` with the requested URI, so
+    signed URLs are enforced without proxying the file through the app.
+
+    Args:
+        original_uri: Path and query of the media request.
 
-@router.post("", response_model=MediaUploadResponse)
+    Returns:
+        204 with the ``Cache-Control`` to send the file with, or 403.
+    """
+    url = urlsplit(original_uri)
+    filename = url.path.rsplit("/", 1)[-1]
+    query = parse_qs(url.query)
+    try:
+        expires = int(query["expires"][0]) if "expires" in query else None
+    except ValueError:
+        expires = None
+    signature = query.get("signature", [None])[0]
+    now = time.time()
+    if not MEDIA_FILENAME.fullmatch(filename) or not verify(
+        filename, expires, signature, now
+    ):
+        raise HTTPException(status_code=403, detail="Invalid or expired media URL")
+    return Response(
+        status_code=204, headers={"Cache-Control": cache_control(expires, now)}
+    )
+
+
+@router.post(
+    "",
+    response_model=MediaUploadResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file"],
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                    }
+                }
+            },
+        }
+    },
+)
 async def upload_media(
-    file: UploadFile = File(...),
+    request: Request,
     api_key: str = Header(..., alias="api-key"),
     db: AsyncSession = Depends(get_async_db),
 ) -> MediaUploadResponse:
     """
     Upload a JPEG image file and store it in the media directory.
 
-    Associates the uploaded media with the authenticated user.
+    The multipart body is parsed as it is received: the ``file`` part's
+    name and type are checked from its headers, and its marker structure
+    chunk by chunk as it is written, so a bad upload is rejected at the
+    first bad chunk. APP1 (EXIF) segments are not stored; the image size
+    and stored byte count are recorded on the media. Associates the
+    uploaded media with the authenticated user.
+
     Args:
-        file (UploadFile): The uploaded image file (must be .jpg).
+        request (Request): The multipart request with a ``file`` part
+            (must be a .jpg of type image/jpeg).
         api_key (str): The user's API key passed via request headers.
         db (AsyncSession): The asynchronous database session.
 
     Returns:
-        dict: Contains the result flag and the ID of the created media record.
+        dict: The result flag, the ID of the created media record and the
+        image's width, height and stored size.
     """
-    # Validate API key and retrieve user
-    result = await db.execute(select(User).where(User.api_key == api_key))
-    user = result.scalars().first()
-    if not user:
+    # Validate API key and retrieve user before reading the body
+    result = await db.execute(select(User.id).where(User.api_key == api_key))
+    user_id = result.scalar()
+    if user_id is None:
         raise HTTPException(status_code=401, detail="Invalid API key")
+    # Release the connection now: a slow client may take minutes to upload
+    await db.close()
 
-    # Validate file extension
-    if not file.filename.lower().endswith(".jpg"):
-        raise HTTPException(status_code=400, detail="Only .jpg files are allowed")
-
-    # Validate MIME type
-    if file.content_type not in ("image/jpeg",):
-        raise HTTPException(status_code=400, detail="Invalid file type")
-
-    # Read file contents
-    contents = await file.read()
-
-    # Save file to media folder
+    # Validate the JPEG structure while receiving it, without EXIF segments
     os.makedirs(MEDIA_FOLDER, exist_ok=True)
     filename = f"{uuid.uuid4().hex}.jpg"
     filepath = os.path.join(MEDIA_FOLDER, filename)
-
-    with open(filepath, "wb") as f:
-        f.write(contents)
+    try:
+        image = await receive_jpeg(request, filepath)
+    except JpegError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid JPEG: {exc}") from exc
+    except MultipartParseError as exc:
+        raise HTTPException(status_code=400, detail="Malformed multipart body") from exc
 
     # Store media record in the database
-    media = Media(user_id=user.id, filename=filename)
+    media = Media(
+        user_id=user_id,
+        filename=filename,
+        width=image.width,
+        height=image.height,
+        size_bytes=image.size,
+    )
     db.add(media)
     await db.commit()
     await db.refresh(media)
 
-    return {"result": True, "media_id": media.id}
+    return {
+        "result": True,
+        "media_id": media.id,
+        "width": media.width,
+        "height": media.height,
+        "size_bytes": media.size_bytes,
+    }
+
+
+@job_handler("media.delete")
+async def delete_media_files(db: AsyncSession, payload: dict) -> None:
+    """
+    Delete the media of a deleted tweet, files first, then the rows.
+
+    A tweet may attach any uploaded media, so media still attached to a
+    live tweet are kept.
+
+    Args:
+        db: Async database session.
+        payload: ``user_id`` of the owner and the ``media_ids`` to delete.
+    """
+    media_ids = payload["media_ids"]
+    # An index lookup per media on the tweet_media primary key
+    in_use = set(
+        (
+            await db.execute(
+                select(tweet_media_table.c.media_id)
+                .join(Tweet, Tweet.id == tweet_media_table.c.tweet_id)
+                .where(
+                    tweet_media_table.c.media_id.in_(media_ids),
+                    Tweet.deleted_at.is_(None),
+                )
+            )
+        ).scalars()
+    )
+    result = await db.execute(
+        select(Media).where(
+            Media.id.in_([m for m in media_ids if m not in in_use]),
+            Media.user_id == payload["user_id"],
+        )
+    )
+    medias = result.scalars().all()
+    for media in medias:
+        try:
+            await asyncio.to_thread(
+                os.remove, os.path.join(MEDIA_FOLDER, media.filename)
+            )
+        except FileNotFoundError:
+            pass  # already removed by a previous attempt
+    await db.execute(delete(Media).where(Media.id.in_([m.id for m in medias])))
+    await db.commit()
+
+
+@files_router.api_route("/{filename}", methods=["GET", "HEAD"])
+async def get_media(
+    filename: str,
+    request: Request,
+    expires: int | None = Query(None),
+    signature: str | None = Query(None),
+) -> Response:
+    """
+    Serve an uploaded media file.
+
+    Responses carry an ETag and ``Cache-Control: immutable``, answer
+    ``If-None-Match`` with 304 and support ``Range`` requests. Signed URLs
+    are checked when ``MEDIA_URL_SECRET`` is set.
+
+    Args:
+        filename: Stored file name.
+        request: Incoming request, for conditional headers.
+        expires: Expiry of a signed URL (UNIX time).
+        signature: Signature of a signed URL.
+
+    Returns:
+        The file, a 206 partial response or 304 Not Modified.
+    """
+    if not MEDIA_FILENAME.fullmatch(filename):
+        raise HTTPException(status_code=404, detail="Media not found")
+    now = time.time()
+    if not verify(filename, expires, signature, now):
+        raise HTTPException(status_code=403, detail="Invalid or expired media URL")
+
+    path = os.path.join(MEDIA_FOLDER, filename)
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Media not found") from None
+
+    response = MediaFileResponse(
+        path,
+        media_type="image/jpeg",
+        stat_result=stat_result,
+        headers={"Cache-Control": cache_control(expires, now)},
+    )
+    etag = response.headers["etag"]
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(
+            status_code=304,
+            headers={
+                "ETag": etag,
+                "Cache-Control": response.headers["cache-control"],
+            },
+        )
+    return response
@@ -1,26 +1,49 @@
 """Tweet-related API routes including create, read, like, and delete operations."""
 
 import json
+from collections import Counter
+from datetime import UTC, datetime
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
 
-from sqlalchemy import select
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeout
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from src import config
 from src.database import get_async_db
-from src.models import Like, Media, Tweet, User
+from src.events import broker
+from src.jobs import enqueue, job_handler
+from src.liked_cache import liked_cache
+from src.likes_buffer import like_buffer, overlay_likes, overlay_summary
+from src.models import Like, Media, Tweet, User, tweet_media_table
+from src.ranking import top_tweet_ids
 from src.schemas.tweet_schemas import (
     TweetCreateRequest,
     TweetCreateResponse,
     TweetDelete,
     TweetDeleteLikeResponse,
+    TweetGetResponse,
+    TweetLikesResponse,
     TweetPostLikeResponse,
+    TweetsByIdResponse,
     TweetsGetResponse,
 )
+from src.services.hydrator import Hydrator, get_hydrator, parse_ids
+from src.services.media_service import media_url
+from src.services.projection import TWEET_FIELDS, parse_fields
+from src.services.read_models import load_feed
+from src.services.tweet_service import (
+    feed_since,
+    fetch_tweets_json,
+    get_tweet_by_id,
+    list_likers,
+    summarize_likes,
+)
+from src.services.user_stats import bump_stats
 
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
 
 router = APIRouter(prefix="/api/tweets", tags=["Tweets"])
 
@@ -34,6 +57,8 @@ async def create_tweet(
     """
     Create a new tweet.
 
+    The tweet is published to the event streams of the author's followers.
+
     Args:
         payload: Tweet content and optional media IDs.
         api_key: User API key from request header.
@@ -56,64 +81,172 @@ async def create_tweet(
         author_id=user.id,
     )
     db.add(tweet)
+    await db.flush()
+    media_ids = dict.fromkeys(payload.tweet_media_ids or [])
+    if media_ids:
+        await db.execute(
+            insert(tweet_media_table),
+            [{"media_id": media_id, "tweet_id": tweet.id} for media_id in media_ids],
+        )
+    await bump_stats(db, {user.id: {"tweets_count": 1}})
     await db.commit()
     await db.refresh(tweet)
 
+    # Push the tweet to the open event streams of the author's followers
+    media_res = await db.execute(
+        select(Media.filename)
+        .where(Media.id.in_(payload.tweet_media_ids or []))
+        .order_by(Media.id)
+    )
+    await broker.publish(
+        {
+            "type": "tweet",
+            "tweet": {
+                "id": tweet.id,
+                "content": tweet.content,
+                "attachments": [media_url(name) for name in media_res.scalars()],
+                "author": {"id": user.id, "name": user.name},
+            },
+        }
+    )
+
     return {"result": True, "tweet_id": tweet.id}
 
 
-@router.get("", response_model=TweetsGetResponse)
+@router.get(
+    "",
+    response_model=TweetsGetResponse | TweetsByIdResponse,
+    response_model_exclude_none=True,
+)
 async def get_tweets(
-        db: AsyncSession = Depends(get_async_db)
-) -> TweetsGetResponse:
+        likes: Literal["full", "compact"] = Query(
+            "full",
+            description="full: every liker; compact: like_count, liked_by_me "
+            "and the first few likers",
+        ),
+        fields: str | None = Query(
+            None,
+            description="Comma-separated tweet fields to return, e.g. id,content",
+        ),
+        ids: str | None = Query(
+            None,
+            description="Comma-separated tweet IDs to fetch; the response maps "
+            "each found ID to its tweet",
+        ),
+        api_key: str | None = Header(None, alias="api-key"),
+        db: AsyncSession = Depends(get_async_db),
+        hydrator: Hydrator = Depends(get_hydrator),
+) -> TweetsGetResponse | TweetsByIdResponse:
     """
     Retrieve all tweets with authors, likes, and media attachments.
 
+    The read path is selected per deployment with ``TWEETS_READ_PATH``:
+    ``json`` returns the page pre-serialized by the database (unless media
+    URLs are signed, which the database cannot do).
+    In ``compact`` likes mode the payload per tweet is bounded; the full
+    list of likers is served by ``GET /api/tweets/{id}/likes``.
+    Relationships left out by ``fields`` are neither loaded nor serialized.
+    With write-behind likes the viewer's unflushed likes are overlaid.
+    With ``ids`` only those tweets are returned, keyed by ID, in full form.
+
     Args:
+        likes: Likes representation, ``full`` or ``compact``.
+        fields: Optional projection of tweet fields.
+        ids: Optional comma-separated IDs of the tweets to fetch.
+        api_key: Optional API key of the viewer, used for ``liked_by_me``
+            and pending likes.
         db: Async database session.
+        hydrator: Per-request multi-get loader.
 
     Returns:
         JSON response with a list of tweets or error details.
     """
+    if ids is not None:
+        return {"result": True, "tweets": await hydrator.get_tweets(parse_ids(ids))}
+
+    selected = parse_fields(fields, TWEET_FIELDS)
+
+    def wanted(name: str) -> bool:
+        return selected is None or name in selected
+
     try:
-        result = await db.execute(
-            select(Tweet).options(
-                selectinload(Tweet.user),  # load author
-                selectinload(Tweet.likes).selectinload(
-                    Like.user
-                ),  # load likes and users
+        compact = likes == "compact"
+        viewer = None
+        pending = {}
+        if api_key and (compact or config.LIKES_WRITE_BEHIND):
+            viewer_res = await db.execute(
+                select(User.id, User.name).where(User.api_key == api_key)
+            )
+            viewer = viewer_res.first()
+        if viewer is not None and config.LIKES_WRITE_BEHIND:
+            # The viewer's likes not yet written to the database
+            pending = like_buffer.pending_for(viewer.id)
+
+        json_path = all(
+            (
+                config.TWEETS_READ_PATH == "json",
+                config.MEDIA_URL_SECRET is None,  # URLs are signed in Python
+                not compact,
+                selected is None,
+                not pending,
             )
         )
-        tweets_ = result.scalars().all()
-
-        tweets_list = []
-        for item in tweets_:
-            # Parse media ID list from JSON string
-            media_id_list = json.loads(item.media_ids or "[]")
+        if json_path:
+            body = await fetch_tweets_json(db)
+            return Response(content=body, media_type="application/json")
+
+        tweets_ = await load_feed(
+            db,
+            since=feed_since(),
+            author=wanted("author"),
+            attachments=wanted("attachments"),
+            likes=wanted("likes") and not compact,
+        )
 
-            # Fetch media filenames from IDs
-            media_res = await db.execute(
-                select(Media.filename).where(Media.id.in_(media_id_list))
+        summaries = {}
+        if compact and any(map(wanted, ("likes", "like_count", "liked_by_me"))):
+            summaries = await summarize_likes(
+                db,
+                [item.id for item in tweets_],
+                viewer_id=viewer.id if viewer is not None else None,
+                preview=config.LIKES_PREVIEW_SIZE,
             )
-            media_list = media_res.scalars().all()
+            for tweet_id, liked in pending.items():
+                if tweet_id in summaries:
+                    overlay_summary(summaries[tweet_id], viewer.id, liked)
 
+        tweets_list = []
+        for item in tweets_:
             # Construct tweet data
-            tweet_data = {
-                "id": item.id,
-                "content": item.content,
-                "author": {"id": item.author_id, "name": item.user.name},
-                "attachments": [
-                    f"http://localhost/media/{filename}" for filename in media_list
-                ],
-                "likes": [
-                    {"user_id": like.user.id, "name": like.user.name}
-                    for like in item.likes
-                ],
-            }
+            tweet_data = {"id": item.id, "content": item.content}
+            if wanted("author"):
+                tweet_data["author"] = {"id": item.author_id, "name": item.author_name}
+            if wanted("attachments"):
+                tweet_data["attachments"] = item.attachments
+            if compact:
+                tweet_data.update(summaries.get(item.id, {}))
+            elif wanted("likes"):
+                tweet_data["likes"] = [
+                    {"user_id": like.id, "name": like.name} for like in item.likes
+                ]
+                if item.id in pending:
+                    tweet_data["likes"] = overlay_likes(
+                        tweet_data["likes"], viewer, pending[item.id]
+                    )
+            if selected is not None:
+                tweet_data = {
+                    key: value for key, value in tweet_data.items() if key in selected
+                }
             tweets_list.append(tweet_data)
 
+        if selected is not None:
+            # A projection is not a full TweetResponse; skip response_model
+            return JSONResponse({"result": True, "tweets": tweets_list})
         return {"result": True, "tweets": tweets_list}
 
+    except PoolTimeout:
+        raise  # answered with 503 by pool_timeout_handler
+
     except SQLAlchemyError as e:
         # Database error
         return JSONResponse(
@@ -131,6 +264,80 @@ async def get_tweets(
         )
 
 
+@router.get("/top", response_model=TweetsGetResponse)
+async def get_top_tweets(
+    limit: int = Query(20, ge=1, le=100, description="Number of tweets"),
+    db: AsyncSession = Depends(get_async_db),
+    hydrator: Hydrator = Depends(get_hydrator),
+) -> TweetsGetResponse:
+    """
+    Retrieve the best-ranked tweets, best first.
+
+    Scores are precomputed by the periodic ``tweet.rank`` job, so this is an
+    indexed read of ``tweet_scores`` plus a fixed number of hydration queries.
+
+    Args:
+        limit: Number of tweets to return.
+        db: Async database session.
+        hydrator: Per-request multi-get loader.
+
+    Returns:
+        JSON response with the ranked tweets.
+    """
+    tweet_ids = await top_tweet_ids(db, limit)
+    tweets = await hydrator.get_tweets(tweet_ids)
+    return {"result": True, "tweets": [tweets[i] for i in tweet_ids if i in tweets]}
+
+
+@router.get("/{id}", response_model=TweetGetResponse)
+async def get_tweet(
+    id: int, db: AsyncSession = Depends(get_async_db)
+) -> TweetGetResponse:
+    """
+    Retrieve a single tweet by ID, including tweets moved to the archive.
+
+    Args:
+        id: Tweet ID.
+        db: Async database session.
+
+    Returns:
+        JSON response with the tweet.
+    """
+    tweet = await get_tweet_by_id(db, id)
+    if tweet is None:
+        raise HTTPException(status_code=404, detail="Tweet not found")
+    return {"result": True, "tweet": tweet}
+
+
+@router.get("/{id}/likes", response_model=TweetLikesResponse)
+async def get_tweet_likes(
+    id: int,
+    after: int | None = Query(None, description="Cursor returned by the last page"),
+    limit: int = Query(50, ge=1, le=500, description="Page size"),
+    db: AsyncSession = Depends(get_async_db),
+) -> TweetLikesResponse:
+    """
+    List the users who liked a tweet, page by page.
+
+    Args:
+        id: Tweet ID.
+        after: Keyset cursor (``next_cursor`` of the previous page).
+        limit: Maximum number of likers returned.
+        db: Async database session.
+
+    Returns:
+        JSON response with a page of likers and the next cursor.
+    """
+    tweet_result = await db.execute(
+        select(Tweet.id).where(Tweet.id == id, Tweet.deleted_at.is_(None))
+    )
+    if tweet_result.scalar() is None:
+        raise HTTPException(status_code=404, detail="Tweet not found")
+
+    likers, next_cursor = await list_likers(db, id, after, limit)
+    return {"result": True, "likes": likers, "next_cursor": next_cursor}
+
+
 @router.delete("/{id}", response_model=TweetDelete)
 async def delete_tweet(
     id: int,
@@ -140,6 +347,9 @@ async def delete_tweet(
     """
     Delete a tweet by ID if it belongs to the user.
 
+    The tweet gets a ``deleted_at`` tombstone and disappears from every read
+    at once; a ``tweet.purge`` job removes its likes and media later.
+
     Args:
         id: Tweet ID.
         api_key: User API key from request header.
@@ -155,18 +365,69 @@ async def delete_tweet(
         raise HTTPException(status_code=401, detail="Invalid API key")
 
     tweet_result = await db.execute(
-        select(Tweet).where(Tweet.author_id == user.id, Tweet.id == id)
+        select(Tweet).where(
+            Tweet.author_id == user.id, Tweet.id == id, Tweet.deleted_at.is_(None)
+        )
     )
     tweet = tweet_result.scalars().first()
     if not tweet:
         raise HTTPException(status_code=404, detail="Tweet not found")
 
-    await db.delete(tweet)
+    # Hide the tweet at once; its likes and media are purged in the background
+    tweet.deleted_at = datetime.now(UTC)
+    await bump_stats(db, {user.id: {"tweets_count": -1}})
+    enqueue(db, "tweet.purge", {"tweet_id": tweet.id})
     await db.commit()
 
     return {"result": True}
 
 
+@job_handler("tweet.purge")
+async def purge_tweet(db: AsyncSession, payload: dict) -> None:
+    """
+    Remove what a soft-deleted tweet leaves behind.
+
+    Likes are deleted in batches of ``TWEET_PURGE_BATCH_SIZE``, one
+    transaction each (with the likers' counters), so no lock is held over
+    all of them; media files are
+    handed to a ``media.delete`` job. The tombstone row itself is kept with
+    its content cleared.
+
+    Args:
+        db: Async database session.
+        payload: ``tweet_id`` of the deleted tweet.
+    """
+    tweet = await db.get(Tweet, payload["tweet_id"])
+    if tweet is None or tweet.deleted_at is None:
+        return
+    media_ids = json.loads(tweet.media_ids or "[]")
+
+    batch_size = config.TWEET_PURGE_BATCH_SIZE
+    batch = select(Like.id).where(Like.tweet_id == tweet.id).limit(batch_size)
+    while True:
+        result = await db.execute(
+            delete(Like).where(Like.id.in_(batch)).returning(Like.user_id)
+        )
+        likers = Counter(result.scalars())
+        await bump_stats(
+            db, {user_id: {"likes_count": -n} for user_id, n in likers.items()}
+        )
+        await db.commit()
+        if likers.total() < batch_size:
+            break
+
+    if media_ids:
+        enqueue(
+            db, "media.delete", {"user_id": tweet.author_id, "media_ids": media_ids}
+        )
+        await db.execute(
+            delete(tweet_media_table).where(tweet_media_table.c.tweet_id == tweet.id)
+        )
+    tweet.content = ""
+    tweet.media_ids = None
+    await db.commit()
+
+
 @router.post("/{id}/likes", response_model=TweetPostLikeResponse)
 async def create_like(
     id: int,
@@ -176,6 +437,8 @@ async def create_like(
     """
     Like a tweet by ID.
 
+    With ``LIKES_WRITE_BEHIND`` the like is buffered (see src/likes_buffer.py).
+
     Args:
         id: Tweet ID.
         api_key: User API key from request header.
@@ -190,15 +453,33 @@ async def create_like(
     if not user:
         raise HTTPException(status_code=401, detail="Invalid API key")
 
-    tweet_result = await db.execute(select(Tweet).where(Tweet.id == id))
-    if not tweet_result.scalars().first():
+    tweet_result = await db.execute(
+        select(Tweet.author_id).where(Tweet.id == id, Tweet.deleted_at.is_(None))
+    )
+    author_id = tweet_result.scalar()
+    if author_id is None:
         raise HTTPException(status_code=404, detail="Tweet not found")
 
-    like = Like(user_id=user.id, tweet_id=id)
-    db.add(like)
-    await db.commit()
-    await db.refresh(like)
-
+    if config.LIKES_WRITE_BEHIND:
+        # Acknowledged once logged; written to the database with the next batch
+        await like_buffer.record(user.id, id, liked=True)
+    else:
+        like = Like(user_id=user.id, tweet_id=id)
+        db.add(like)
+        await bump_stats(db, {user.id: {"likes_count": 1}})
+        await db.commit()
+        await db.refresh(like)
+        liked_cache.record(user.id, id, liked=True)
+
+    await broker.publish(
+        {
+            "type": "like",
+            "tweet_id": id,
+            "author_id": author_id,
+            "user_id": user.id,
+            "delta": 1,
+        }
+    )
     return {"result": True}
 
 
@@ -211,6 +492,8 @@ async def delete_like(
     """
     Remove like from a tweet.
 
+    With ``LIKES_WRITE_BEHIND`` the unlike is buffered (see src/likes_buffer.py).
+
     Args:
         id: Tweet ID.
         api_key: User API key from request header.
@@ -225,18 +508,50 @@ async def delete_like(
     if not user:
         raise HTTPException(status_code=401, detail="Invalid API key")
 
-    tweet_result = await db.execute(select(Tweet).where(Tweet.id == id))
-    if not tweet_result.scalars().first():
+    tweet_result = await db.execute(
+        select(Tweet.author_id).where(Tweet.id == id, Tweet.deleted_at.is_(None))
+    )
+    author_id = tweet_result.scalar()
+    if author_id is None:
         raise HTTPException(status_code=404, detail="Tweet not found")
 
-    like_result = await db.execute(
-        select(Like).where(Like.user_id == user.id, Like.tweet_id == id)
-    )
-    like = like_result.scalars().first()
-    if not like:
+    pending = None
+    if config.LIKES_WRITE_BEHIND:
+        pending = like_buffer.pending_for(user.id).get(id)
+    like = None
+    if pending is None:
+        like_result = await db.execute(
+            select(Like).where(Like.user_id == user.id, Like.tweet_id == id)
+        )
+        like = like_result.scalars().first()
+    if not (like or pending):
         raise HTTPException(status_code=404, detail="Like not found")
 
+    if config.LIKES_WRITE_BEHIND:
+        await like_buffer.record(user.id, id, liked=False)
+        await broker.publish(
+            {
+                "type": "like",
+                "tweet_id": id,
+                "author_id": author_id,
+                "user_id": user.id,
+                "delta": -1,
+            }
+        )
+        return {"result": True}
+
     await db.delete(like)
+    await bump_stats(db, {user.id: {"likes_count": -1}})
     await db.commit()
-
+    liked_cache.record(user.id, id, liked=False)
+
+    await broker.publish(
+        {
+            "type": "like",
+            "tweet_id": id,
+            "author_id": author_id,
+            "user_id": user.id,
+            "delta": -1,
+        }
+    )
     return {"result": True}
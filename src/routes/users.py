@@ -1,25 +1,83 @@
 """User-related API routes including get, follow operations."""
 
-from fastapi import APIRouter, Depends, HTTPException, Header
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from src.backup import export_lines, gzip_chunks
 from src.database import get_async_db
 from src.models import User
+from src.schemas.tweet_schemas import TweetsPageResponse
 from src.schemas.user_schemas import (
     UserDeleteFollow,
     UserPostFollow,
     UserProfileResponse,
+    UsersByIdResponse,
 )
+from src.services.hydrator import Hydrator, get_hydrator, parse_ids
+from src.services.projection import PROFILE_FIELDS, parse_fields
+from src.services.read_models import Profile, load_profile
+from src.services.tweet_service import list_author_tweet_ids
+from src.services.user_service import get_user_by_api_key
+from src.services.user_stats import bump_stats
+
+from starlette.responses import JSONResponse, StreamingResponse
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
+FIELDS_QUERY = Query(
+    None, description="Comma-separated profile fields to return, e.g. id,name"
+)
+
+
+def profile_response(
+    profile: Profile, selected: frozenset[str] | None
+) -> UserProfileResponse | JSONResponse:
+    """Serialize a profile, keeping only the selected fields if projected."""
+    fields = {"id": profile.id, "name": profile.name}
+    for name in ("followers", "following"):
+        users = getattr(profile, name)
+        if users is not None:
+            fields[name] = [{"id": u.id, "name": u.name} for u in users]
+    if profile.stats is not None:
+        fields["stats"] = profile.stats
+    if selected is None:
+        return {"result": True, "user": fields}
+    # A projection is not a full UserProfile; skip response_model
+    return JSONResponse(
+        {
+            "result": True,
+            "user": {key: value for key, value in fields.items() if key in selected},
+        }
+    )
+
+
+@router.get("", response_model=UsersByIdResponse)
+async def get_users(
+    ids: str = Query(..., description="Comma-separated user IDs to fetch"),
+    hydrator: Hydrator = Depends(get_hydrator),
+) -> UsersByIdResponse:
+    """
+    Get the previews of many users in a single query.
+
+    Args:
+        ids (str): Comma-separated user IDs; unknown IDs are left out.
+        hydrator (Hydrator): Per-request multi-get loader.
+
+    Returns:
+        dict: Mapping of user ID to user preview.
+    """
+    return {"result": True, "users": await hydrator.get_users(parse_ids(ids))}
+
 
 @router.get("/me", response_model=UserProfileResponse)
 async def get_me(
     api_key: str = Header(..., alias="api-key"),
+    fields: str | None = FIELDS_QUERY,
     db: AsyncSession = Depends(get_async_db),
 ) -> UserProfileResponse:
     """
@@ -27,28 +85,55 @@ async def get_me(
 
     Args:
        api_key (str): The API key passed in request headers.
+       fields (str | None): Optional projection of profile fields.
        db (AsyncSession): The async database session.
 
     Returns:
-       dict: A user profile including followers and following.
+       dict: A user profile including followers, following and counters.
     """
-    res = await db.execute(
-        select(User)
-        .options(selectinload(User.followers), selectinload(User.following))
-        .where(User.api_key == api_key)
-    )
-    user = res.scalars().first()
-    if not user:
+    selected = parse_fields(fields, PROFILE_FIELDS)
+    profile = await load_profile(db, User.api_key == api_key, selected)
+    if profile is None:
         raise HTTPException(status_code=401, detail="Invalid API key")
-    return {
-        "result": True,
-        "user": {
-            "id": user.id,
-            "name": user.name,
-            "followers": [{"id": u.id, "name": u.name} for u in user.followers],
-            "following": [{"id": u.id, "name": u.name} for u in user.following],
+    return profile_response(profile, selected)
+
+
+@router.get("/me/export")
+async def export_me(
+    api_key: str = Header(..., alias="api-key"),
+    db: AsyncSession = Depends(get_async_db),
+) -> StreamingResponse:
+    """
+    Download the current user's data as gzip-compressed NDJSON.
+
+    The profile, media metadata, tweets, likes and follows are streamed
+    from server-side cursors (see src/backup.py), so memory use does not
+    grow with the account.
+
+    Args:
+       api_key (str): The API key passed in request headers.
+       db (AsyncSession): The async database session.
+
+    Returns:
+       StreamingResponse: An ``.ndjson.gz`` attachment.
+    """
+    user = await get_user_by_api_key(api_key, db)
+    engine = db.bind
+    # The session ends with the request; the stream reads on its own connection
+    await db.close()
+
+    async def stream() -> AsyncIterator[bytes]:
+        async with engine.connect() as conn:
+            async for chunk in gzip_chunks(export_lines(conn, user.id)):
+                yield chunk
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/gzip",
+        headers={
+            "Content-Disposition": f'attachment; filename="user-{user.id}.ndjson.gz"'
         },
-    }
+    )
 
 
 @router.post("/{id}/follow", response_model=UserPostFollow)
@@ -96,6 +181,13 @@ async def post_follow(
 
     # Add target user to current user's following list
     current_user.following.append(target_user)
+    await bump_stats(
+        db,
+        {
+            current_user.id: {"following_count": 1},
+            target_user.id: {"followers_count": 1},
+        },
+    )
 
     await db.commit()
 
@@ -145,40 +237,71 @@ async def delete_follow(
 
     # Remove the follow relationship
     current_user.following.remove(target_user)
+    await bump_stats(
+        db,
+        {
+            current_user.id: {"following_count": -1},
+            target_user.id: {"followers_count": -1},
+        },
+    )
 
     await db.commit()
 
     return {"result": True}
 
 
+@router.get("/{id}/tweets", response_model=TweetsPageResponse)
+async def get_user_tweets(
+    id: int,
+    before: int | None = Query(None, description="Cursor returned by the last page"),
+    limit: int = Query(20, ge=1, le=100, description="Page size"),
+    db: AsyncSession = Depends(get_async_db),
+    hydrator: Hydrator = Depends(get_hydrator),
+) -> TweetsPageResponse:
+    """
+    List a user's tweets, newest first, page by page.
+
+    Args:
+        id (int): ID of the author.
+        before (int | None): Keyset cursor (``next_cursor`` of the last page).
+        limit (int): Maximum number of tweets returned.
+        db (AsyncSession): Database session dependency.
+        hydrator (Hydrator): Per-request multi-get loader.
+
+    Returns:
+        dict: A page of tweets and the next cursor.
+    """
+    # Also caches the author for the hydration of the page
+    if not await hydrator.get_users([id]):
+        raise HTTPException(status_code=404, detail="User not found")
+    tweet_ids, next_cursor = await list_author_tweet_ids(db, id, before, limit)
+    tweets = await hydrator.get_tweets(tweet_ids)
+    return {
+        "result": True,
+        "tweets": [tweets[i] for i in tweet_ids if i in tweets],
+        "next_cursor": next_cursor,
+    }
+
+
 @router.get("/{id}", response_model=UserProfileResponse)
 async def get_user_by_id(
-        id: int, db: AsyncSession = Depends(get_async_db)
+        id: int,
+        fields: str | None = FIELDS_QUERY,
+        db: AsyncSession = Depends(get_async_db),
 ) -> UserProfileResponse:
     """
     Get a user profile by user ID.
 
     Args:
         id (int): ID of the user to fetch.
+        fields (str | None): Optional projection of profile fields.
         db (AsyncSession): Database session dependency.
 
     Returns:
-        dict: The user profile with followers and following lists.
+        dict: The user profile with followers and following lists and counters.
     """
-    res = await db.execute(
-        select(User)
-        .options(selectinload(User.followers), selectinload(User.following))
-        .where(User.id == id)
-    )
-    user = res.scalars().first()
-    if not user:
+    selected = parse_fields(fields, PROFILE_FIELDS)
+    profile = await load_profile(db, User.id == id, selected)
+    if profile is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return {
-        "result": True,
-        "user": {
-            "id": user.id,
-            "name": user.name,
-            "followers": [{"id": u.id, "name": u.name} for u in user.followers],
-            "following": [{"id": u.id, "name": u.name} for u in user.following],
-        },
-    }
+    return profile_response(profile, selected)
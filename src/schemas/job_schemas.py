@@ -0,0 +1,30 @@
+"""Pydantic schemas for the background jobs block."""
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class JobMetricsResponse(BaseModel):
+    """Response schema for the background job metrics."""
+
+    result: Literal[True] = Field(..., description="Request success flag")
+    statuses: dict[str, int] = Field(
+        ..., description="Number of jobs per status", example={"pending": 3, "done": 40}
+    )
+    lag_seconds: float = Field(
+        ..., description="Age of the oldest due job that is still pending"
+    )
+    counters: dict[str, int] = Field(
+        ...,
+        description="Jobs enqueued, claimed, succeeded, retried and failed "
+        "by this process",
+    )
+    run_seconds: dict[str, float] = Field(
+        ..., description="Time spent running handlers by this process, per kind"
+    )
+    pools: dict[str, dict[str, float]] = Field(
+        ...,
+        description="Connection checkouts, timeouts and wait times of this "
+        "process's pools",
+    )
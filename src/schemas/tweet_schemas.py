@@ -52,7 +52,14 @@ class TweetResponse(BaseModel):
         ..., description="Preview information of the tweet's author"
     )
     likes: list[LikeResponse] = Field(
-        default_factory=list, description="List of users who liked the tweet"
+        default_factory=list,
+        description="Users who liked the tweet (the first few in compact mode)",
+    )
+    like_count: int | None = Field(
+        None, description="Total number of likes (compact mode only)"
+    )
+    liked_by_me: bool | None = Field(
+        None, description="Whether the viewer liked the tweet (compact mode only)"
     )
 
 
@@ -65,6 +72,42 @@ class TweetsGetResponse(BaseModel):
     tweets: list[TweetResponse] = Field(..., description="List of retrieved tweets")
 
 
+class TweetsPageResponse(BaseModel):
+    """Response schema for a page of an author's timeline."""
+
+    result: Literal[True] = Field(..., description="Always true if the user was found")
+    tweets: list[TweetResponse] = Field(..., description="Page of tweets, newest first")
+    next_cursor: int | None = Field(
+        None, description="Pass as `before` to fetch the next page; null at the end"
+    )
+
+
+class TweetsByIdResponse(BaseModel):
+    """Response schema for tweets fetched by ID."""
+
+    result: Literal[True] = Field(..., description="Request success flag")
+    tweets: dict[int, TweetResponse] = Field(
+        ..., description="Requested tweets by ID; deleted or unknown IDs are absent"
+    )
+
+
+class TweetGetResponse(BaseModel):
+    """Response schema for a single tweet."""
+
+    result: Literal[True] = Field(..., description="Always true if the tweet was found")
+    tweet: TweetResponse = Field(..., description="The requested tweet")
+
+
+class TweetLikesResponse(BaseModel):
+    """Response schema for a page of users who liked a tweet."""
+
+    result: Literal[True] = Field(..., description="Always true if the tweet was found")
+    likes: list[LikeResponse] = Field(..., description="Page of likers")
+    next_cursor: int | None = Field(
+        None, description="Pass as `after` to fetch the next page; null at the end"
+    )
+
+
 class TweetDelete(BaseModel):
     """Response schema when a tweet is deleted."""
 
@@ -105,3 +148,6 @@ class MediaUploadResponse(BaseModel):
         ..., description="Always true if media upload was successful"
     )
     media_id: int = Field(..., description="ID of the uploaded media file")
+    width: int = Field(..., description="Image width in pixels")
+    height: int = Field(..., description="Image height in pixels")
+    size_bytes: int = Field(..., description="Stored size, without EXIF data")
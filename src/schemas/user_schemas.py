@@ -12,6 +12,24 @@ class UserPreview(BaseModel):
     name: str = Field(..., description="Name of the user")
 
 
+class UsersByIdResponse(BaseModel):
+    """Response schema for users fetched by ID."""
+
+    result: Literal[True] = Field(..., description="Request success flag")
+    users: dict[int, UserPreview] = Field(
+        ..., description="Requested users by ID; unknown IDs are absent"
+    )
+
+
+class ProfileStats(BaseModel):
+    """Counters shown on a user's profile."""
+
+    tweets_count: int = Field(..., description="Live tweets posted by the user")
+    followers_count: int = Field(..., description="Users who follow the user")
+    following_count: int = Field(..., description="Users the user follows")
+    likes_count: int = Field(..., description="Likes given by the user")
+
+
 class UserProfile(BaseModel):
     """Full profile of a user including followers and following lists."""
 
@@ -23,6 +41,7 @@ class UserProfile(BaseModel):
     following: list[UserPreview] = Field(
         ..., description="List of users this user is following"
     )
+    stats: ProfileStats = Field(..., description="Profile counters")
 
 
 class UserProfileResponse(BaseModel):
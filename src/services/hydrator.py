@@ -0,0 +1,129 @@
+"""Multi-get hydration of tweets and users by ID."""
+
+import json
+
+from fastapi import Depends, HTTPException
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import config
+from src.database import get_async_db
+from src.models import Like, Media, Tweet, User
+from src.services.media_service import media_url
+
+
+def parse_ids(ids: str) -> list[int]:
+    """
+    Parse a comma-separated ID list, keeping the first occurrence of each.
+
+    Raises:
+        HTTPException: 400 if an ID is not an integer or there are too many.
+    """
+    try:
+        parsed = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="ids must be integers") from exc
+    if len(parsed) > config.HYDRATE_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config.HYDRATE_MAX_IDS} ids can be requested",
+        )
+    return parsed
+
+
+class Hydrator:
+    """
+    Load tweets and users by ID with a fixed number of queries.
+
+    Acts as an identity cache for one request: an object referenced many
+    times (an author of several tweets, a liker of several tweets) is
+    loaded once, and asking again for a loaded ID costs no query.
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        """Hydrate with ``db``, starting with empty caches."""
+        self.db = db
+        self.users: dict[int, dict] = {}
+        self.tweets: dict[int, dict | None] = {}
+        self.media: dict[int, str] = {}
+
+    async def get_users(self, ids: list[int]) -> dict[int, dict]:
+        """Return ``UserPreview`` data of the existing users among ``ids``."""
+        missing = [i for i in ids if i not in self.users]
+        if missing:
+            result = await self.db.execute(
+                select(User.id, User.name).where(User.id.in_(missing))
+            )
+            for user_id, name in result:
+                self.users[user_id] = {"id": user_id, "name": name}
+        return {i: self.users[i] for i in ids if i in self.users}
+
+    async def _get_media_urls(self, ids: set[int]) -> None:
+        missing = ids - self.media.keys()
+        if missing:
+            result = await self.db.execute(
+                select(Media.id, Media.filename).where(Media.id.in_(missing))
+            )
+            for media_id, filename in result:
+                self.media[media_id] = media_url(filename)
+
+    async def get_tweets(self, ids: list[int]) -> dict[int, dict]:
+        """
+        Return ``TweetResponse`` data of the live tweets among ``ids``.
+
+        Costs at most four queries (tweets, likes, users, media) however many
+        tweets are requested. A tweet whose author is missing is left out,
+        as in the feed.
+        """
+        missing = [i for i in ids if i not in self.tweets]
+        if missing:
+            rows = (
+                await self.db.execute(
+                    select(
+                        Tweet.id, Tweet.content, Tweet.media_ids, Tweet.author_id
+                    ).where(Tweet.id.in_(missing), Tweet.deleted_at.is_(None))
+                )
+            ).all()
+            likes_by_tweet: dict[int, list[int]] = {row.id: [] for row in rows}
+            if rows:
+                likes = await self.db.execute(
+                    select(Like.tweet_id, Like.user_id)
+                    .where(Like.tweet_id.in_(likes_by_tweet))
+                    .order_by(Like.id)
+                )
+                for tweet_id, user_id in likes:
+                    likes_by_tweet[tweet_id].append(user_id)
+
+            media_ids = {row.id: json.loads(row.media_ids or "[]") for row in rows}
+            await self._get_media_urls({m for ids_ in media_ids.values() for m in ids_})
+            user_ids = {row.author_id for row in rows if row.author_id is not None}
+            user_ids.update(u for likers in likes_by_tweet.values() for u in likers)
+            users = await self.get_users(sorted(user_ids))
+
+            for tweet_id in missing:
+                self.tweets[tweet_id] = None  # deleted, unknown or authorless
+            for row in rows:
+                if row.author_id not in users:
+                    continue
+                self.tweets[row.id] = {
+                    "id": row.id,
+                    "content": row.content,
+                    "attachments": [
+                        self.media[m]
+                        for m in sorted(media_ids[row.id])
+                        if m in self.media
+                    ],
+                    "author": users[row.author_id],
+                    "likes": [
+                        {"user_id": u, "name": users[u]["name"]}
+                        for u in likes_by_tweet[row.id]
+                        if u in users
+                    ],
+                }
+        return {i: self.tweets[i] for i in ids if self.tweets[i] is not None}
+
+
+def get_hydrator(db: AsyncSession = Depends(get_async_db)) -> Hydrator:
+    """Provide the request's hydrator (FastAPI caches it per request)."""
+    return Hydrator(db)
@@ -0,0 +1,160 @@
+"""Incremental JPEG validation that strips EXIF while the upload arrives.
+
+``JpegScanner`` walks the marker structure of a baseline or progressive
+JPEG as chunks arrive: SOI, marker segments, entropy-coded scans and EOI.
+It fails on the first byte that cannot belong to a JPEG, so a bad upload
+is rejected before the rest of it is read (see ``upload_media``). APP1
+segments (EXIF, XMP and the thumbnails embedded in them) are dropped from
+the output, and the image size is taken from the SOF segment. Only a
+segment header or one SOF segment is ever buffered, never the image.
+"""
+
+SOI = 0xD8
+EOI = 0xD9
+SOS = 0xDA
+APP1 = 0xE1
+# Start-of-frame markers; C4 (DHT), C8 (JPG) and CC (DAC) share the range
+SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Markers that carry no length and may only appear inside a scan
+STANDALONE = frozenset(range(0xD0, 0xD8)) | {0x01}
+
+# Parser states
+_START, _MARKER, _COPY, _SKIP, _SCAN, _DONE = range(6)
+
+
+class JpegError(ValueError):
+    """Raised when the data is not a well-formed JPEG."""
+
+
+class JpegScanner:
+    """
+    Validate a JPEG fed in chunks and return it without APP1 segments.
+
+    Feed every chunk to ``feed`` and write what it returns, then call
+    ``close``. Bytes after EOI are dropped. ``width``, ``height`` and
+    ``size`` (bytes returned) are set once the image is complete.
+    """
+
+    def __init__(self) -> None:
+        """Start before the first byte of the image."""
+        self.width: int | None = None
+        self.height: int | None = None
+        self.size = 0
+        self._buffer = bytearray()
+        self._state = _START
+        self._remaining = 0  # bytes left of the segment being copied/skipped
+        self._after_copy = _MARKER
+        self._scans = 0
+
+    def feed(self, chunk: bytes) -> bytes:
+        """Consume ``chunk`` and return the bytes to store."""
+        if self._state == _DONE:
+            return b""
+        self._buffer += chunk
+        out = bytearray()
+        pos = self._step(out)
+        del self._buffer[:pos]
+        self.size += len(out)
+        return bytes(out)
+
+    def close(self) -> None:
+        """Check that the data ended with a complete image."""
+        if self._state != _DONE:
+            raise JpegError("truncated image")
+
+    def _step(self, out: bytearray) -> int:
+        """Parse as much of the buffer as possible; return bytes consumed."""
+        buffer = self._buffer
+        end = len(buffer)
+        pos = 0
+        while pos < end:
+            state = self._state
+            if state == _START:
+                if end - pos < 2:
+                    break
+                if buffer[pos] != 0xFF or buffer[pos + 1] != SOI:
+                    raise JpegError("missing start of image")
+                out += buffer[pos : pos + 2]
+                pos += 2
+                self._state = _MARKER
+            elif state == _MARKER:
+                if buffer[pos] != 0xFF:
+                    raise JpegError(f"expected a marker at byte {self.size}")
+                if end - pos < 2:
+                    break
+                marker = buffer[pos + 1]
+                if marker == 0xFF:
+                    pos += 1  # fill byte
+                    continue
+                if marker == EOI:
+                    if self.width is None or not self._scans:
+                        raise JpegError("image has no frame or scan")
+                    out += buffer[pos : pos + 2]
+                    pos += 2
+                    self._state = _DONE
+                    break
+                if marker == SOI or marker == 0x00 or marker in STANDALONE:
+                    raise JpegError(f"unexpected marker 0x{marker:02X}")
+                if end - pos < 4:
+                    break
+                length = buffer[pos + 2] << 8 | buffer[pos + 3]
+                if length < 2:
+                    raise JpegError(f"bad length of segment 0x{marker:02X}")
+                if marker == APP1:
+                    pos += 4
+                    self._remaining = length - 2
+                    self._state = _SKIP
+                elif marker in SOF:
+                    if end - pos < 2 + length:
+                        break  # a frame header is at most 64 KiB
+                    self._read_frame(buffer[pos + 4 : pos + 2 + length])
+                    out += buffer[pos : pos + 2 + length]
+                    pos += 2 + length
+                else:
+                    if marker == SOS:
+                        if self.width is None:
+                            raise JpegError("scan before frame header")
+                        self._scans += 1
+                    out += buffer[pos : pos + 4]
+                    pos += 4
+                    self._remaining = length - 2
+                    self._after_copy = _SCAN if marker == SOS else _MARKER
+                    self._state = _COPY
+            elif state in (_COPY, _SKIP):
+                taken = min(self._remaining, end - pos)
+                if state == _COPY:
+                    out += buffer[pos : pos + taken]
+                pos += taken
+                self._remaining -= taken
+                if not self._remaining:
+                    self._state = self._after_copy if state == _COPY else _MARKER
+            else:  # _SCAN: entropy-coded data up to the next real marker
+                found = buffer.find(b"\xff", pos)
+                if found == -1:
+                    out += buffer[pos:end]
+                    pos = end
+                    break
+                out += buffer[pos:found]
+                pos = found
+                if end - pos < 2:
+                    break
+                following = buffer[pos + 1]
+                if following == 0x00 or 0xD0 <= following <= 0xD7:
+                    # Stuffed 0xFF byte or restart marker
+                    out += buffer[pos : pos + 2]
+                    pos += 2
+                else:
+                    self._state = _MARKER
+        return pos
+
+    def _read_frame(self, header: bytearray) -> None:
+        """Take the image size from a SOF segment's payload."""
+        if len(header) < 6:
+            raise JpegError("short frame header")
+        if self.width is not None:
+            raise JpegError("more than one frame header")
+        height = header[1] << 8 | header[2]
+        width = header[3] << 8 | header[4]
+        if not width or not height:
+            raise JpegError("image has no size")
+        self.width, self.height = width, height
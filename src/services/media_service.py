@@ -0,0 +1,67 @@
+"""Public URLs of uploaded media, optionally signed and expiring."""
+
+import hashlib
+import hmac
+import time
+from urllib.parse import urlencode
+
+from src import config
+
+
+def sign(filename: str, expires: int) -> str:
+    """Return the hex HMAC-SHA256 signature of ``filename`` until ``expires``."""
+    message = f"{filename}:{expires}".encode()
+    return hmac.new(
+        config.MEDIA_URL_SECRET.encode(), message, hashlib.sha256
+    ).hexdigest()
+
+
+def media_url(filename: str, now: float | None = None) -> str:
+    """
+    Build the public URL of an uploaded media file.
+
+    With ``MEDIA_URL_SECRET`` set, the URL carries ``expires`` and
+    ``signature`` query parameters. The expiry is rounded up to the next
+    ``MEDIA_URL_TTL`` window, so every URL issued within one window is
+    identical and stays valid for at least ``MEDIA_URL_TTL`` seconds.
+
+    Args:
+        filename: Stored file name.
+        now: Current UNIX time (defaults to the system clock).
+
+    Returns:
+        Absolute URL of the file.
+    """
+    url = f"{config.MEDIA_BASE_URL}{filename}"
+    if config.MEDIA_URL_SECRET is None:
+        return url
+    now = time.time() if now is None else now
+    ttl = config.MEDIA_URL_TTL
+    expires = (int(now) // ttl + 2) * ttl
+    query = urlencode({"expires": expires, "signature": sign(filename, expires)})
+    return f"{url}?{query}"
+
+
+def verify(
+    filename: str, expires: int | None, signature: str | None, now: float | None = None
+) -> bool:
+    """
+    Check a signed media URL.
+
+    Args:
+        filename: Requested file name.
+        expires: ``expires`` query parameter.
+        signature: ``signature`` query parameter.
+        now: Current UNIX time (defaults to the system clock).
+
+    Returns:
+        True when URLs are not signed, or the signature is valid and unexpired.
+    """
+    if config.MEDIA_URL_SECRET is None:
+        return True
+    if expires is None or signature is None:
+        return False
+    now = time.time() if now is None else now
+    if expires < now:
+        return False
+    return hmac.compare_digest(sign(filename, expires), signature)
@@ -0,0 +1,30 @@
+"""Parsing of the ``fields=`` projection parameter."""
+
+from fastapi import HTTPException
+
+TWEET_FIELDS = frozenset(
+    {"id", "content", "attachments", "author", "likes", "like_count", "liked_by_me"}
+)
+PROFILE_FIELDS = frozenset({"id", "name", "followers", "following", "stats"})
+
+
+def parse_fields(fields: str | None, allowed: frozenset[str]) -> frozenset[str] | None:
+    """
+    Parse a comma-separated field list.
+
+    Args:
+        fields: Raw ``fields`` query parameter, e.g. ``"id,content"``.
+        allowed: Field names the endpoint can project.
+
+    Returns:
+        The selected field names, or None when every field is requested.
+    """
+    if fields is None:
+        return None
+    selected = frozenset(name.strip() for name in fields.split(",") if name.strip())
+    unknown = selected - allowed
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return selected
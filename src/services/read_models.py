@@ -0,0 +1,199 @@
+"""Read models for the hot read paths: Core queries into slotted rows.
+
+``GET /api/tweets``, ``GET /api/users/me`` and ``GET /api/users/{id}``
+only read a few columns of each user, tweet and like. Loading ORM entities
+for that pays for identity-map bookkeeping, instance state, attribute
+instrumentation and backref collections on every row. These loaders
+select the columns they need with Core queries (one per table, never one
+per row) and keep them in ``__slots__`` objects, which are also several
+times smaller than an entity. The rows are read-only snapshots and are
+not attached to the session.
+"""
+
+import json
+from datetime import datetime
+
+from sqlalchemy import ColumnElement, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Like, Media, Tweet, User, UserStats, followers_table
+from src.services.media_service import media_url
+from src.services.user_stats import COUNTERS
+
+
+class UserRef:
+    """A user's ID and name."""
+
+    __slots__ = ("id", "name")
+
+    def __init__(self, id: int, name: str) -> None:
+        """Set the user's ID and name."""
+        self.id = id
+        self.name = name
+
+
+class FeedTweet:
+    """A live tweet of the feed with what the page shows of it."""
+
+    __slots__ = (
+        "id",
+        "content",
+        "author_id",
+        "author_name",
+        "attachments",
+        "likes",
+    )
+
+    def __init__(
+        self, id: int, content: str, author_id: int, author_name: str | None
+    ) -> None:
+        """Set the tweet's columns; attachments and likes start empty."""
+        self.id = id
+        self.content = content
+        self.author_id = author_id
+        self.author_name = author_name
+        self.attachments: list[str] = []
+        self.likes: list[UserRef] = []  # oldest like first
+
+
+class Profile:
+    """A user profile; lists and counters are None when not loaded."""
+
+    __slots__ = ("id", "name", "followers", "following", "stats")
+
+    def __init__(self, id: int, name: str) -> None:
+        """Set the user's ID and name; nothing else is loaded."""
+        self.id = id
+        self.name = name
+        self.followers: list[UserRef] | None = None
+        self.following: list[UserRef] | None = None
+        self.stats: dict[str, int] | None = None
+
+
+async def load_feed(
+    db: AsyncSession,
+    since: datetime | None = None,
+    author: bool = True,
+    attachments: bool = True,
+    likes: bool = True,
+) -> list[FeedTweet]:
+    """
+    Load the live tweets of the feed, oldest first.
+
+    Costs at most four queries: tweets (joined with their authors), media
+    and likes (joined with the likers).
+
+    Args:
+        db: Async database session.
+        since: Only read tweets and likes created from then on.
+        author: Load the authors' names.
+        attachments: Load the attachment URLs.
+        likes: Load the likers.
+    """
+    columns = [Tweet.id, Tweet.content, Tweet.author_id, Tweet.media_ids]
+    query = select(*columns).where(Tweet.deleted_at.is_(None))
+    if author:
+        query = query.add_columns(User.name).join(User, User.id == Tweet.author_id)
+    if since is not None:
+        query = query.where(Tweet.created_at >= since)
+    # Walks ix_tweets_live_created_at_id, like the JSON read path
+    rows = (await db.execute(query.order_by(Tweet.created_at, Tweet.id))).all()
+
+    tweets: dict[int, FeedTweet] = {}
+    media_ids: dict[int, list[int]] = {}
+    for row in rows:
+        name = row[4] if author else None
+        tweets[row[0]] = FeedTweet(row[0], row[1], row[2], name)
+        if attachments and row[3] and row[3] != "[]":
+            media_ids[row[0]] = json.loads(row[3])
+
+    if media_ids:
+        wanted = {m for ids in media_ids.values() for m in ids}
+        urls = {
+            media_id: media_url(filename)
+            for media_id, filename in await db.execute(
+                select(Media.id, Media.filename).where(Media.id.in_(wanted))
+            )
+        }
+        for tweet_id, ids in media_ids.items():
+            tweets[tweet_id].attachments = [
+                urls[media_id] for media_id in sorted(ids) if media_id in urls
+            ]
+
+    if likes and tweets:
+        query = (
+            select(Like.tweet_id, User.id, User.name)
+            .join(User, User.id == Like.user_id)
+            .where(Like.tweet_id.in_(tweets))
+            .order_by(Like.id)
+        )
+        if since is not None:
+            # A like is never older than its tweet; prunes old partitions
+            query = query.where(Like.created_at >= since)
+        for tweet_id, user_id, name in await db.execute(query):
+            tweets[tweet_id].likes.append(UserRef(user_id, name))
+
+    return list(tweets.values())
+
+
+async def _user_refs(
+    db: AsyncSession, joined: ColumnElement[int], condition: ColumnElement[bool]
+) -> list[UserRef]:
+    """Return the users whose ID is ``joined`` in follow rows matching."""
+    result = await db.execute(
+        select(User.id, User.name)
+        .join(followers_table, joined == User.id)
+        .where(condition)
+        .order_by(User.id)
+    )
+    return [UserRef(user_id, name) for user_id, name in result]
+
+
+async def load_profile(
+    db: AsyncSession,
+    condition: ColumnElement[bool],
+    selected: frozenset[str] | None = None,
+) -> Profile | None:
+    """
+    Load the profile of the user matching ``condition``.
+
+    One query for the user and counters, and one per follower list that is
+    selected.
+
+    Args:
+        db: Async database session.
+        condition: Filter on ``User``, e.g. ``User.id == 5``.
+        selected: Profile fields to load (all if None).
+    """
+
+    def wanted(name: str) -> bool:
+        return selected is None or name in selected
+
+    query = select(User.id, User.name).where(condition)
+    if wanted("stats"):
+        counters = [getattr(UserStats, name) for name in COUNTERS]
+        query = query.add_columns(*counters).outerjoin(
+            UserStats, UserStats.user_id == User.id
+        )
+    row = (await db.execute(query)).first()
+    if row is None:
+        return None
+
+    profile = Profile(row[0], row[1])
+    if wanted("stats"):
+        profile.stats = {
+            name: value or 0 for name, value in zip(COUNTERS, row[2:], strict=True)
+        }
+    if wanted("followers"):
+        profile.followers = await _user_refs(
+            db,
+            followers_table.c.follower_id,
+            followers_table.c.followee_id == profile.id,
+        )
+    if wanted("following"):
+        profile.following = await _user_refs(
+            db,
+            followers_table.c.followee_id,
+            followers_table.c.follower_id == profile.id,
+        )
+    return profile
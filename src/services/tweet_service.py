@@ -0,0 +1,307 @@
+"""Tweet read services."""
+
+import json
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import DateTime, bindparam, func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, selectinload
+
+from src import config
+from src.liked_cache import liked_cache
+from src.models import Like, Media, Tweet, User
+from src.partitions import find_archived_tweet
+from src.services.media_service import media_url
+
+# One statement per dialect that returns the whole feed as a JSON array
+# shaped like TweetResponse (same key order as the Pydantic model), oldest
+# first like load_feed in src/services/read_models.py.
+# The filters skip tombstones and bound the feed by age so that PostgreSQL
+# can prune partitions.
+_FEED_JSON_SQL = {
+    "postgresql": """
+        SELECT CAST(coalesce(json_agg(json_build_object(
+            'id', t.id,
+            'content', t.content,
+            'attachments', coalesce((
+                SELECT json_agg(CAST(:media_prefix AS TEXT) || m.filename
+                                ORDER BY m.id)
+                FROM medias m
+                WHERE m.id IN (
+                    SELECT CAST(value AS INTEGER)
+                    FROM json_array_elements_text(
+                        CAST(coalesce(t.media_ids, '[]') AS JSON)
+                    )
+                )
+            ), CAST('[]' AS JSON)),
+            'author', json_build_object('id', u.id, 'name', u.name),
+            'likes', coalesce((
+                SELECT json_agg(json_build_object('user_id', lu.id, 'name', lu.name)
+                                ORDER BY l.id)
+                FROM likes l
+                JOIN users lu ON lu.id = l.user_id
+                WHERE l.tweet_id = t.id {like_filter}
+            ), CAST('[]' AS JSON))
+        ) ORDER BY t.created_at, t.id), CAST('[]' AS JSON)) AS TEXT)
+        FROM tweets t
+        JOIN users u ON u.id = t.author_id
+        {tweet_filter}
+        """,
+    "sqlite": """
+        SELECT json_group_array(json(doc)) FROM (
+            SELECT json_object(
+                'id', t.id,
+                'content', t.content,
+                'attachments', json((
+                    SELECT json_group_array(url) FROM (
+                        SELECT :media_prefix || m.filename AS url
+                        FROM medias m
+                        WHERE m.id IN (
+                            SELECT value FROM json_each(coalesce(t.media_ids, '[]'))
+                        )
+                        ORDER BY m.id
+                    )
+                )),
+                'author', json_object('id', u.id, 'name', u.name),
+                'likes', json((
+                    SELECT json_group_array(json(liker)) FROM (
+                        SELECT json_object('user_id', lu.id, 'name', lu.name) AS liker
+                        FROM likes l
+                        JOIN users lu ON lu.id = l.user_id
+                        WHERE l.tweet_id = t.id {like_filter}
+                        ORDER BY l.id
+                    )
+                ))
+            ) AS doc
+            FROM tweets t
+            JOIN users u ON u.id = t.author_id
+            {tweet_filter}
+            ORDER BY t.created_at, t.id
+        )
+        """,
+}
+
+
+def feed_since() -> datetime | None:
+    """Return the oldest creation time read by the feed, if it is bounded."""
+    if config.FEED_MAX_AGE_DAYS is None:
+        return None
+    return datetime.now(UTC) - timedelta(days=config.FEED_MAX_AGE_DAYS)
+
+
+async def fetch_tweets_json(db: AsyncSession) -> bytes:
+    """
+    Build the GET /api/tweets payload inside the database.
+
+    The page is aggregated by a single SQL statement, so no ORM entities are
+    hydrated and the JSON text is passed through to the client as-is.
+
+    Args:
+        db: Async database session.
+
+    Returns:
+        Encoded JSON body matching TweetsGetResponse.
+    """
+    dialect = db.get_bind().dialect.name
+    sql = _FEED_JSON_SQL.get(dialect)
+    if sql is None:
+        raise NotImplementedError(f"JSON read path is not supported on {dialect}")
+
+    params = {"media_prefix": config.MEDIA_BASE_URL}
+    live = "WHERE t.deleted_at IS NULL"
+    since = feed_since()
+    if since is None:
+        statement = text(sql.format(tweet_filter=live, like_filter=""))
+    else:
+        statement = text(
+            sql.format(
+                tweet_filter=f"{live} AND t.created_at >= :since",
+                like_filter="AND l.created_at >= :since",
+            )
+        ).bindparams(bindparam("since", type_=DateTime(timezone=True)))
+        params["since"] = since
+
+    result = await db.execute(statement, params)
+    tweets_json = result.scalar_one() or "[]"
+    return b'{"result":true,"tweets":' + tweets_json.encode() + b"}"
+
+
+async def get_tweet_by_id(db: AsyncSession, tweet_id: int) -> dict | None:
+    """
+    Load one tweet shaped like TweetResponse.
+
+    Live tweets are read from ``tweets``; tweets whose month has been
+    archived are found through the archive manifest (a slower file scan).
+
+    Args:
+        db: Async database session.
+        tweet_id: Tweet ID.
+
+    Returns:
+        Tweet data, or None if the tweet is deleted or exists neither live
+        nor archived.
+    """
+    result = await db.execute(
+        select(Tweet)
+        .options(
+            selectinload(Tweet.user),
+            selectinload(Tweet.likes).selectinload(Like.user),
+        )
+        .where(Tweet.id == tweet_id)
+    )
+    tweet = result.scalars().first()
+    if tweet is not None and tweet.deleted_at is not None:
+        return None
+    if tweet is not None:
+        row = {
+            "id": tweet.id,
+            "content": tweet.content,
+            "media_ids": tweet.media_ids,
+            "author_id": tweet.author_id,
+        }
+        author = tweet.user
+        likes = [(like.user.id, like.user.name) for like in tweet.likes]
+    else:
+        row = await find_archived_tweet(db, tweet_id)
+        if row is None or row.get("deleted_at") is not None:
+            return None
+        author = await db.get(User, row["author_id"])
+        likes_res = await db.execute(
+            select(User.id, User.name)
+            .join(Like, Like.user_id == User.id)
+            .where(Like.tweet_id == tweet_id)
+            .order_by(Like.id)
+        )
+        likes = likes_res.all()
+
+    media_res = await db.execute(
+        select(Media.filename)
+        .where(Media.id.in_(json.loads(row["media_ids"] or "[]")))
+        .order_by(Media.id)
+    )
+    return {
+        "id": row["id"],
+        "content": row["content"],
+        "author": {"id": author.id, "name": author.name},
+        "attachments": [media_url(filename) for filename in media_res.scalars()],
+        "likes": [{"user_id": user_id, "name": name} for user_id, name in likes],
+    }
+
+
+async def summarize_likes(
+    db: AsyncSession,
+    tweet_ids: list[int],
+    viewer_id: int | None = None,
+    preview: int = 3,
+) -> dict[int, dict]:
+    """
+    Summarize likes of many tweets without loading every liker.
+
+    Args:
+        db: Async database session.
+        tweet_ids: Tweets on the page.
+        viewer_id: User whose own likes are flagged, if known.
+        preview: Number of first likers returned per tweet.
+
+    Returns:
+        Mapping of tweet ID to ``like_count``, ``liked_by_me`` and ``likes``.
+    """
+    summaries = {
+        tweet_id: {"like_count": 0, "liked_by_me": False, "likes": []}
+        for tweet_id in tweet_ids
+    }
+    if not tweet_ids:
+        return summaries
+
+    counts = await db.execute(
+        select(Like.tweet_id, func.count())
+        .where(Like.tweet_id.in_(tweet_ids))
+        .group_by(Like.tweet_id)
+    )
+    for tweet_id, count in counts:
+        summaries[tweet_id]["like_count"] = count
+
+    ranked = (
+        select(
+            Like.tweet_id,
+            Like.user_id,
+            func.row_number()
+            .over(partition_by=Like.tweet_id, order_by=Like.id)
+            .label("position"),
+        )
+        .where(Like.tweet_id.in_(tweet_ids))
+        .subquery()
+    )
+    first_likers = await db.execute(
+        select(ranked.c.tweet_id, User.id, User.name)
+        .join(User, User.id == ranked.c.user_id)
+        .where(ranked.c.position <= preview)
+        .order_by(ranked.c.tweet_id, ranked.c.position)
+    )
+    for tweet_id, user_id, name in first_likers:
+        summaries[tweet_id]["likes"].append({"user_id": user_id, "name": name})
+
+    if viewer_id is not None:
+        for tweet_id in await liked_cache.liked_among(db, viewer_id, tweet_ids):
+            summaries[tweet_id]["liked_by_me"] = True
+
+    return summaries
+
+
+async def list_likers(
+    db: AsyncSession, tweet_id: int, after: int | None, limit: int
+) -> tuple[list[dict], int | None]:
+    """
+    Page through the users who liked a tweet, oldest like first.
+
+    Uses keyset pagination on ``likes.id`` so every page costs the same.
+
+    Returns:
+        The page of likers and the cursor of the next page (None at the end).
+    """
+    query = (
+        select(Like.id, User.id, User.name)
+        .join(User, User.id == Like.user_id)
+        .where(Like.tweet_id == tweet_id)
+        .order_by(Like.id)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        query = query.where(Like.id > after)
+    rows = (await db.execute(query)).all()
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    likers = [{"user_id": user_id, "name": name} for _, user_id, name in rows[:limit]]
+    return likers, next_cursor
+
+
+async def list_author_tweet_ids(
+    db: AsyncSession, author_id: int, before: int | None, limit: int
+) -> tuple[list[int], int | None]:
+    """
+    Page through an author's live tweets, newest first.
+
+    Uses keyset pagination on ``(created_at, id)``, which the partial index
+    ``ix_tweets_live_author_id_created_at_id`` serves in order without
+    reading the table, so every page costs the same however many tweets
+    the author has.
+
+    Returns:
+        The page of tweet IDs and the cursor of the next page (None at the end).
+    """
+    query = (
+        select(Tweet.id)
+        .where(Tweet.author_id == author_id, Tweet.deleted_at.is_(None))
+        .order_by(Tweet.created_at.desc(), Tweet.id.desc())
+        .limit(limit + 1)
+    )
+    if before is not None:
+        cursor = aliased(Tweet)
+        cursor_created_at = (
+            select(cursor.created_at).where(cursor.id == before).scalar_subquery()
+        )
+        query = query.where(
+            tuple_(Tweet.created_at, Tweet.id) < tuple_(cursor_created_at, before)
+        )
+    tweet_ids = list((await db.execute(query)).scalars())
+    next_cursor = tweet_ids[limit - 1] if len(tweet_ids) > limit else None
+    return tweet_ids[:limit], next_cursor
@@ -0,0 +1,153 @@
+"""Maintained profile counters (tweets, followers, following, likes).
+
+Every path that adds or removes a counted row adjusts ``user_stats`` in the
+same transaction with an upsert of deltas, so a profile reads its counts
+from one row instead of counting. The periodic ``user_stats.reconcile``
+job recounts users in batches and repairs any drift (rows written outside
+the API, a counter that went missing).
+"""
+
+import logging
+from collections.abc import Mapping
+
+from sqlalchemy import Executable, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import config
+from src.jobs import enqueue, ensure_scheduled, job_handler, periodic_job
+from src.models import Like, Tweet, User, UserStats, followers_table
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("tweets_count", "followers_count", "following_count", "likes_count")
+
+_INSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _upsert(db: AsyncSession, rows: list[dict], increment: bool) -> Executable:
+    insert = _INSERT[db.get_bind().dialect.name](UserStats).values(rows)
+    return insert.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={
+            name: (getattr(UserStats, name) + insert.excluded[name])
+            if increment
+            else insert.excluded[name]
+            for name in COUNTERS
+        },
+    )
+
+
+async def bump_stats(db: AsyncSession, deltas: Mapping[int, Mapping[str, int]]) -> None:
+    """
+    Add deltas to the counters of some users in the current transaction.
+
+    Args:
+        db: Session of the transaction that changes the counted rows.
+        deltas: ``{user_id: {counter: delta}}``; a user without a row gets one.
+    """
+    rows = [
+        {"user_id": user_id, **{name: changes.get(name, 0) for name in COUNTERS}}
+        for user_id, changes in sorted(deltas.items())  # stable lock order
+        if any(changes.values())
+    ]
+    if rows:
+        await db.execute(_upsert(db, rows, increment=True))
+
+
+def stats_response(stats: UserStats | None) -> dict:
+    """Serialize counters as ``ProfileStats``; a user without a row has zeros."""
+    return {name: getattr(stats, name) if stats else 0 for name in COUNTERS}
+
+
+async def count_stats(db: AsyncSession, user_ids: list[int]) -> dict[int, dict]:
+    """Count the rows behind the counters of ``user_ids``."""
+    counts = {user_id: dict.fromkeys(COUNTERS, 0) for user_id in user_ids}
+    queries = {
+        "tweets_count": select(Tweet.author_id, func.count())
+        .where(Tweet.author_id.in_(user_ids), Tweet.deleted_at.is_(None))
+        .group_by(Tweet.author_id),
+        "followers_count": select(followers_table.c.followee_id, func.count())
+        .where(followers_table.c.followee_id.in_(user_ids))
+        .group_by(followers_table.c.followee_id),
+        "following_count": select(followers_table.c.follower_id, func.count())
+        .where(followers_table.c.follower_id.in_(user_ids))
+        .group_by(followers_table.c.follower_id),
+        "likes_count": select(Like.user_id, func.count())
+        .where(Like.user_id.in_(user_ids))
+        .group_by(Like.user_id),
+    }
+    for name, query in queries.items():
+        for user_id, count in await db.execute(query):
+            counts[user_id][name] = count
+    return counts
+
+
+async def reconcile_stats(db: AsyncSession, after_id: int, limit: int) -> int | None:
+    """
+    Recount one batch of users and overwrite the counters that drifted.
+
+    The existing counter rows are locked first, so a concurrent write either
+    commits before the recount (and is counted) or adds its delta after it.
+
+    Args:
+        db: Session on the primary database.
+        after_id: Only users with a greater ID are checked.
+        limit: Number of users checked.
+
+    Returns:
+        ID of the last user checked, or None if there was none.
+    """
+    user_ids = list(
+        (
+            await db.execute(
+                select(User.id).where(User.id > after_id).order_by(User.id).limit(limit)
+            )
+        ).scalars()
+    )
+    if not user_ids:
+        return None
+
+    stored = await db.execute(
+        select(UserStats).where(UserStats.user_id.in_(user_ids)).with_for_update()
+    )
+    current = {stats.user_id: stats_response(stats) for stats in stored.scalars()}
+    actual = await count_stats(db, user_ids)
+    rows = [
+        {"user_id": user_id, **counts}
+        for user_id, counts in actual.items()
+        if current.get(user_id) != counts
+    ]
+    if rows:
+        logger.info("Repairing the counters of %s users", len(rows))
+        await db.execute(_upsert(db, rows, increment=False))
+    await db.commit()
+    return user_ids[-1]
+
+
+@periodic_job("user_stats.reconcile", lambda: config.USER_STATS_RECONCILE_INTERVAL)
+async def schedule_reconcile(db: AsyncSession, delay: float = 0.0) -> None:
+    """Start a reconciliation pass unless one is already pending."""
+    if config.USER_STATS_RECONCILE_INTERVAL > 0:
+        await ensure_scheduled(db, "user_stats.reconcile", delay, {"after_id": 0})
+
+
+@job_handler("user_stats.reconcile")
+async def reconcile_batch(db: AsyncSession, payload: dict) -> None:
+    """
+    Repair one batch of counters and enqueue the next batch.
+
+    After the last batch the next pass is scheduled in
+    ``USER_STATS_RECONCILE_INTERVAL`` seconds.
+
+    Args:
+        db: Async database session.
+        payload: ``after_id`` of the batch.
+    """
+    batch_size = config.USER_STATS_RECONCILE_BATCH
+    last_id = await reconcile_stats(db, payload["after_id"], batch_size)
+    if last_id is None:
+        await schedule_reconcile(db, delay=config.USER_STATS_RECONCILE_INTERVAL)
+    else:
+        enqueue(db, "user_stats.reconcile", {"after_id": last_id})
+        await db.commit()
@@ -0,0 +1,71 @@
+"""Multi-process serving: per-worker state of a gunicorn deployment.
+
+``gunicorn.conf.py`` runs ``WEB_CONCURRENCY`` uvicorn workers, optionally
+importing the app once in the master before forking (``GUNICORN_PRELOAD``).
+Each worker gets a slot number, 0 to ``WEB_CONCURRENCY - 1``, reused by the
+worker that replaces it after a crash or restart.
+
+Per-worker state:
+
+- Engines drop the pool objects inherited from the master; each worker
+  opens its own connections, its share of ``DB_CONNECTION_BUDGET``
+- The write-behind like log gets a per-slot file, so a replacement worker
+  replays the log its predecessor left behind
+- Rate limit buckets and event streams stay in one worker by default; the
+  master logs which settings should change (``shared_state_warnings``)
+
+Read-your-writes routing needs no setting: the time of a client's last
+write travels in its ``last_write`` cookie, so every worker sees it (see
+src/replicas.py). Each worker schedules the periodic jobs on startup;
+``jobs.ensure_scheduled`` locks, so only one of each is pending.
+"""
+
+import logging
+
+from . import config
+from .database import async_engine, replica_engines
+from .likes_buffer import like_buffer
+
+logger = logging.getLogger(__name__)
+
+
+def worker_log_path(log_path: str, slot: int) -> str:
+    """Return the like log of a worker slot (slot 0 keeps the plain path)."""
+    return log_path if slot == 0 else f"{log_path}.{slot}"
+
+
+def after_fork(slot: int) -> None:
+    """
+    Reset state inherited from the master in a newly forked worker.
+
+    Args:
+        slot: Worker slot assigned by ``gunicorn.conf.py``.
+    """
+    for engine in (async_engine, *replica_engines):
+        # Connections opened before the fork belong to the master
+        engine.sync_engine.dispose(close=False)
+    like_buffer.use_log(worker_log_path(config.LIKES_LOG_PATH, slot))
+
+
+def shared_state_warnings(workers: int) -> list[str]:
+    """List settings that keep state per worker although several run."""
+    if workers <= 1:
+        return []
+    warnings = []
+    if config.RATE_LIMIT_ENABLED and config.RATE_LIMIT_BACKEND == "memory":
+        warnings.append(
+            "RATE_LIMIT_BACKEND=memory: each worker allows the full rate; "
+            "use sqlite:///path to share buckets between workers"
+        )
+    if config.EVENTS_BACKEND == "memory":
+        warnings.append(
+            "EVENTS_BACKEND=memory: event streams only see writes served by "
+            "the same worker; use postgres"
+        )
+    return warnings
+
+
+def log_shared_state(workers: int) -> None:
+    """Log ``shared_state_warnings`` (called once, by the gunicorn master)."""
+    for warning in shared_state_warnings(workers):
+        logger.warning("%s workers with %s", workers, warning)
@@ -0,0 +1,108 @@
+"""Single-node SQLite mode: tuned pragmas, one writer and a read pool.
+
+Used when ``DATABASE_URL`` points at an SQLite file. SQLite allows one
+writer at a time, so instead of letting concurrent transactions race for
+the lock (and fail with ``database is locked``):
+
+- writes go through an engine with a single pooled connection, so they
+  queue in the pool, and every write transaction starts with
+  ``BEGIN IMMEDIATE`` so it takes the write lock before reading
+- reads use a separate pool; in WAL mode they never block the writer and
+  always see the last committed write
+- ``busy_timeout`` covers the other processes writing to the same file
+"""
+
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.engine.interfaces import DBAPIConnection
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import ConnectionPoolEntry
+
+# Read connections per process
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "4"))
+# Bytes of the database file mapped into memory
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Milliseconds a connection waits for a lock held by another process
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Page cache per connection, in KiB
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+
+
+def is_sqlite_file(database_url: str) -> bool:
+    """Check whether the URL names an SQLite database file."""
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def pragmas() -> dict[str, str | int]:
+    """Return the pragmas applied to every connection."""
+    return {
+        "journal_mode": "WAL",
+        # Durable at checkpoints; a power loss can only drop the last commits
+        "synchronous": "NORMAL",
+        "mmap_size": SQLITE_MMAP_SIZE,
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        "cache_size": -SQLITE_CACHE_SIZE_KB,  # negative: KiB, not pages
+        "temp_store": "MEMORY",
+    }
+
+
+def configure(engine: AsyncEngine, begin: str = "BEGIN") -> AsyncEngine:
+    """
+    Apply the pragmas on connect and start transactions with ``begin``.
+
+    Args:
+        engine: Engine on an SQLite file.
+        begin: ``BEGIN`` for readers, ``BEGIN IMMEDIATE`` for the writer.
+
+    Returns:
+        The same engine.
+    """
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def on_connect(
+        dbapi_connection: DBAPIConnection, connection_record: ConnectionPoolEntry
+    ) -> None:
+        # Let SQLAlchemy emit BEGIN itself instead of the driver
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def on_begin(conn: Connection) -> None:
+        conn.exec_driver_sql(begin)
+
+    return engine
+
+
+def create_engines(
+    database_url: str, read_pool_size: int | None = None, **kwargs: object
+) -> tuple[AsyncEngine, AsyncEngine]:
+    """
+    Create the writer and reader engines of an SQLite file.
+
+    Args:
+        database_url: ``sqlite+aiosqlite:///path`` URL.
+        read_pool_size: Reader connections (defaults to
+            ``SQLITE_READ_POOL_SIZE``).
+        kwargs: Extra ``create_async_engine`` arguments, e.g. ``echo``.
+
+    Returns:
+        ``(writer, reader)`` engines.
+    """
+    writer = create_async_engine(database_url, pool_size=1, max_overflow=0, **kwargs)
+    reader = create_async_engine(
+        database_url,
+        pool_size=read_pool_size or SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+        **kwargs,
+    )
+    return configure(writer, "BEGIN IMMEDIATE"), configure(reader)
@@ -6,7 +6,9 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
+from src import ratelimit
 from src.database import Base
+from src.liked_cache import liked_cache
 from src.models import Like, Media, Tweet, User
 
 DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -112,13 +114,17 @@ async def test_tweet_with_likes(async_session, test_user):
 
 
 @pytest_asyncio.fixture(autouse=True, scope="function")
-async def recreate_db(async_engine: AsyncEngine):
+async def recreate_db(async_engine: AsyncEngine, monkeypatch):
     # Удаляем все таблицы
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
     # Создаем таблицы заново
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # Кэш лайков процесса не должен переживать пересоздание базы
+    liked_cache.clear()
+    # Лимитер проверяет API-ключи в тестовой базе, а не по DATABASE_URL
+    monkeypatch.setattr(ratelimit, "async_session", TestSessionLocal)
 
     yield
     # Можно ничего не делать после теста, база уже чиста для следующего
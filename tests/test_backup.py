@@ -0,0 +1,176 @@
+import asyncio
+import gzip
+import json
+import os
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src import backup
+from src.backup import BackupError, export_to_file, import_file
+from src.database import Base, get_async_db
+from src.main import app
+from src.models import (
+    Like,
+    Media,
+    Tweet,
+    User,
+    UserStats,
+    followers_table,
+    tweet_media_table,
+)
+
+
+async def seed(session, test_user):
+    other = User(name="other", api_key="other")
+    session.add(other)
+    await session.commit()
+    await session.execute(
+        followers_table.insert(),
+        [
+            {"follower_id": test_user.id, "followee_id": other.id},
+            {"follower_id": other.id, "followee_id": test_user.id},
+        ],
+    )
+    session.add(Media(filename="a.jpg", user_id=test_user.id))
+    mine = Tweet(content="мой твит", media_ids="[1]", author_id=test_user.id)
+    theirs = Tweet(content="their tweet", author_id=other.id)
+    session.add_all([mine, theirs])
+    await session.commit()
+    session.add_all(
+        [
+            Like(user_id=other.id, tweet_id=mine.id),
+            Like(user_id=test_user.id, tweet_id=theirs.id),
+        ]
+    )
+    await session.commit()
+    return other
+
+
+async def empty_engine(tmp_path, name):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+async def migrated_engine(tmp_path, name):
+    config = Config(os.path.join(os.path.dirname(__file__), "..", "alembic.ini"))
+    url = f"sqlite+aiosqlite:///{tmp_path / name}"
+    config.set_main_option("sqlalchemy.url", url)
+    # Alembic's env.py starts its own event loop
+    await asyncio.to_thread(command.upgrade, config, "head")
+    return create_async_engine(url)
+
+
+async def count(engine, table):
+    async with engine.connect() as conn:
+        return (await conn.execute(select(func.count()).select_from(table))).scalar()
+
+
+@pytest.mark.asyncio
+async def test_full_export_roundtrip(
+    async_engine, async_session, test_user, tmp_path, monkeypatch
+):
+    await seed(async_session, test_user)
+    # Маленькие пакеты, чтобы проверить разбиение на части
+    monkeypatch.setattr(backup, "BATCH", 2)
+
+    path = str(tmp_path / "all.ndjson.gz")
+    await export_to_file(async_engine, path)
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        tables = [json.loads(line)["table"] for line in handle]
+    assert (
+        tables
+        == ["users"] * 2
+        + ["medias"]
+        + ["tweets"] * 2
+        + ["likes"] * 2
+        + ["followers"] * 2
+    )
+
+    target = await empty_engine(tmp_path, "restored.db")
+    counts = await import_file(target, path)
+    assert counts == {"users": 2, "medias": 1, "tweets": 2, "likes": 2, "followers": 2}
+    for table in (User, Media, Tweet, Like, followers_table):
+        assert await count(target, table) == await count(async_engine, table)
+    async with target.connect() as conn:
+        content = await conn.execute(select(Tweet.content).order_by(Tweet.id))
+        stats = await conn.execute(
+            select(UserStats.tweets_count, UserStats.likes_count).where(
+                UserStats.user_id == test_user.id
+            )
+        )
+        assert content.scalars().first() == "мой твит"
+        assert stats.one() == (1, 1)
+
+    with pytest.raises(BackupError):
+        await import_file(target, path)
+    await target.dispose()
+
+
+@pytest.mark.asyncio
+async def test_user_export_endpoint(async_session, test_user, tmp_path):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+    await seed(async_session, test_user)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get(
+            "/api/users/me/export", headers={"api-key": test_user.api_key}
+        )
+        denied = await client.get("/api/users/me/export", headers={"api-key": "x"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    records = [
+        json.loads(line) for line in gzip.decompress(response.content).splitlines()
+    ]
+    assert [r["row"]["name"] for r in records if r["table"] == "users"] == ["testuser"]
+    assert [r["row"]["content"] for r in records if r["table"] == "tweets"] == [
+        "мой твит"
+    ]
+    assert len([r for r in records if r["table"] == "followers"]) == 2
+    assert denied.status_code == 401
+
+    # В пустой базе ссылки на чужие аккаунты и твиты пропускаются
+    path = tmp_path / "me.ndjson.gz"
+    path.write_bytes(response.content)
+    target = await empty_engine(tmp_path, "me.db")
+    counts = await import_file(target, str(path))
+    await target.dispose()
+    assert counts["users"] == 1
+    assert counts["tweets"] == 1
+    assert counts["likes skipped"] == 1
+    assert counts["followers skipped"] == 2
+
+
+@pytest.mark.asyncio
+async def test_import_into_migrated_database(
+    async_engine, async_session, test_user, tmp_path
+):
+    await seed(async_session, test_user)
+    path = str(tmp_path / "all.ndjson.gz")
+    await export_to_file(async_engine, path)
+
+    # Миграция 0002 уже создала демо-пользователей
+    target = await migrated_engine(tmp_path, "migrated.db")
+    assert await count(target, User) == 3
+    counts = await import_file(target, path)
+    assert counts["users"] == 2
+    async with target.connect() as conn:
+        names = await conn.execute(select(User.name).order_by(User.id))
+        assert names.scalars().all() == ["testuser", "other"]
+    assert await count(target, UserStats) == 2
+    assert await count(target, tweet_media_table) == 1
+
+    with pytest.raises(BackupError):
+        await import_file(target, path)
+    await target.dispose()
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src import config
+from src.capture import body_shape, json_from_shape, key_hash
+from src.database import get_async_db
+from src.main import app
+
+
+def test_body_shape_roundtrip():
+    body = json.dumps({"tweet_data": "привет", "tweet_media_ids": [3, 4]}).encode()
+    shape = body_shape("application/json", body, len(body))
+    assert shape == {"json": {"tweet_data": "str:6", "tweet_media_ids": ["int", "int"]}}
+    assert json_from_shape(shape["json"]) == {
+        "tweet_data": "xxxxxx",
+        "tweet_media_ids": [1, 1],
+    }
+    assert body_shape("multipart/form-data; boundary=x", b"", 2048) == {
+        "multipart": 2048
+    }
+    assert body_shape("application/json", b"", 0) is None
+
+
+@pytest.mark.asyncio
+async def test_sampled_requests_are_captured(
+    async_session, test_user, tmp_path, monkeypatch
+):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+    trace = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(config, "CAPTURE_PATH", str(trace))
+    monkeypatch.setattr(config, "CAPTURE_SAMPLE_RATE", 1.0)
+
+    me = {"api-key": test_user.api_key}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        created = await client.post(
+            "/api/tweets", json={"tweet_data": "секрет"}, headers=me
+        )
+        tweet_id = created.json()["tweet_id"]
+        await client.post(f"/api/tweets/{tweet_id}/likes", headers=me)
+        await client.get("/api/tweets", params={"likes": "compact"})
+        # Без выборки ничего не пишется
+        monkeypatch.setattr(config, "CAPTURE_SAMPLE_RATE", 0.0)
+        await client.get("/api/tweets")
+
+    text = trace.read_text()
+    records = [json.loads(line) for line in text.splitlines()]
+    assert [(r["method"], r["route"], r["status"]) for r in records] == [
+        ("POST", "/api/tweets", 200),
+        ("POST", "/api/tweets/{id}/likes", 200),
+        ("GET", "/api/tweets", 200),
+    ]
+    post, like, feed = records
+    assert post["body"] == {"json": {"tweet_data": "str:6"}}
+    assert like["path"] == f"/api/tweets/{tweet_id}/likes"
+    assert post["key"] == like["key"] == key_hash(test_user.api_key.encode())
+    assert feed["key"] is None
+    assert feed["query"] == "likes=compact"
+    assert all(r["v"] == 1 and r["ms"] > 0 for r in records)
+    # В трассе нет ни ключа, ни текста твита
+    assert test_user.api_key not in text
+    assert "секрет" not in text
@@ -0,0 +1,112 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from starlette.responses import StreamingResponse
+
+from src import compression
+from src.compression import CompressionMiddleware, choose_encoding
+from src.database import get_async_db
+from src.main import app
+from src.models import Tweet
+
+small_app = FastAPI()
+small_app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+
+@small_app.get("/big")
+async def big():
+    return {"data": "x" * 1000}
+
+
+@small_app.get("/small")
+async def small():
+    return {"data": "x"}
+
+
+@small_app.get("/stream")
+async def stream():
+    async def chunks():
+        yield b"a" * 1000
+        yield b"b" * 1000
+
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+def test_choose_encoding(monkeypatch):
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip;q=0, br;q=0") is None
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("br, gzip") == "gzip"
+
+
+@pytest.mark.asyncio
+async def test_gzip_above_threshold_only():
+    transport = ASGITransport(app=small_app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        headers = {"accept-encoding": "gzip"}
+        big_response = await client.get("/big", headers=headers)
+        small_response = await client.get("/small", headers=headers)
+        streamed = await client.get("/stream", headers=headers)
+        identity = await client.get("/big", headers={"accept-encoding": "identity"})
+
+    assert big_response.headers["content-encoding"] == "gzip"
+    assert int(big_response.headers["content-length"]) < 100
+    assert "accept-encoding" in big_response.headers["vary"].lower()
+    assert big_response.json() == {"data": "x" * 1000}
+    assert "content-encoding" not in small_response.headers
+    assert "content-encoding" not in streamed.headers
+    assert streamed.text == "a" * 1000 + "b" * 1000
+    assert "content-encoding" not in identity.headers
+
+
+@pytest.mark.asyncio
+async def test_brotli_preferred_when_available():
+    pytest.importorskip("brotli")
+    transport = ASGITransport(app=small_app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/big", headers={"accept-encoding": "gzip, br"})
+
+    assert response.headers["content-encoding"] == "br"
+    assert response.json() == {"data": "x" * 1000}
+
+
+@pytest.mark.asyncio
+async def test_fields_projection(async_session, test_user, test_tweet_with_likes):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    async_session.add(Tweet(content="y" * 2000, author_id=test_user.id))
+    await async_session.commit()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        tweets = await client.get(
+            "/api/tweets",
+            params={"fields": "id,content"},
+            headers={"accept-encoding": "gzip"},
+        )
+        profile = await client.get(
+            "/api/users/me",
+            params={"fields": "id,name"},
+            headers={"api-key": test_user.api_key},
+        )
+        invalid = await client.get("/api/tweets", params={"fields": "id,secret"})
+
+    assert tweets.status_code == 200
+    assert tweets.headers["content-encoding"] == "gzip"
+    assert all(set(tweet) == {"id", "content"} for tweet in tweets.json()["tweets"])
+    assert profile.json() == {
+        "result": True,
+        "user": {"id": test_user.id, "name": test_user.name},
+    }
+    assert invalid.status_code == 400
+
+
+def test_gzip_roundtrip():
+    body = b'{"tweets": []}' * 100
+    assert gzip.decompress(compression.compress(body, "gzip")) == body
@@ -0,0 +1,182 @@
+import asyncio
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.database import get_async_db
+from src import config
+from src.events import Broker, PostgresBackend, broker
+from src.main import app
+from src.models import User
+
+
+def tweet_event(author_id):
+    return {"type": "tweet", "tweet": {"id": 1, "author": {"id": author_id}}}
+
+
+def like_event(author_id, delta=1):
+    return {"type": "like", "tweet_id": 1, "author_id": author_id, "delta": delta}
+
+
+@pytest.mark.asyncio
+async def test_broker_filters_and_drops_slow_consumers():
+    local = Broker(queue_size=2)
+    follower = local.subscribe(user_id=1, follows={2})
+    stranger = local.subscribe(user_id=3, follows=set())
+
+    local.deliver(tweet_event(2))
+    local.deliver(like_event(author_id=2))
+    local.deliver(like_event(author_id=3))
+    assert follower.queue.qsize() == 2
+    assert stranger.queue.qsize() == 1  # только лайк своего твита
+
+    local.deliver(like_event(author_id=3))
+    assert stranger.queue.qsize() == 2
+    local.deliver(tweet_event(3))  # stranger is full
+    local.deliver(like_event(author_id=2))  # follower is full
+    assert follower.dropped.is_set()
+    assert stranger.dropped.is_set()
+    assert local.subscribers == set()
+    assert local.dropped_subscribers == 2
+
+    received = [event async for event in stranger.events()]
+    assert received == []  # a dropped stream ends
+
+
+async def read_stream(path, messages):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path.split("?")[0],
+        "raw_path": path.encode(),
+        "query_string": path.split("?")[1].encode(),
+        "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    disconnected = asyncio.Event()
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+
+
+@pytest.mark.asyncio
+async def test_event_stream_delivers_followed_tweets_and_likes(
+    async_session, test_user
+):
+    author = User(name="streamer", api_key="streamer")
+    async_session.add(author)
+    await async_session.commit()
+    await async_session.refresh(test_user, ["following"])
+    test_user.following.append(author)
+    await async_session.commit()
+
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    messages = []
+    stream = asyncio.create_task(
+        read_stream(f"/api/events?api_key={test_user.api_key}", messages)
+    )
+    for _ in range(100):
+        if broker.subscribers:
+            break
+        await asyncio.sleep(0.01)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        created = await client.post(
+            "/api/tweets",
+            json={"tweet_data": "live!"},
+            headers={"api-key": author.api_key},
+        )
+        tweet_id = created.json()["tweet_id"]
+        await client.post(
+            f"/api/tweets/{tweet_id}/likes", headers={"api-key": test_user.api_key}
+        )
+        unauthorized = await client.get("/api/events", params={"api_key": "nope"})
+
+    await broker.stop()  # ends every stream
+    await asyncio.wait_for(stream, 5)
+
+    assert messages[0]["status"] == 200
+    body = b"".join(m.get("body", b"") for m in messages[1:]).decode()
+    events = [
+        json.loads(line.removeprefix("data: "))
+        for line in body.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert body.startswith("retry: ")
+    assert events[0]["type"] == "tweet"
+    assert events[0]["tweet"]["content"] == "live!"
+    assert events[1] == {
+        "type": "like",
+        "tweet_id": tweet_id,
+        "author_id": author.id,
+        "user_id": test_user.id,
+        "delta": 1,
+    }
+    assert unauthorized.status_code == 401
+
+
+class FakeConnection:
+    def __init__(self):
+        self.on_terminate = []
+
+    async def add_listener(self, channel, callback):
+        pass
+
+    def add_termination_listener(self, callback):
+        self.on_terminate.append(callback)
+
+    async def close(self):
+        for callback in self.on_terminate:
+            callback(self)
+
+
+@pytest.mark.asyncio
+async def test_postgres_backend_reconnects_with_backoff(monkeypatch):
+    import asyncpg
+
+    monkeypatch.setattr(config, "EVENTS_RECONNECT_SECONDS", 0.01)
+    connections = []
+    attempts = []
+
+    async def connect(dsn):
+        attempts.append(dsn)
+        if len(attempts) in (2, 3):
+            raise OSError("connection refused")  # сервер ещё не поднялся
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    local = Broker()
+    backend = PostgresBackend(
+        "postgresql+asyncpg://u:p@db/app",
+        local.deliver,
+        on_reconnect=local.drop_subscribers,
+    )
+    await backend.connect()
+    stream = local.subscribe(user_id=1, follows=set())
+
+    for callback in connections[0].on_terminate:
+        callback(connections[0])  # соединение оборвалось
+    await asyncio.wait_for(backend._reconnecting, 5)
+
+    assert len(attempts) == 4
+    assert backend.connection is connections[1]
+    assert stream.dropped.is_set()  # пропущенные события: клиент перезагрузит ленту
+    await backend.close()
+    assert backend._reconnecting is None
@@ -0,0 +1,147 @@
+from contextlib import contextmanager
+from datetime import UTC, datetime
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+
+from src import config
+from src.database import get_async_db
+from src.main import app
+from src.models import Like, Tweet, User
+
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.mark.asyncio
+async def test_tweets_by_id_fixed_queries(
+    async_engine, async_session, test_user, test_tweet_with_likes
+):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    # Много твитов одного автора с лайками разных пользователей
+    likers = [User(name=f"fan{i}", api_key=f"fan{i}") for i in range(5)]
+    async_session.add_all(likers)
+    tweets = [Tweet(content=f"bulk {i}", author_id=test_user.id) for i in range(20)]
+    async_session.add_all(tweets)
+    await async_session.commit()
+    async_session.add_all(
+        Like(tweet_id=tweet.id, user_id=liker.id)
+        for tweet in tweets
+        for liker in likers
+    )
+    deleted = Tweet(
+        content="gone", author_id=test_user.id, deleted_at=datetime.now(UTC)
+    )
+    async_session.add(deleted)
+    await async_session.commit()
+
+    ids = [tweet.id for tweet in tweets] + [1, deleted.id, 999999]
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with count_queries(async_engine) as statements:
+            response = await client.get(
+                "/api/tweets", params={"ids": ",".join(map(str, ids))}
+            )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["result"] is True
+    assert set(body["tweets"]) == {str(i) for i in ids[:-2]}
+    assert len(statements) == 4
+
+    first = body["tweets"]["1"]
+    assert first["content"] == "Тест 1 твит с вложениями"
+    assert first["attachments"] == [
+        f"{config.MEDIA_BASE_URL}image1.jpg",
+        f"{config.MEDIA_BASE_URL}image2.jpg",
+    ]
+    assert first["author"] == {"id": test_user.id, "name": "testuser"}
+    assert [like["name"] for like in first["likes"]] == ["liker", "testuser"]
+    bulk = body["tweets"][str(tweets[0].id)]
+    assert [like["name"] for like in bulk["likes"]] == [f"fan{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_users_by_id(async_engine, async_session, test_user):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    other = User(name="other", api_key="other")
+    async_session.add(other)
+    await async_session.commit()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with count_queries(async_engine) as statements:
+            response = await client.get(
+                "/api/users", params={"ids": f"{other.id},{test_user.id},{other.id},42"}
+            )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "result": True,
+        "users": {
+            str(other.id): {"id": other.id, "name": "other"},
+            str(test_user.id): {"id": test_user.id, "name": "testuser"},
+        },
+    }
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_ids_validation(async_session, monkeypatch):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+    monkeypatch.setattr(config, "HYDRATE_MAX_IDS", 3)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        too_many = await client.get("/api/tweets", params={"ids": "1,2,3,4"})
+        not_int = await client.get("/api/users", params={"ids": "1,abc"})
+        missing = await client.get("/api/users")
+
+    assert too_many.status_code == 400
+    assert not_int.status_code == 400
+    assert missing.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_tweets_by_id_skip_missing_author(
+    async_session, test_user, test_tweet_with_likes
+):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    orphan = Tweet(content="orphan", author_id=None)
+    async_session.add(orphan)
+    await async_session.commit()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/api/tweets", params={"ids": f"{orphan.id},1"})
+
+    # Твит без автора пропускается, как в ленте
+    assert response.status_code == 200
+    assert list(response.json()["tweets"]) == ["1"]
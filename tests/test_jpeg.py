@@ -0,0 +1,189 @@
+import os
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+
+from src.database import get_async_db
+from src.main import app
+from src.models import Media
+from src.routes import medias
+from src.services.jpeg import JpegError, JpegScanner
+
+SAMPLE_JPEG = os.path.join(
+    os.path.dirname(__file__), "..", "media", "realistic-shark-ocean_23-2151415359.jpg"
+)
+
+
+def sample():
+    with open(SAMPLE_JPEG, "rb") as handle:
+        return handle.read()
+
+
+def with_exif(data):
+    # APP1 с EXIF и «миниатюрой» сразу после SOI
+    payload = b"Exif\0\0" + b"MM\0*" + b"\xff\xd8thumbnail\xff\xd9" * 50
+    segment = b"\xff\xe1" + (len(payload) + 2).to_bytes(2, "big") + payload
+    return data[:2] + segment + data[2:]
+
+
+def scan(data, chunk):
+    scanner = JpegScanner()
+    out = b"".join(
+        scanner.feed(data[i : i + chunk]) for i in range(0, len(data), chunk)
+    )
+    scanner.close()
+    return scanner, out
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 4096, 1 << 20])
+def test_exif_is_stripped_in_any_chunking(chunk):
+    original = sample()
+    scanner, out = scan(with_exif(original), chunk)
+
+    assert out == original
+    assert (scanner.width, scanner.height, scanner.size) == (626, 351, len(original))
+
+
+def test_bytes_after_end_of_image_are_dropped():
+    original = sample()
+    _, out = scan(original + b"trailing junk", 4096)
+    assert out == original
+
+
+def test_bad_uploads_are_rejected_at_the_first_chunk():
+    # Первые же байты не JPEG: остальное даже не читается
+    with pytest.raises(JpegError, match="start of image"):
+        JpegScanner().feed(b"GIF89a" + b"\0" * 100)
+    # Мусор вместо маркера после сегмента
+    with pytest.raises(JpegError, match="expected a marker"):
+        JpegScanner().feed(b"\xff\xd8\xff\xe0\x00\x04ab" + b"junk")
+    with pytest.raises(JpegError, match="no frame or scan"):
+        JpegScanner().feed(b"\xff\xd8\xff\xd9")
+
+
+def test_truncated_image_fails_on_close():
+    scanner = JpegScanner()
+    scanner.feed(sample()[:-100])
+    with pytest.raises(JpegError, match="truncated"):
+        scanner.close()
+
+
+@pytest.mark.asyncio
+async def test_upload_stores_stripped_image_and_size(
+    async_session, test_user, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(medias, "MEDIA_FOLDER", str(tmp_path))
+
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+    # Пока тело загружается, соединение с базой не удерживается
+    streaming = []
+    receive_jpeg = medias.receive_jpeg
+
+    async def watched(request, filepath):
+        streaming.append(async_session.in_transaction())
+        return await receive_jpeg(request, filepath)
+
+    monkeypatch.setattr(medias, "receive_jpeg", watched)
+
+    original = sample()
+    transport = ASGITransport(app=app)
+    headers = {"api-key": test_user.api_key}
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        uploaded = await client.post(
+            "/api/medias",
+            headers=headers,
+            files={"file": ("photo.jpg", with_exif(original), "image/jpeg")},
+        )
+        rejected = await client.post(
+            "/api/medias",
+            headers=headers,
+            files={"file": ("fake.jpg", b"not an image", "image/jpeg")},
+        )
+        truncated = await client.post(
+            "/api/medias",
+            headers=headers,
+            files={"file": ("cut.jpg", original[:1000], "image/jpeg")},
+        )
+
+    assert uploaded.status_code == 200
+    assert streaming == [False, False, False]
+    body = uploaded.json()
+    assert body["width"] == 626
+    assert body["height"] == 351
+    assert body["size_bytes"] == len(original)
+
+    media = await async_session.scalar(
+        select(Media).where(Media.id == body["media_id"])
+    )
+    assert (media.width, media.height, media.size_bytes) == (626, 351, len(original))
+    assert (tmp_path / media.filename).read_bytes() == original
+
+    for response in (rejected, truncated):
+        assert response.status_code == 400
+        assert "Invalid JPEG" in response.text
+    # От отклонённых загрузок файлов не остаётся
+    assert os.listdir(tmp_path) == [media.filename]
+
+
+@pytest.mark.asyncio
+async def test_bad_upload_is_rejected_before_the_body_is_read(
+    async_session, test_user, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(medias, "MEDIA_FOLDER", str(tmp_path))
+
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    boundary = "upload-boundary"
+    sent = []
+
+    async def body(filename, content_type, data):
+        yield (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        for i in range(0, len(data), 1024):
+            sent.append(i)
+            yield data[i : i + 1024]
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    async def upload(client, filename, content_type, data):
+        sent.clear()
+        return await client.post(
+            "/api/medias",
+            headers={
+                "api-key": test_user.api_key,
+                "content-type": f"multipart/form-data; boundary={boundary}",
+            },
+            content=body(filename, content_type, data),
+        )
+
+    junk = b"GIF89a" + bytes(100 * 1024)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        not_jpeg = await upload(client, "photo.jpg", "image/jpeg", junk)
+        not_jpeg_sent = len(sent)
+        wrong_name = await upload(client, "photo.gif", "image/gif", junk)
+        wrong_name_sent = len(sent)
+        missing = await client.post(
+            "/api/medias",
+            headers={"api-key": test_user.api_key},
+            files={"other": ("a.txt", b"text", "text/plain")},
+        )
+
+    # Ответ приходит после первого же блока из ста
+    assert not_jpeg.status_code == 400
+    assert "start of image" in not_jpeg.text
+    assert not_jpeg_sent == 1
+    assert wrong_name.status_code == 400
+    assert "Only .jpg" in wrong_name.text
+    assert wrong_name_sent == 0
+    assert missing.status_code == 422
+    assert os.listdir(tmp_path) == []
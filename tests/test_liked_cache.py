@@ -0,0 +1,145 @@
+from contextlib import contextmanager
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+
+from src.database import get_async_db
+from src.events import Broker
+from src.liked_cache import LikedCache, liked_cache
+from src.likes_buffer import apply_events
+from src.main import app
+from src.models import Like, Tweet
+
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def likes_queries(statements):
+    return [s for s in statements if "FROM likes" in s and "count(" not in s]
+
+
+@pytest.mark.asyncio
+async def test_warm_cache_skips_likes_table(async_engine, async_session, test_user):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    tweets = [Tweet(content=f"t{i}", author_id=test_user.id) for i in range(3)]
+    async_session.add_all(tweets)
+    await async_session.commit()
+    async_session.add(Like(user_id=test_user.id, tweet_id=tweets[1].id))
+    await async_session.commit()
+
+    me = {"api-key": test_user.api_key}
+    params = {"likes": "compact", "fields": "id,liked_by_me"}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        cold = await client.get("/api/tweets", params=params, headers=me)
+        with count_queries(async_engine) as statements:
+            warm = await client.get("/api/tweets", params=params, headers=me)
+        # Лайк и отмена через API сразу видны в кэше
+        await client.post(f"/api/tweets/{tweets[0].id}/likes", headers=me)
+        await client.delete(f"/api/tweets/{tweets[1].id}/likes", headers=me)
+        with count_queries(async_engine) as after:
+            changed = await client.get("/api/tweets", params=params, headers=me)
+
+    def liked(response):
+        return [t["liked_by_me"] for t in response.json()["tweets"]]
+
+    assert liked(cold) == liked(warm) == [False, True, False]
+    assert not [s for s in statements if "likes.user_id = " in s]
+    assert liked(changed) == [True, False, False]
+    assert not [s for s in after if "likes.user_id = " in s]
+
+
+@pytest.mark.asyncio
+async def test_write_behind_flush_updates_cache(async_session, test_user):
+    tweet = Tweet(content="t", author_id=test_user.id)
+    async_session.add(tweet)
+    await async_session.commit()
+
+    assert (
+        await liked_cache.liked_among(async_session, test_user.id, [tweet.id]) == set()
+    )
+    await apply_events(async_session, {(test_user.id, tweet.id): True})
+    assert await liked_cache.liked_among(async_session, test_user.id, [tweet.id]) == {
+        tweet.id
+    }
+    await apply_events(async_session, {(test_user.id, tweet.id): False})
+    assert (
+        await liked_cache.liked_among(async_session, test_user.id, [tweet.id]) == set()
+    )
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_ttl(async_engine, async_session, test_user):
+    tweet = Tweet(content="t", author_id=test_user.id)
+    async_session.add(tweet)
+    await async_session.commit()
+    async_session.add(Like(user_id=test_user.id, tweet_id=tweet.id))
+    await async_session.commit()
+
+    cache = LikedCache(max_users=2, ttl=60)
+    for user_id in (test_user.id, 100, 101):
+        await cache.liked_among(async_session, user_id, [tweet.id])
+    # Самый давний пользователь вытеснен и загружается снова
+    with count_queries(async_engine) as statements:
+        assert await cache.liked_among(async_session, 101, [tweet.id]) == set()
+        assert await cache.liked_among(async_session, test_user.id, [tweet.id]) == {
+            tweet.id
+        }
+    assert len(likes_queries(statements)) == 1
+
+    # Устаревшая запись перечитывается: лайк из другого процесса исчез
+    stale = LikedCache(max_users=2, ttl=0)
+    await stale.liked_among(async_session, test_user.id, [tweet.id])
+    await async_session.delete(await async_session.get(Like, 1))
+    await async_session.commit()
+    assert await stale.liked_among(async_session, test_user.id, [tweet.id]) == set()
+
+
+@pytest.mark.asyncio
+async def test_like_events_of_other_workers_update_cache(
+    async_engine, async_session, test_user
+):
+    tweet = Tweet(content="t", author_id=test_user.id)
+    async_session.add(tweet)
+    await async_session.commit()
+
+    cache = LikedCache(max_users=2, ttl=60)
+    local = Broker()
+    local.listeners.append(cache.apply_event)
+    assert await cache.liked_among(async_session, test_user.id, [tweet.id]) == set()
+
+    # Лайк записал другой процесс; событие пришло через LISTEN
+    async_session.add(Like(user_id=test_user.id, tweet_id=tweet.id))
+    await async_session.commit()
+    like = {
+        "type": "like",
+        "tweet_id": tweet.id,
+        "author_id": test_user.id,
+        "user_id": test_user.id,
+        "delta": 1,
+    }
+    local.deliver(like)
+    local.deliver({"type": "tweet", "tweet": {"id": 2, "author": {"id": 1}}})
+    with count_queries(async_engine) as statements:
+        assert await cache.liked_among(async_session, test_user.id, [tweet.id]) == {
+            tweet.id
+        }
+        local.deliver({**like, "delta": -1})
+        assert await cache.liked_among(async_session, test_user.id, [tweet.id]) == set()
+    assert likes_queries(statements) == []
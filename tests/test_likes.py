@@ -0,0 +1,76 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.database import get_async_db
+from src.main import app
+from src.models import Like, Tweet, User
+
+
+@pytest.mark.asyncio
+async def test_compact_likes_are_bounded(async_session, test_user):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    likers = [User(name=f"fan{i}", api_key=f"fan{i}") for i in range(10)]
+    tweet = Tweet(content="viral", author_id=test_user.id)
+    quiet = Tweet(content="quiet", author_id=test_user.id)
+    async_session.add_all([*likers, tweet, quiet])
+    await async_session.commit()
+    async_session.add_all(
+        [Like(user_id=u.id, tweet_id=tweet.id) for u in likers]
+        + [Like(user_id=test_user.id, tweet_id=quiet.id)]
+    )
+    await async_session.commit()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get(
+            "/api/tweets",
+            params={"likes": "compact"},
+            headers={"api-key": test_user.api_key},
+        )
+        full = await ac.get("/api/tweets", headers={"api-key": test_user.api_key})
+
+    assert response.status_code == 200
+    viral, calm = response.json()["tweets"]
+    assert viral["like_count"] == 10
+    assert viral["liked_by_me"] is False
+    assert [like["name"] for like in viral["likes"]] == ["fan0", "fan1", "fan2"]
+    assert calm["like_count"] == 1
+    assert calm["liked_by_me"] is True
+
+    assert len(full.json()["tweets"][0]["likes"]) == 10
+    assert "like_count" not in full.json()["tweets"][0]
+
+
+@pytest.mark.asyncio
+async def test_likers_keyset_pagination(async_session, test_user):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    likers = [User(name=f"fan{i}", api_key=f"fan{i}") for i in range(5)]
+    tweet = Tweet(content="viral", author_id=test_user.id)
+    async_session.add_all([*likers, tweet])
+    await async_session.commit()
+    async_session.add_all([Like(user_id=u.id, tweet_id=tweet.id) for u in likers])
+    await async_session.commit()
+
+    transport = ASGITransport(app=app)
+    names = []
+    cursor = None
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for _ in range(3):
+            params = {"limit": 2} if cursor is None else {"limit": 2, "after": cursor}
+            response = await ac.get(f"/api/tweets/{tweet.id}/likes", params=params)
+            assert response.status_code == 200
+            names += [like["name"] for like in response.json()["likes"]]
+            cursor = response.json()["next_cursor"]
+        missing = await ac.get("/api/tweets/9999/likes")
+
+    assert names == [f"fan{i}" for i in range(5)]
+    assert cursor is None
+    assert missing.status_code == 404
@@ -0,0 +1,144 @@
+import asyncio
+import os
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src import config
+from src.database import get_async_db
+from src.likes_buffer import LikeBuffer
+from src.main import app
+from src.models import Like, Tweet, User
+from src.routes import tweets
+
+
+@pytest_asyncio.fixture
+async def session_factory(async_engine):
+    return async_sessionmaker(
+        bind=async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+
+@pytest_asyncio.fixture
+async def viral(async_session, test_user):
+    tweet = Tweet(content="viral", author_id=test_user.id)
+    async_session.add(tweet)
+    await async_session.commit()
+    return tweet
+
+
+async def likers(session_factory, tweet_id):
+    async with session_factory() as db:
+        result = await db.execute(
+            select(Like.user_id).where(Like.tweet_id == tweet_id).order_by(Like.id)
+        )
+        return result.scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_like_is_visible_to_its_author_before_flush(
+    async_session, session_factory, test_user, viral, tmp_path, monkeypatch
+):
+    buffer = LikeBuffer(str(tmp_path / "likes.log"), session_factory)
+    monkeypatch.setattr(config, "LIKES_WRITE_BEHIND", True)
+    monkeypatch.setattr(tweets, "like_buffer", buffer)
+
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+    headers = {"api-key": test_user.api_key}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        liked = await client.post(f"/api/tweets/{viral.id}/likes", headers=headers)
+        assert liked.status_code == 200
+        assert await likers(session_factory, viral.id) == []
+
+        full = await client.get("/api/tweets", headers=headers)
+        compact = await client.get(
+            "/api/tweets", params={"likes": "compact"}, headers=headers
+        )
+        anonymous = await client.get("/api/tweets")
+
+        assert await buffer.flush() == 1
+        assert await likers(session_factory, viral.id) == [test_user.id]
+
+        unliked = await client.delete(f"/api/tweets/{viral.id}/likes", headers=headers)
+        again = await client.delete(f"/api/tweets/{viral.id}/likes", headers=headers)
+        after_unlike = await client.get("/api/tweets", headers=headers)
+
+    def find(response):
+        return next(t for t in response.json()["tweets"] if t["id"] == viral.id)
+
+    assert find(full)["likes"] == [{"user_id": test_user.id, "name": test_user.name}]
+    assert find(compact)["liked_by_me"] is True
+    assert find(compact)["like_count"] == 1
+    assert find(anonymous)["likes"] == []
+    assert unliked.status_code == 200
+    assert again.status_code == 404
+    assert find(after_unlike)["likes"] == []
+
+    await buffer.flush()
+    assert await likers(session_factory, viral.id) == []
+    assert not os.path.exists(buffer.log_path)
+    assert not os.path.exists(buffer.flushing_path)
+
+
+@pytest.mark.asyncio
+async def test_events_are_coalesced_and_idempotent(
+    session_factory, test_user, viral, tmp_path
+):
+    buffer = LikeBuffer(str(tmp_path / "likes.log"), session_factory)
+    fans = [User(name=f"wb{i}", api_key=f"wb{i}") for i in range(20)]
+    async with session_factory() as db:
+        db.add_all(fans)
+        await db.commit()
+
+    # Concurrent events share fsyncs but every one is logged
+    await asyncio.gather(*(buffer.record(fan.id, viral.id, True) for fan in fans))
+    await buffer.record(fans[0].id, viral.id, False)
+    await buffer.record(fans[0].id, viral.id, True)
+    with open(buffer.log_path) as log:
+        assert len(log.readlines()) == 22
+
+    assert await buffer.flush() == 20
+    await buffer.record(fans[1].id, viral.id, True)  # already liked
+    await buffer.flush()
+    assert sorted(await likers(session_factory, viral.id)) == [f.id for f in fans]
+
+
+@pytest.mark.asyncio
+async def test_unflushed_events_are_replayed_after_a_crash(
+    session_factory, test_user, viral, tmp_path
+):
+    crashed = LikeBuffer(str(tmp_path / "likes.log"), session_factory)
+    await crashed.record(test_user.id, viral.id, True)
+    with open(crashed.log_path, "a") as log:
+        log.write('{"user_id": 1, "tweet')  # torn write
+
+    restarted = LikeBuffer(str(tmp_path / "likes.log"), session_factory, interval=3600)
+    await restarted.start()
+    assert restarted.pending_for(test_user.id) == {viral.id: True}
+    await restarted.stop()
+
+    assert await likers(session_factory, viral.id) == [test_user.id]
+    assert not os.path.exists(restarted.log_path)
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_events_being_logged(
+    session_factory, test_user, viral, tmp_path
+):
+    buffer = LikeBuffer(str(tmp_path / "likes.log"), session_factory, interval=3600)
+    await buffer.start()
+    liking = asyncio.create_task(buffer.record(test_user.id, viral.id, True))
+    await asyncio.sleep(0)  # запись в лог началась, но ещё не завершена
+    assert buffer._writers
+
+    await buffer.stop()
+    await liking
+    assert not buffer._writers
+    assert await likers(session_factory, viral.id) == [test_user.id]
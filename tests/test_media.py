@@ -0,0 +1,130 @@
+import os
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src import config
+from src.main import app
+from src.routes import medias
+from src.routes.medias import MediaFileResponse, _zerocopy_hooks_match
+from src.services.media_service import media_url, verify
+
+CONTENT = b"\xff\xd8\xff\xe0" + b"0123456789" * 10
+
+
+@pytest.fixture
+def media_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(medias, "MEDIA_FOLDER", str(tmp_path))
+    (tmp_path / "abc123.jpg").write_bytes(CONTENT)
+    return tmp_path / "abc123.jpg"
+
+
+def test_media_url_base_and_signature(monkeypatch):
+    monkeypatch.setattr(config, "MEDIA_BASE_URL", "https://cdn.example/m/")
+    assert media_url("a.jpg") == "https://cdn.example/m/a.jpg"
+
+    monkeypatch.setattr(config, "MEDIA_URL_SECRET", "s3cret")
+    monkeypatch.setattr(config, "MEDIA_URL_TTL", 100)
+    url = media_url("a.jpg", now=1050)
+    assert url == media_url("a.jpg", now=1099)  # stable within a window
+    query = dict(item.split("=") for item in url.split("?")[1].split("&"))
+    expires = int(query["expires"])
+    assert expires == 1200
+    assert verify("a.jpg", expires, query["signature"], now=1199)
+    assert not verify("a.jpg", expires, query["signature"], now=1201)
+    assert not verify("b.jpg", expires, query["signature"], now=1100)
+    assert not verify("a.jpg", None, None, now=1100)
+
+
+@pytest.mark.asyncio
+async def test_serve_media_with_cache_headers_and_ranges(media_file):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        full = await client.get("/media/abc123.jpg")
+        cached = await client.get(
+            "/media/abc123.jpg", headers={"if-none-match": full.headers["etag"]}
+        )
+        partial = await client.get("/media/abc123.jpg", headers={"range": "bytes=4-13"})
+        missing = await client.get("/media/missing.jpg")
+        traversal = await client.get("/media/..%2Fetc%2Fpasswd")
+
+    assert full.status_code == 200
+    assert full.content == CONTENT
+    assert full.headers["content-type"] == "image/jpeg"
+    assert "immutable" in full.headers["cache-control"]
+    assert "content-encoding" not in full.headers
+    assert cached.status_code == 304
+    assert partial.status_code == 206
+    assert partial.content == b"0123456789"
+    assert partial.headers["content-range"] == f"bytes 4-13/{len(CONTENT)}"
+    assert missing.status_code == 404
+    assert traversal.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_signed_media_urls_are_enforced(media_file, monkeypatch):
+    monkeypatch.setattr(config, "MEDIA_URL_SECRET", "s3cret")
+    monkeypatch.setattr(config, "MEDIA_BASE_URL", "http://test/media/")
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        unsigned = await client.get("/media/abc123.jpg")
+        signed = await client.get(media_url("abc123.jpg"))
+
+    assert unsigned.status_code == 403
+    assert signed.status_code == 200
+    assert signed.content == CONTENT
+
+
+@pytest.mark.asyncio
+async def test_nginx_media_authorization(media_file, monkeypatch):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def authorize(uri):
+            return await client.get(
+                "/api/medias/authorize", headers={"x-original-uri": uri}
+            )
+
+        # Без секрета просроченный expires не даёт отрицательный max-age
+        open_url = await authorize("/media/abc123.jpg?expires=1")
+        monkeypatch.setattr(config, "MEDIA_URL_SECRET", "s3cret")
+        monkeypatch.setattr(config, "MEDIA_BASE_URL", "http://test/media/")
+        unsigned = await authorize("/media/abc123.jpg")
+        signed = await authorize(media_url("abc123.jpg").removeprefix("http://test"))
+        forged = await authorize("/media/abc123.jpg?expires=9999999999&signature=x")
+
+    assert open_url.status_code == 204
+    assert open_url.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert unsigned.status_code == 403
+    assert forged.status_code == 403
+    assert signed.status_code == 204
+    max_age = int(signed.headers["cache-control"].split("max-age=")[1].split(",")[0])
+    assert 0 < max_age <= 2 * config.MEDIA_URL_TTL
+
+
+@pytest.mark.asyncio
+async def test_zerocopy_send_when_server_supports_it(media_file):
+    messages = []
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            message = {**message, "file": message["file"].name}
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(b"range", b"bytes=4-13")],
+        "extensions": {"http.response.zerocopysend": {}},
+    }
+    assert _zerocopy_hooks_match()  # с закреплённой версией Starlette
+    response = MediaFileResponse(str(media_file), stat_result=os.stat(media_file))
+    await response(scope, None, send)
+
+    assert messages[0]["status"] == 206
+    assert messages[1] == {
+        "type": "http.response.zerocopysend",
+        "file": str(media_file),
+        "offset": 4,
+        "count": 10,
+    }
@@ -0,0 +1,60 @@
+import asyncio
+import os
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database import Base, SchemaVersionError, check_schema
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "alembic.ini")
+
+
+def alembic_config(db_path):
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", f"sqlite+aiosqlite:///{db_path}")
+    return config
+
+
+def test_migrations_match_models(tmp_path):
+    db_path = tmp_path / "migrated.db"
+    command.upgrade(alembic_config(db_path), "head")
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as conn:
+        diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+    engine.dispose()
+
+    assert diff == []
+
+
+def test_migrations_downgrade_to_base(tmp_path):
+    config = alembic_config(tmp_path / "roundtrip.db")
+    command.upgrade(config, "head")
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+@pytest.mark.asyncio
+async def test_check_schema(tmp_path):
+    db_path = tmp_path / "check.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+
+    with pytest.raises(SchemaVersionError):
+        await check_schema(engine)
+
+    config = alembic_config(db_path)
+    await engine.dispose()
+    # Alembic's env.py starts its own event loop
+    await asyncio.to_thread(command.upgrade, config, "head")
+    await check_schema(engine)
+
+    await asyncio.to_thread(command.downgrade, config, "0001")
+    with pytest.raises(SchemaVersionError):
+        await check_schema(engine)
+
+    await engine.dispose()
@@ -0,0 +1,106 @@
+import gzip
+import json
+import os
+from datetime import UTC, datetime
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.database import Base, get_async_db
+from src.main import app
+from src.models import Like, PartitionArchive, Tweet, User
+from src.partitions import archive_older_than, partition_bounds
+
+NOW = datetime(2026, 10, 15, tzinfo=UTC)
+
+
+@pytest_asyncio.fixture
+async def file_engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/partitions.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_archive_old_months_and_lookup_by_id(file_engine, tmp_path):
+    session_factory = async_sessionmaker(
+        bind=file_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with session_factory() as session:
+        author = User(name="author", api_key="author-key")
+        session.add(author)
+        await session.commit()
+        old = [
+            Tweet(
+                content="january",
+                author_id=author.id,
+                created_at=datetime(2025, 1, 10, tzinfo=UTC),
+            ),
+            Tweet(
+                content="february",
+                author_id=author.id,
+                created_at=datetime(2025, 2, 10, tzinfo=UTC),
+            ),
+        ]
+        recent = Tweet(
+            content="recent",
+            author_id=author.id,
+            created_at=datetime(2026, 9, 1, tzinfo=UTC),
+        )
+        session.add_all([*old, recent])
+        await session.commit()
+        session.add(
+            Like(
+                user_id=author.id,
+                tweet_id=old[0].id,
+                created_at=datetime(2025, 1, 11, tzinfo=UTC),
+            )
+        )
+        await session.commit()
+        archived_id = old[0].id
+
+    archive_dir = str(tmp_path / "archive")
+    archived = await archive_older_than(file_engine, 12, archive_dir, now=NOW)
+
+    assert sorted(os.path.basename(a.path) for a in archived) == [
+        "likes_2025_01.ndjson.gz",
+        "tweets_2025_01.ndjson.gz",
+        "tweets_2025_02.ndjson.gz",
+    ]
+
+    async with session_factory() as session:
+        remaining = await session.execute(select(Tweet.content))
+        assert remaining.scalars().all() == ["recent"]
+        assert await session.scalar(select(func.count(Like.id))) == 0
+        assert await session.scalar(select(func.count(PartitionArchive.id))) == 3
+
+    with gzip.open(os.path.join(archive_dir, "tweets_2025_01.ndjson.gz"), "rt") as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["content"] for row in rows] == ["january"]
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get(f"/api/tweets/{archived_id}")
+        missing = await ac.get("/api/tweets/9999")
+
+    assert response.status_code == 200
+    assert response.json()["tweet"]["content"] == "january"
+    assert response.json()["tweet"]["author"]["name"] == "author"
+    assert missing.status_code == 404
+
+
+def test_partition_bounds_are_utc():
+    # Границы не зависят от TimeZone сессии PostgreSQL
+    assert partition_bounds(datetime(2026, 12, 1, tzinfo=UTC)) == (
+        "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"
+    )
@@ -0,0 +1,57 @@
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.database import get_async_db
+from src.main import app
+from src.pool import TimedQueuePool
+
+
+@pytest_asyncio.fixture
+async def tiny_engine(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_checkouts_are_timed(tiny_engine):
+    async with tiny_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        # Единственное соединение занято: ожидание заканчивается ошибкой
+        with pytest.raises(exc.TimeoutError):
+            await tiny_engine.connect()
+
+    stats = tiny_engine.pool.stats.snapshot()
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert tiny_engine.pool.checkedout() == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_timeout_is_answered_with_503(tiny_engine):
+    async def override_get_db():
+        async with AsyncSession(tiny_engine) as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    transport = ASGITransport(app=app)
+    async with tiny_engine.connect() as held:
+        await held.execute(text("SELECT 1"))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            feed = await client.get("/api/tweets")
+            profile = await client.get("/api/users/1")
+
+    for response in (feed, profile):
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        assert response.json()["error_type"] == "Overloaded"
@@ -0,0 +1,136 @@
+import re
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, insert, select
+
+from src.database import get_async_db
+from src.main import app
+from src.models import Like, Tweet, User, followers_table
+
+"""
+Каждый "горячий" запрос должен идти по индексу.
+
+Запросы собираются с реальных эндпоинтов, затем для каждого SELECT
+выполняется EXPLAIN QUERY PLAN. Полный просмотр таблицы ("SCAN <table>"
+без индекса) считается регрессией.
+"""
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+async def explain(conn, statement, parameters=()):
+    result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return [row[3] for row in result]
+
+
+def full_scans(plan):
+    return [m.group(1) for m in map(FULL_SCAN.match, plan) if m]
+
+
+async def seed(session, test_user):
+    await session.execute(
+        insert(User),
+        [{"name": f"user{i}", "api_key": f"key{i}"} for i in range(50)],
+    )
+    users = (await session.execute(select(User.id))).scalars().all()
+    await session.execute(
+        insert(Tweet),
+        [
+            {"content": f"tweet {i}", "media_ids": "[]", "author_id": users[i % 50]}
+            for i in range(500)
+        ],
+    )
+    tweets = (await session.execute(select(Tweet.id))).scalars().all()
+    await session.execute(
+        insert(Like),
+        [{"tweet_id": t, "user_id": users[t % 50]} for t in tweets],
+    )
+    await session.execute(
+        insert(followers_table),
+        [
+            {"follower_id": u, "followee_id": test_user.id}
+            for u in users
+            if u != test_user.id
+        ],
+    )
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_endpoint_queries_use_indexes(async_engine, async_session, test_user):
+    await seed(async_session, test_user)
+
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        transport = ASGITransport(app=app)
+        headers = {"api-key": test_user.api_key}
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            await ac.get("/api/tweets", headers=headers)
+            await ac.get("/api/users/me", headers=headers)
+            await ac.get(f"/api/users/{test_user.id}")
+            await ac.get(f"/api/users/{test_user.id}/tweets", params={"before": 300})
+            await ac.post("/api/tweets/10/likes", headers=headers)
+            await ac.delete("/api/tweets/10/likes", headers=headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+    assert captured
+    conn = await async_session.connection()
+    for statement, parameters in captured:
+        # The unpaged global feed reads every tweet by design
+        if re.search(r"FROM tweets\s*$", statement.strip()):
+            continue
+        plan = await explain(conn, statement, parameters)
+        assert full_scans(plan) == [], (statement, plan)
+
+
+@pytest.mark.asyncio
+async def test_feed_and_timeline_pages_walk_indexes(async_session, test_user):
+    await seed(async_session, test_user)
+    conn = await async_session.connection()
+
+    feed = await explain(
+        conn,
+        "SELECT id FROM tweets WHERE deleted_at IS NULL "
+        "ORDER BY created_at DESC, id DESC LIMIT 20",
+    )
+    assert any("ix_tweets_live_created_at_id" in step for step in feed), feed
+    assert not any("TEMP B-TREE" in step for step in feed), feed
+
+    timeline = await explain(
+        conn,
+        "SELECT id FROM tweets WHERE author_id = ? AND deleted_at IS NULL "
+        "ORDER BY created_at DESC, id DESC LIMIT 20",
+        (test_user.id,),
+    )
+    assert any("ix_tweets_live_author_id_created_at_id" in step for step in timeline), (
+        timeline
+    )
+    assert not any("TEMP B-TREE" in step for step in timeline), timeline
+
+    for statement, parameters in [
+        ("SELECT id FROM likes WHERE user_id = ? AND tweet_id = ?", (1, 1)),
+        ("SELECT user_id FROM likes WHERE tweet_id = ?", (1,)),
+        (
+            "SELECT id, user_id FROM likes WHERE tweet_id = ? AND id > ? "
+            "ORDER BY id LIMIT 50",
+            (1, 0),
+        ),
+        ("SELECT tweet_id FROM likes WHERE user_id = ?", (1,)),
+        ("SELECT follower_id FROM followers WHERE followee_id = ?", (1,)),
+        ("SELECT id FROM medias WHERE user_id = ?", (1,)),
+    ]:
+        plan = await explain(conn, statement, parameters)
+        assert full_scans(plan) == [], (statement, plan)
@@ -0,0 +1,113 @@
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+
+from src import config
+from src.database import get_async_db
+from src.main import app
+from src.models import Job, Like, Tweet, TweetScore, User, followers_table
+from src.ranking import (
+    rank_tweets,
+    recompute_scores,
+    schedule_ranking,
+    score_tweets,
+    top_k,
+)
+
+
+def test_score_tweets():
+    scores = score_tweets(
+        np.array([10.0, 1.0, 10.0, 10.0]),
+        np.array([1.0, 1.0, 48.0, 1.0]),
+        np.array([0.0, 0.0, 0.0, 1000.0]),
+    )
+    # Больше лайков, моложе и популярнее автор — выше
+    assert scores[0] > scores[1]
+    assert scores[0] > scores[2]
+    assert scores[3] > scores[0]
+
+    ids, best = top_k(np.array([1, 2, 3, 4]), scores, 2)
+    assert ids.tolist() == [4, 1]
+    assert best[0] >= best[1]
+
+
+@pytest.mark.asyncio
+async def test_top_feed(async_session, test_user):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    now = datetime.now(UTC)
+    fans = [User(name=f"fan{i}", api_key=f"fan{i}") for i in range(5)]
+    async_session.add_all(fans)
+    await async_session.commit()
+    await async_session.execute(
+        followers_table.insert(),
+        [{"follower_id": fan.id, "followee_id": test_user.id} for fan in fans],
+    )
+    popular = Tweet(content="popular", author_id=test_user.id, created_at=now)
+    old = Tweet(
+        content="old", author_id=test_user.id, created_at=now - timedelta(days=2)
+    )
+    quiet = Tweet(content="quiet", author_id=fans[0].id, created_at=now)
+    stale = Tweet(
+        content="stale", author_id=test_user.id, created_at=now - timedelta(days=30)
+    )
+    async_session.add_all([popular, old, quiet, stale])
+    await async_session.commit()
+    async_session.add_all(Like(tweet_id=popular.id, user_id=fan.id) for fan in fans)
+    async_session.add_all(Like(tweet_id=old.id, user_id=fan.id) for fan in fans)
+    await async_session.commit()
+
+    assert await recompute_scores(async_session, now) == 3
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        ranked = await client.get("/api/tweets/top")
+        old.deleted_at = now
+        await async_session.commit()
+        limited = await client.get("/api/tweets/top", params={"limit": 1})
+        after_delete = await client.get("/api/tweets/top")
+
+    assert ranked.status_code == 200
+    # Старый твит с лайками уступает свежему без лайков
+    assert [t["content"] for t in ranked.json()["tweets"]] == [
+        "popular",
+        "quiet",
+        "old",
+    ]
+    assert len(ranked.json()["tweets"][0]["likes"]) == 5
+    assert [t["content"] for t in limited.json()["tweets"]] == ["popular"]
+    assert [t["content"] for t in after_delete.json()["tweets"]] == [
+        "popular",
+        "quiet",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rank_job_reschedules_itself(async_session, test_user, monkeypatch):
+    monkeypatch.setattr(config, "RANK_TOP_SIZE", 1)
+    async_session.add_all(
+        Tweet(content=f"t{i}", author_id=test_user.id) for i in range(3)
+    )
+    await async_session.commit()
+
+    await rank_tweets(async_session, {})
+    await schedule_ranking(async_session)
+
+    scores = (await async_session.execute(select(TweetScore))).scalars().all()
+    assert len(scores) == 1
+    jobs = (
+        (await async_session.execute(select(Job).where(Job.kind == "tweet.rank")))
+        .scalars()
+        .all()
+    )
+    assert len(jobs) == 1
+    run_at = jobs[0].run_at.replace(tzinfo=UTC)
+    assert run_at > datetime.now(UTC) + timedelta(
+        seconds=config.RANK_INTERVAL_SECONDS - 10
+    )
@@ -0,0 +1,157 @@
+import asyncio
+import sqlite3
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.ratelimit import (
+    KnownKeys,
+    MemoryBucketBackend,
+    RateLimitMiddleware,
+    SQLiteBucketBackend,
+)
+
+USER_KEYS = {"a", "b"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def user_key_exists(api_key):
+    return api_key in USER_KEYS
+
+
+def make_app(backend, **limits):
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.get("/api/tweets")
+    async def feed():
+        return {"result": True}
+
+    @app.get("/api/slow")
+    async def slow():
+        await release.wait()
+        return {"result": True}
+
+    limits.setdefault("key_exists", user_key_exists)
+    app.add_middleware(RateLimitMiddleware, backend=backend, **limits)
+    return app, release
+
+
+@pytest.mark.asyncio
+async def test_bucket_refills_over_time():
+    clock = FakeClock()
+    backend = MemoryBucketBackend(clock=clock)
+
+    assert await backend.take("k", 3, rate=1, burst=5) == 0
+    assert await backend.take("k", 3, rate=1, burst=5) == pytest.approx(1.0)
+
+    clock.now += 1
+    assert await backend.take("k", 3, rate=1, burst=5) == 0
+
+
+@pytest.mark.asyncio
+async def test_route_costs_and_retry_after():
+    known = KnownKeys()
+    for key in USER_KEYS:
+        known.add(key)
+    app, _ = make_app(
+        MemoryBucketBackend(),
+        rate=1,
+        burst=6,
+        costs={("GET", "/api/tweets"): 3},
+        known_keys=known,
+    )
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        statuses = [
+            (await client.get("/api/tweets", headers={"api-key": "a"})).status_code
+            for _ in range(3)
+        ]
+        other_key = await client.get("/api/tweets", headers={"api-key": "b"})
+        limited = await client.get("/api/tweets", headers={"api-key": "a"})
+
+    assert statuses == [200, 200, 429]
+    assert other_key.status_code == 200
+    assert limited.headers["retry-after"] == "3"
+    assert limited.json()["result"] is False
+
+
+@pytest.mark.asyncio
+async def test_unknown_keys_share_the_client_bucket():
+    app, _ = make_app(MemoryBucketBackend(), rate=1, burst=3, costs={})
+    transport = ASGITransport(app=app)
+
+    async def get(key):
+        response = await client.get("/api/tweets", headers={"api-key": key})
+        return response.status_code
+
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        # Первый запрос с ключом пользователя идёт за счёт адреса клиента
+        first = await get("a")
+        # Случайный ключ на каждый запрос не даёт нового ведра
+        rotating = [await get(f"random{i}") for i in range(3)]
+        # Подтверждённый ключ расходует своё ведро
+        own = [await get("a") for _ in range(3)]
+
+    assert first == 200
+    assert rotating == [200, 200, 429]
+    assert own == [200, 200, 200]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_sheds_load():
+    app, release = make_app(
+        MemoryBucketBackend(), rate=100, burst=100, max_concurrency=1
+    )
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        pending = asyncio.create_task(client.get("/api/slow"))
+        await asyncio.sleep(0.05)
+        shed = await client.get("/api/tweets")
+        release.set()
+        first = await pending
+
+    assert first.status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_keeps_the_original_error(tmp_path, monkeypatch):
+    path = str(tmp_path / "buckets.db")
+    backend = SQLiteBucketBackend(path, clock=FakeClock())
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    # BEGIN не удался: откатывать нечего, видна исходная ошибка
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        await backend.take("k", 1, rate=1, burst=3)
+    holder.execute("ROLLBACK")
+
+    def broken_refill(*args):
+        raise ZeroDivisionError
+
+    monkeypatch.setattr("src.ratelimit.refill", broken_refill)
+    with pytest.raises(ZeroDivisionError):
+        await backend.take("k", 1, rate=1, burst=3)
+    monkeypatch.undo()
+    # Транзакция откатилась, блокировка не осталась
+    assert await backend.take("k", 1, rate=1, burst=3) == 0
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_is_shared_between_workers(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "buckets.db")
+    worker_1 = SQLiteBucketBackend(path, clock=clock)
+    worker_2 = SQLiteBucketBackend(path, clock=clock)
+
+    assert await worker_1.take("k", 2, rate=1, burst=3) == 0
+    assert await worker_2.take("k", 2, rate=1, burst=3) == pytest.approx(1.0)
@@ -0,0 +1,110 @@
+from contextlib import contextmanager
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+
+from src import config
+from src.database import get_async_db
+from src.main import app
+from src.models import Like, Tweet, User
+
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.mark.asyncio
+async def test_feed_fixed_queries(
+    async_engine, async_session, test_user, test_tweet_with_likes
+):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    # Много твитов с вложениями: медиа читаются одним запросом на всю ленту
+    fans = [User(name=f"fan{i}", api_key=f"fan{i}") for i in range(3)]
+    async_session.add_all(fans)
+    tweets = [
+        Tweet(content=f"bulk {i}", media_ids="[2, 1]", author_id=test_user.id)
+        for i in range(20)
+    ]
+    async_session.add_all(tweets)
+    await async_session.commit()
+    async_session.add_all(
+        Like(tweet_id=tweet.id, user_id=fan.id) for tweet in tweets for fan in fans
+    )
+    await async_session.commit()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with count_queries(async_engine) as statements:
+            response = await client.get("/api/tweets")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["result"] is True
+    assert len(body["tweets"]) == 23
+    assert len(statements) == 3  # твиты с авторами, медиа, лайки с пользователями
+
+    first = body["tweets"][0]
+    assert first["author"] == {"id": test_user.id, "name": "testuser"}
+    assert first["attachments"] == [
+        f"{config.MEDIA_BASE_URL}image1.jpg",
+        f"{config.MEDIA_BASE_URL}image2.jpg",
+    ]
+    assert [like["name"] for like in first["likes"]] == ["liker", "testuser"]
+    bulk = body["tweets"][-1]
+    assert bulk["attachments"] == first["attachments"]
+    assert [like["name"] for like in bulk["likes"]] == ["fan0", "fan1", "fan2"]
+
+
+@pytest.mark.asyncio
+async def test_profile_projection_skips_unselected_lists(
+    async_engine, async_session, test_user
+):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with count_queries(async_engine) as statements:
+            full = await client.get(f"/api/users/{test_user.id}")
+        with count_queries(async_engine) as projected:
+            response = await client.get(
+                "/api/users/me",
+                params={"fields": "id,name"},
+                headers={"api-key": test_user.api_key},
+            )
+
+    assert full.json()["user"] == {
+        "id": test_user.id,
+        "name": "testuser",
+        "followers": [],
+        "following": [],
+        "stats": {
+            "tweets_count": 0,
+            "followers_count": 0,
+            "following_count": 0,
+            "likes_count": 0,
+        },
+    }
+    assert len(statements) == 3
+    assert response.json() == {
+        "result": True,
+        "user": {"id": test_user.id, "name": "testuser"},
+    }
+    assert len(projected) == 1
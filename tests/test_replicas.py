@@ -0,0 +1,151 @@
+import pytest
+import pytest_asyncio
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src import database
+from src.database import Base, get_async_db
+from src.models import User
+from src.replicas import ReadYourWritesMiddleware, SessionRouter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+async def make_db(path, user_name):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with factory() as session:
+        session.add(User(name=user_name, api_key=user_name))
+        await session.commit()
+    return engine, factory
+
+
+async def served_by(router, written_at=None):
+    async with router.read_session(written_at) as session:
+        result = await session.execute(select(User.name))
+        return result.scalar_one()
+
+
+@pytest_asyncio.fixture
+async def databases(tmp_path):
+    primary_engine, primary = await make_db(tmp_path / "primary.db", "primary")
+    replica_engine, replica = await make_db(tmp_path / "replica.db", "replica")
+    yield primary, replica
+    await primary_engine.dispose()
+    await replica_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_and_fall_back_after_write(databases):
+    primary, replica = databases
+    clock = FakeClock()
+    router = SessionRouter(primary, [replica], read_your_writes_seconds=5, clock=clock)
+
+    assert await served_by(router) == "replica"
+
+    written_at = clock.now
+    assert await served_by(router, written_at) == "primary"
+
+    clock.now += 6
+    assert await served_by(router, written_at) == "replica"
+    # Метка из далёкого будущего не закрепляет чтения за primary
+    assert await served_by(router, clock.now + 60) == "replica"
+
+
+@pytest.mark.asyncio
+async def test_last_write_cookie_is_shared_by_workers(databases, monkeypatch):
+    primary, replica = databases
+    monkeypatch.setattr(database, "async_session", primary)
+
+    # Два «воркера» с собственными роутерами: общая только cookie клиента
+    def worker():
+        router = SessionRouter(primary, [replica], read_your_writes_seconds=5)
+        app = FastAPI()
+
+        @app.middleware("http")
+        async def use_router(request, call_next):
+            monkeypatch.setattr(database, "session_router", router)
+            return await call_next(request)
+
+        @app.post("/write")
+        async def write(db: AsyncSession = Depends(get_async_db)):
+            db.add(User(name="new", api_key="new"))
+            await db.commit()
+            return {"result": True}
+
+        @app.post("/fail", status_code=401)
+        async def fail(db: AsyncSession = Depends(get_async_db)):
+            return {"result": False}
+
+        @app.get("/read")
+        async def read(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(select(User.name).order_by(User.id))
+            return {"served_by": result.scalars().first()}
+
+        app.add_middleware(ReadYourWritesMiddleware, max_age=5)
+        return app
+
+    async with (
+        AsyncClient(transport=ASGITransport(app=worker()), base_url="http://a") as a,
+        AsyncClient(transport=ASGITransport(app=worker()), base_url="http://a") as b,
+    ):
+        failed = await a.post("/fail")
+        assert "set-cookie" not in failed.headers
+        assert (await b.get("/read")).json() == {"served_by": "replica"}
+
+        written = await a.post("/write")
+        cookie = written.headers["set-cookie"]
+        assert cookie.startswith("last_write=")
+        assert "Max-Age=5" in cookie
+
+        # Запись прошла через воркер A, чтение через B видит её на primary
+        b.cookies.set("last_write", written.cookies["last_write"])
+        read = await b.get("/read")
+        assert read.json() == {"served_by": "primary"}
+
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_is_ejected(databases, tmp_path):
+    primary, replica = databases
+    broken_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path}/missing/dir/replica.db"
+    )
+    broken = async_sessionmaker(bind=broken_engine, class_=AsyncSession)
+    clock = FakeClock()
+    router = SessionRouter(primary, [broken, replica], eject_seconds=30, clock=clock)
+
+    # Round-robin visits both replicas; the broken one is skipped
+    assert {await served_by(router) for _ in range(4)} == {"replica"}
+    assert router.healthy_replicas() == [1]
+
+    clock.now += 31
+    assert sorted(router.healthy_replicas()) == [0, 1]
+
+    await broken_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_primary_serves_reads_without_healthy_replicas(databases, tmp_path):
+    primary, _ = databases
+    broken_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path}/missing/dir/replica.db"
+    )
+    broken = async_sessionmaker(bind=broken_engine, class_=AsyncSession)
+    router = SessionRouter(primary, [broken])
+
+    assert await served_by(router) == "primary"
+    assert router.healthy_replicas() == []
+
+    await broken_engine.dispose()
@@ -0,0 +1,68 @@
+import importlib.util
+from pathlib import Path
+from types import SimpleNamespace
+
+from src import config
+from src.database import pool_options
+from src.likes_buffer import like_buffer
+from src.serving import after_fork, shared_state_warnings, worker_log_path
+
+
+def load_gunicorn_conf():
+    path = Path(__file__).parent.parent / "gunicorn.conf.py"
+    spec = importlib.util.spec_from_file_location("gunicorn_conf", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_pool_budget_is_split_between_workers():
+    assert "pool_size" not in pool_options(0, 4)
+    assert pool_options(40, 4)["pool_size"] == 10
+    assert pool_options(40, 4)["max_overflow"] == 0
+    # Каждому процессу достаётся хотя бы одно соединение
+    assert pool_options(3, 8)["pool_size"] == 1
+
+
+def test_worker_slots_are_reused(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    conf = load_gunicorn_conf()
+    assert conf.workers == 3
+    server = SimpleNamespace(WORKERS={})
+    workers = []
+    for pid in (10, 11, 12):
+        worker = SimpleNamespace()
+        conf.pre_fork(server, worker)
+        server.WORKERS[pid] = worker
+        workers.append(worker)
+    assert [w.slot for w in workers] == [0, 1, 2]
+
+    # Упавший процесс заменяется новым с тем же номером
+    del server.WORKERS[11]
+    replacement = SimpleNamespace()
+    conf.pre_fork(server, replacement)
+    assert replacement.slot == 1
+
+
+def test_after_fork_uses_per_slot_like_log(monkeypatch):
+    monkeypatch.setattr(config, "LIKES_LOG_PATH", "/tmp/likes.log")
+    original = like_buffer.log_path
+    try:
+        after_fork(2)
+        assert like_buffer.log_path == "/tmp/likes.log.2"
+        assert like_buffer.flushing_path == "/tmp/likes.log.2.flushing"
+    finally:
+        like_buffer.use_log(original)
+    assert worker_log_path("/tmp/likes.log", 0) == "/tmp/likes.log"
+
+
+def test_shared_state_warnings(monkeypatch):
+    monkeypatch.setattr(config, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(config, "RATE_LIMIT_BACKEND", "memory")
+    monkeypatch.setattr(config, "EVENTS_BACKEND", "memory")
+    assert shared_state_warnings(1) == []
+    assert len(shared_state_warnings(4)) == 2
+
+    monkeypatch.setattr(config, "RATE_LIMIT_BACKEND", "sqlite:///tmp/buckets.db")
+    monkeypatch.setattr(config, "EVENTS_BACKEND", "postgres")
+    assert shared_state_warnings(4) == []
@@ -0,0 +1,193 @@
+"""
+Длительный прогон смешанной нагрузки (soak test).
+
+Запускается только с переменной SOAK_SECONDS, например:
+
+    SOAK_SECONDS=600 pytest tests/test_soak.py -s
+
+Клиенты читают ленту и профили, ставят и снимают лайки и публикуют твиты.
+Время делится на окна; в каждом окне записываются задержки, ожидание
+соединения из пула и память (снимки tracemalloc). Тест падает, если
+память или p95 задержки уходят дальше порогов:
+
+- SOAK_MAX_MEMORY_GROWTH_MB: рост памяти от первого окна до последнего
+- SOAK_MAX_P95_DRIFT: во сколько раз p95 последнего окна может превышать
+  p95 первого
+- SOAK_MAX_POOL_WAIT_MS: p95 ожидания соединения
+
+SOAK_DATABASE_URL задаёт базу (по умолчанию файл SQLite во временном
+каталоге).
+"""
+
+import asyncio
+import gc
+import os
+import random
+import time
+import tracemalloc
+
+import pytest
+from fastapi import Request
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src import config, sqlite_mode
+from src.database import DB_POOL_TIMEOUT, Base, get_async_db, pool_options
+from src.main import app
+from src.models import Tweet, User
+from src.pool import TimedQueuePool
+
+SOAK_SECONDS = float(os.getenv("SOAK_SECONDS", "0"))
+WINDOWS = int(os.getenv("SOAK_WINDOWS", "10"))
+CLIENTS = int(os.getenv("SOAK_CLIENTS", "4"))
+MAX_MEMORY_GROWTH_MB = float(os.getenv("SOAK_MAX_MEMORY_GROWTH_MB", "16"))
+MAX_P95_DRIFT = float(os.getenv("SOAK_MAX_P95_DRIFT", "1.5"))
+MAX_POOL_WAIT_MS = float(os.getenv("SOAK_MAX_POOL_WAIT_MS", "250"))
+USERS = 50
+TWEETS = 200
+
+pytestmark = pytest.mark.skipif(
+    not SOAK_SECONDS, reason="set SOAK_SECONDS to run the soak suite"
+)
+
+
+async def make_engines(tmp_path):
+    url = os.getenv("SOAK_DATABASE_URL")
+    if url is None:
+        url = f"sqlite+aiosqlite:///{tmp_path / 'soak.db'}"
+    if sqlite_mode.is_sqlite_file(url):
+        writer, reader = sqlite_mode.create_engines(
+            url, poolclass=TimedQueuePool, pool_timeout=DB_POOL_TIMEOUT
+        )
+    else:
+        writer = reader = create_async_engine(url, **pool_options())
+    async with writer.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            [
+                {"id": i, "name": f"soak{i}", "api_key": f"soak{i}"}
+                for i in range(1, USERS + 1)
+            ],
+        )
+        await conn.execute(
+            insert(Tweet),
+            [
+                {"id": i, "content": f"tweet {i}", "author_id": i % USERS + 1}
+                for i in range(1, TWEETS + 1)
+            ],
+        )
+    return writer, reader
+
+
+async def client_loop(client, rnd, deadline, window_of, windows):
+    while time.perf_counter() < deadline:
+        user = rnd.randint(1, USERS)
+        headers = {"api-key": f"soak{user}"}
+        roll = rnd.random()
+        started = time.perf_counter()
+        if roll < 0.6:
+            response = await client.get(
+                "/api/tweets",
+                params={"likes": "compact", "fields": "id,content,like_count"},
+                headers=headers,
+            )
+        elif roll < 0.7:
+            response = await client.get(f"/api/users/{rnd.randint(1, USERS)}")
+        elif roll < 0.95:
+            method = client.post if rnd.random() < 0.5 else client.delete
+            response = await method(
+                f"/api/tweets/{rnd.randint(1, TWEETS)}/likes", headers=headers
+            )
+        else:
+            response = await client.post(
+                "/api/tweets", json={"tweet_data": "soak"}, headers=headers
+            )
+        window = windows[window_of(started)]
+        window["latencies"].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 500:
+            window["errors"] += 1
+
+
+def p95(samples):
+    samples = sorted(samples)
+    return samples[int(len(samples) * 0.95)] if samples else 0.0
+
+
+@pytest.mark.asyncio
+async def test_soak(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RATE_LIMIT_ENABLED", False)
+    writer, reader = await make_engines(tmp_path)
+
+    async def override_get_db(request: Request):
+        engine = reader if request.method == "GET" else writer
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    # Первое окно прогревает кэши и пулы и в сравнении не участвует
+    window_seconds = SOAK_SECONDS / (WINDOWS + 1)
+    windows = [{"latencies": [], "errors": 0} for _ in range(WINDOWS + 1)]
+    started = time.perf_counter()
+    deadline = started + SOAK_SECONDS
+
+    def window_of(at):
+        return min(WINDOWS, int((at - started) / window_seconds))
+
+    memory = []
+
+    async def sample_memory():
+        for index in range(1, WINDOWS + 1):
+            await asyncio.sleep(started + window_seconds * index - time.perf_counter())
+            gc.collect()
+            if index == 1:
+                tracemalloc.start()
+            memory.append(tracemalloc.get_traced_memory()[0])
+
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    try:
+        async with AsyncClient(transport=transport, base_url="http://soak") as client:
+            await asyncio.gather(
+                sample_memory(),
+                *(
+                    client_loop(client, random.Random(i), deadline, window_of, windows)
+                    for i in range(CLIENTS)
+                ),
+            )
+        gc.collect()
+        memory.append(tracemalloc.get_traced_memory()[0])
+    finally:
+        tracemalloc.stop()
+
+    pools = {"writer": writer.pool}
+    if reader is not writer:
+        pools["reader"] = reader.pool
+    stats = {name: pool.stats.snapshot() for name, pool in pools.items()}
+    leaked = {name: pool.checkedout() for name, pool in pools.items()}
+    first, last = windows[1]["latencies"], windows[-1]["latencies"]
+    growth_mb = (memory[-1] - memory[0]) / 2**20
+    requests = sum(len(w["latencies"]) for w in windows)
+    errors = sum(w["errors"] for w in windows)
+
+    print(f"\nsoak: {requests} requests in {SOAK_SECONDS:.0f}s, {errors} errors")
+    for index, window in enumerate(windows[1:], start=1):
+        print(
+            f"  window {index:>2}: {len(window['latencies']):>6} requests  "
+            f"p95={p95(window['latencies']):8.2f}ms  "
+            f"memory={memory[index] / 2**20:8.2f}MiB"
+        )
+    print(f"  memory growth {growth_mb:.2f}MiB, pools {stats}, checked out {leaked}")
+    await writer.dispose()
+    if reader is not writer:
+        await reader.dispose()
+
+    assert errors == 0
+    assert leaked == dict.fromkeys(pools, 0)
+    assert all(s["timeouts"] == 0 for s in stats.values())
+    assert all(s["wait_p95_ms"] <= MAX_POOL_WAIT_MS for s in stats.values())
+    assert growth_mb <= MAX_MEMORY_GROWTH_MB
+    # Небольшой абсолютный запас, чтобы шум быстрых окон не ронял тест
+    assert p95(last) <= p95(first) * MAX_P95_DRIFT + 5
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src import sqlite_mode
+from src.database import Base
+from src.models import Tweet, User
+
+
+def test_is_sqlite_file():
+    assert sqlite_mode.is_sqlite_file("sqlite+aiosqlite:////data/app.db")
+    assert not sqlite_mode.is_sqlite_file("sqlite+aiosqlite:///:memory:")
+    assert not sqlite_mode.is_sqlite_file("postgresql+asyncpg://u:p@db/app")
+
+
+@pytest.mark.asyncio
+async def test_pragmas_and_concurrent_writes(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'app.db'}"
+    writer, reader = sqlite_mode.create_engines(url, read_pool_size=2)
+    async with writer.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(User.__table__.insert().values(name="w", api_key="w"))
+
+    async with reader.connect() as conn:
+        assert (await conn.scalar(text("PRAGMA journal_mode"))) == "wal"
+        assert (await conn.scalar(text("PRAGMA synchronous"))) == 1  # NORMAL
+        assert (await conn.scalar(text("PRAGMA busy_timeout"))) == 5000
+
+    writes = async_sessionmaker(bind=writer, class_=AsyncSession)
+    reads = async_sessionmaker(bind=reader, class_=AsyncSession)
+
+    async def read_then_write(i):
+        # The read-then-write pattern that deadlocks deferred transactions
+        async with writes() as db:
+            author = await db.scalar(select(User.id).where(User.api_key == "w"))
+            db.add(Tweet(content=f"t{i}", author_id=author))
+            await db.commit()
+
+    async def read():
+        async with reads() as db:
+            return await db.scalar(select(func.count()).select_from(Tweet))
+
+    results = await asyncio.gather(
+        *(read_then_write(i) for i in range(30)), *(read() for _ in range(30))
+    )
+    assert all(count <= 30 for count in results[30:])
+    assert await read() == 30
+
+    await writer.dispose()
+    await reader.dispose()
@@ -0,0 +1,51 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.database import get_async_db
+from src.main import app
+from src.models import Tweet, User
+
+
+@pytest.mark.asyncio
+async def test_author_timeline_pages(async_session, test_user):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    other = User(name="other", api_key="other")
+    async_session.add(other)
+    now = datetime.now(UTC)
+    # Два твита с одинаковым временем: порядок решает id
+    tweets = [
+        Tweet(
+            content=f"t{i}",
+            author_id=test_user.id,
+            created_at=now - timedelta(minutes=min(i, 3)),
+        )
+        for i in range(5)
+    ]
+    tweets[2].deleted_at = now
+    async_session.add_all(tweets)
+    async_session.add(Tweet(content="foreign", author_id=2, created_at=now))
+    await async_session.commit()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        url = f"/api/users/{test_user.id}/tweets"
+        first = await client.get(url, params={"limit": 2})
+        second = await client.get(
+            url, params={"limit": 2, "before": first.json()["next_cursor"]}
+        )
+        missing = await client.get("/api/users/999/tweets")
+
+    assert [t["content"] for t in first.json()["tweets"]] == ["t0", "t1"]
+    assert first.json()["tweets"][0]["author"] == {
+        "id": test_user.id,
+        "name": "testuser",
+    }
+    assert [t["content"] for t in second.json()["tweets"]] == ["t4", "t3"]
+    assert second.json()["next_cursor"] is None
+    assert missing.status_code == 404
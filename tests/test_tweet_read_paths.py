@@ -0,0 +1,66 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src import config
+from src.database import get_async_db
+from src.main import app
+from src.models import Tweet
+
+
+@pytest.mark.asyncio
+async def test_json_read_path_matches_orm(
+    async_session, test_user, test_tweet_with_likes, monkeypatch
+):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        monkeypatch.setattr(config, "TWEETS_READ_PATH", "orm")
+        orm_response = await client.get(
+            "/api/tweets", headers={"api-key": test_user.api_key}
+        )
+        monkeypatch.setattr(config, "TWEETS_READ_PATH", "json")
+        json_response = await client.get(
+            "/api/tweets", headers={"api-key": test_user.api_key}
+        )
+
+    assert json_response.status_code == 200
+    assert json_response.headers["content-type"] == "application/json"
+    assert json_response.json() == orm_response.json()
+    assert len(json_response.json()["tweets"][0]["likes"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_json_read_path_orders_like_orm(async_session, test_user, monkeypatch):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    # ID и время создания идут в разном порядке
+    now = datetime.now(UTC)
+    async_session.add_all(
+        Tweet(
+            content=f"tweet {i}",
+            author_id=test_user.id,
+            created_at=now - timedelta(minutes=i),
+        )
+        for i in range(3)
+    )
+    await async_session.commit()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        monkeypatch.setattr(config, "TWEETS_READ_PATH", "orm")
+        orm_response = await client.get("/api/tweets")
+        monkeypatch.setattr(config, "TWEETS_READ_PATH", "json")
+        json_response = await client.get("/api/tweets")
+
+    contents = [tweet["content"] for tweet in json_response.json()["tweets"]]
+    assert contents == ["tweet 2", "tweet 1", "tweet 0"]
+    assert json_response.json() == orm_response.json()
@@ -1,3 +1,4 @@
+import os
 import tempfile
 
 import pytest
@@ -9,6 +10,10 @@ from src.main import app
 from src.models import Like, Tweet, User, followers_table
 from src.routes import medias
 
+SAMPLE_JPEG = os.path.join(
+    os.path.dirname(__file__), "..", "media", "realistic-shark-ocean_23-2151415359.jpg"
+)
+
 # # Подключаем фикстуры
 # from tests.conftest import async_session, test_user
 
@@ -76,8 +81,8 @@ async def test_get_tweets_failure(async_session, monkeypatch):
     def broken_select(*args, **kwargs):
         raise AttributeError("Mocked select error")
 
-    # Подменяем select в конкретном месте, где его использует get_tweets
-    monkeypatch.setattr("src.routes.tweets.select", broken_select)
+    # Подменяем select там, где get_tweets строит запрос ленты
+    monkeypatch.setattr("src.services.read_models.select", broken_select)
 
     async def override_get_db():
         yield async_session
@@ -110,7 +115,8 @@ async def test_upload_media_success(async_session, test_user, test_tweet_with_li
         app.dependency_overrides[get_async_db] = override_get_db
 
         transport = ASGITransport(app=app)
-        file_content = b"test image content"
+        with open(SAMPLE_JPEG, "rb") as sample:
+            file_content = sample.read()
         files = {"file": ("image.jpg", file_content, "image/jpeg")}
 
         async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -122,6 +128,7 @@ async def test_upload_media_success(async_session, test_user, test_tweet_with_li
         data = response.json()
         assert data["result"] is True
         assert isinstance(data["media_id"], int)
+        assert (data["width"], data["height"]) == (626, 351)
 
 
 @pytest.mark.asyncio
@@ -148,9 +155,17 @@ async def test_delete_own_tweet(async_session, test_user, test_tweet_with_likes)
     assert response.status_code == 200
     assert response.json() == {"result": True}
 
-    # Проверяем, что твит действительно удалён из базы
+    # Твит помечен удалённым (tombstone) и больше не отдаётся API
     deleted = await async_session.get(Tweet, tweet_id)
-    assert deleted is None
+    await async_session.refresh(deleted)
+    assert deleted.deleted_at is not None
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get(f"/api/tweets/{tweet_id}")
+        feed = await ac.get("/api/tweets")
+
+    assert response.status_code == 404
+    assert tweet_id not in [tweet["id"] for tweet in feed.json()["tweets"]]
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,154 @@
+import json
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, select
+
+from src import config
+from src.database import get_async_db
+from src.likes_buffer import apply_events
+from src.main import app
+from src.models import Job, Like, Tweet, User, UserStats
+from src.routes.tweets import purge_tweet
+from src.services.user_stats import reconcile_batch
+
+ZERO = {
+    "tweets_count": 0,
+    "followers_count": 0,
+    "following_count": 0,
+    "likes_count": 0,
+}
+
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def get_stats(session, user_id):
+    stats = await session.get(UserStats, user_id, populate_existing=True)
+    return {name: getattr(stats, name) for name in ZERO} if stats else ZERO
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_write_paths(async_engine, async_session, test_user):
+    async def override_get_db():
+        yield async_session
+
+    app.dependency_overrides[get_async_db] = override_get_db
+
+    other = User(name="other", api_key="other")
+    async_session.add(other)
+    await async_session.commit()
+
+    me = {"api-key": test_user.api_key}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        created = await client.post(
+            "/api/tweets", json={"tweet_data": "hello"}, headers=me
+        )
+        tweet_id = created.json()["tweet_id"]
+        await client.post(f"/api/tweets/{tweet_id}/likes", headers=me)
+        await client.post(f"/api/tweets/{tweet_id}/likes", headers={"api-key": "other"})
+        await client.post(f"/api/users/{other.id}/follow", headers=me)
+
+        with count_queries(async_engine) as statements:
+            profile = await client.get(
+                "/api/users/me", params={"fields": "id,stats"}, headers=me
+            )
+        other_profile = await client.get(f"/api/users/{other.id}")
+
+        # Отмена всех действий возвращает счётчики к нулю
+        await client.delete(f"/api/users/{other.id}/follow", headers=me)
+        await client.delete(f"/api/tweets/{tweet_id}/likes", headers=me)
+        await client.delete(f"/api/tweets/{tweet_id}", headers=me)
+
+    assert profile.json() == {
+        "result": True,
+        "user": {
+            "id": test_user.id,
+            "stats": {
+                "tweets_count": 1,
+                "followers_count": 0,
+                "following_count": 1,
+                "likes_count": 1,
+            },
+        },
+    }
+    assert len(statements) == 1
+    assert "count(" not in statements[0].lower()
+    assert other_profile.json()["user"]["stats"] == {
+        **ZERO,
+        "followers_count": 1,
+        "likes_count": 1,
+    }
+    assert await get_stats(async_session, test_user.id) == ZERO
+
+    # Очистка удалённого твита снимает лайки и с чужих счётчиков
+    await purge_tweet(async_session, {"tweet_id": tweet_id})
+    assert await get_stats(async_session, other.id) == ZERO
+
+
+@pytest.mark.asyncio
+async def test_write_behind_flush_counts_written_rows(async_session, test_user):
+    tweet = Tweet(content="t", author_id=test_user.id)
+    async_session.add(tweet)
+    await async_session.commit()
+
+    key = (test_user.id, tweet.id)
+    await apply_events(async_session, {key: True})
+    await apply_events(async_session, {key: True})  # повтор из журнала
+    assert (await get_stats(async_session, test_user.id))["likes_count"] == 1
+
+    await apply_events(async_session, {key: False})
+    await apply_events(async_session, {key: False})
+    assert (await get_stats(async_session, test_user.id))["likes_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reconcile_repairs_drift(async_session, test_user, monkeypatch):
+    monkeypatch.setattr(config, "USER_STATS_RECONCILE_BATCH", 1)
+
+    other = User(name="other", api_key="other")
+    async_session.add(other)
+    await async_session.commit()
+    # Строки записаны в обход API, а счётчик испорчен
+    tweet = Tweet(content="t", author_id=test_user.id)
+    async_session.add(tweet)
+    await async_session.commit()
+    async_session.add(Like(user_id=other.id, tweet_id=tweet.id))
+    async_session.add(UserStats(user_id=test_user.id, followers_count=7))
+    await async_session.commit()
+
+    payload = {"after_id": 0}
+    for _ in range(3):
+        await reconcile_batch(async_session, payload)
+        job = (
+            await async_session.execute(
+                select(Job)
+                .where(Job.kind == "user_stats.reconcile", Job.status == "pending")
+                .order_by(Job.id.desc())
+            )
+        ).scalar()
+        job.status = "done"
+        await async_session.commit()
+        payload = json.loads(job.payload)
+
+    assert await get_stats(async_session, test_user.id) == {**ZERO, "tweets_count": 1}
+    assert await get_stats(async_session, other.id) == {**ZERO, "likes_count": 1}
+    # Последний пакет пуст: следующий проход запланирован с начала
+    assert payload == {"after_id": 0}
+    assert job.run_at.replace(tzinfo=UTC) > datetime.now(UTC) + timedelta(
+        seconds=config.USER_STATS_RECONCILE_INTERVAL - 10
+    )